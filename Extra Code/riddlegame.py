@@ -1,137 +1,112 @@
-import sqlite3
-import random
-import time
-
-# Connect to SQLite database
-conn = sqlite3.connect('riddledb.db')
-c = conn.cursor()
-
-# Fetch questions by difficulty
-def fetch_questions(difficulty):
-    c.execute("SELECT * FROM riddles WHERE difficulty = ?", (difficulty,))
-    return c.fetchall()
-
-# Fetch additional Medium1 riddles for Time Challenge Mode
-def fetch_time_challenge_questions():
-    c.execute("SELECT * FROM riddles WHERE difficulty = 'Medium1'")
-    return c.fetchall()
-
-# Display a question
-def display_question(question):
-    print(f"Riddle: {question[1]}")
-    print(f"1) {question[2]}")
-    print(f"2) {question[3]}")
-    print(f"3) {question[4]}")
-    print(f"4) {question[5]}")
-
-# Classic Mode Game
-def classic_mode():
-    print("\nWelcome to Classic Mode!")
-    hp = 5  # Player's lives
-    difficulties = ["Easy", "Medium", "Hard"]
-    required_correct = {"Easy": 7, "Medium": 7, "Hard": 7}
-    riddles_data = {"Easy": fetch_questions("Easy"), 
-                    "Medium": fetch_questions("Medium"),
-                    "Hard": fetch_questions("Hard")}
-
-    for difficulty in difficulties:
-        print(f"\n--- {difficulty} Mode ---")
-        completed = 0
-        questions = random.sample(riddles_data[difficulty], len(riddles_data[difficulty]))  # Shuffle questions
-
-        while completed < required_correct[difficulty] and hp > 0:
-            print(f"Progress: {completed}/{required_correct[difficulty]} in {difficulty}")
-            question = questions.pop(0)  # Get the next shuffled question
-            display_question(question)
-            answer = int(input("Your answer (1-4): "))
-            
-            if answer == question[6]:
-                print("Correct!")
-                completed += 1
-            else:
-                print("Incorrect!")
-                hp -= 1
-                questions.append(question)  # Append incorrect question to the end
-                print(f"You have {hp} HP left.")
-                
-            if hp == 0:
-                print("Game Over! You ran out of HP.")
-                break
-        
-        if hp > 0:
-            print(f"Completed all {difficulty} riddles!")
-        else:
-            print(f"You couldn't complete {difficulty} riddles. Try again later.")
-            return
-    
-    print("Congrats! You've completed all the riddles in Classic Mode.")
-
-# Time Challenge Mode
-def time_challenge_mode():
-    print("\nWelcome to Time Challenge Mode!")
-    start_time = time.time()  # Record the start time
-    score = 0
-    streak = 0
-    highest_streak = 0
-    correct_answers = 0  # Initialize the counter for correct answers
-    remaining_time = 180  # Initialize the remaining time to 3 minutes
-    total_deduction = 0  # Initialize the total deduction time
-    riddles = random.sample(fetch_time_challenge_questions(), len(fetch_time_challenge_questions()))  # Shuffle questions
-
-    while remaining_time > 0:  # Continue until the remaining time runs out
-        question = riddles.pop(0)
-        display_question(question)
-        answer = int(input("Your answer (1-4): "))
-        
-        # Calculate elapsed time
-        elapsed_time = time.time() - start_time
-        remaining_time = 180 - int(elapsed_time) - total_deduction  # Adjust remaining time with total deductions
-        
-        if answer == question[6]:
-            score += 1
-            streak += 1
-            highest_streak = max(streak, highest_streak)
-            correct_answers += 1  # Increment the counter for correct answers
-            print("Correct!")
-        else:
-            print("Incorrect!")
-            total_deduction += 10  # Increment total deduction by 10 seconds
-            remaining_time = max(0, 180 - int(elapsed_time) - total_deduction)  # Ensure remaining time doesn't go negative
-            print(f"Time left: {remaining_time}s")
-            streak = 0  # Reset streak on wrong answer
-            riddles.append(question)  # Re-add the incorrect question to the list
-        
-        # Break if time is up
-        if remaining_time <= 0:
-            break
-    
-    final_score = score * highest_streak
-    print(f"\nTime's up! Your final score is {final_score}.")
-    print(f"Your highest streak was {highest_streak}.")
-    print(f"Your score is multiplied by the highest streak for a total of {final_score} points.")
-    print(f"You answered {correct_answers} questions correctly.")
-
-# Main menu function
-def main_menu():
-    print("Welcome to the Riddle Game! Get ready to challenge your mind with some fun riddles.")
-    while True:
-        print("\nSelect Game Mode:")
-        print("1) Classic Mode")
-        print("2) Time Challenge Mode")
-        print("3) Exit")
-        
-        choice = input("Your choice (1-3): ")
-        
-        if choice == "1":
-            classic_mode()
-        elif choice == "2":
-            time_challenge_mode()
-        elif choice == "3":
-            print("Exiting game. Goodbye!")
-            break
-        else:
-            print("Invalid choice. Please select a valid mode (1-3).")
-
-# Start the game
-if __name__ == "__main__":
-    main_menu()
\ No newline at end of file
+import argparse
+import os
+import sys
+
+# The game rules live next to mainriddlegame.py, one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gameclient import RemoteGameService, parse_address
+from gameengine import CLASSIC, TIME_CHALLENGE
+from gameservice import GameService
+
+# Display a question
+def display_question(question):
+    print(f"Riddle: {question.riddle}")
+    for number, choice in enumerate(question.choices, start=1):
+        print(f"{number}) {choice}")
+
+# Classic Mode Game
+def classic_mode(service, player):
+    print("\nWelcome to Classic Mode!")
+    session = service.new_session(CLASSIC, player, requeue_missed=True)
+
+    print(f"\n--- {session.difficulty} Mode ---")
+    while not session.finished:
+        difficulty = session.difficulty
+        print(f"Progress: {session.progress}/{session.required} in {difficulty}")
+        display_question(session.current)
+        answer = int(input("Your answer (1-4): "))
+
+        if session.answer(answer):
+            print("Correct!")
+        else:
+            print("Incorrect!")
+            print(f"You have {session.hp} HP left.")
+
+        if session.hp == 0:
+            service.finish_session(player, session)
+            print("Game Over! You ran out of HP.")
+            print(f"You couldn't complete {difficulty} riddles. Try again later.")
+            return
+
+        if session.difficulty != difficulty or session.completed:
+            print(f"Completed all {difficulty} riddles!")
+            if not session.finished:
+                print(f"\n--- {session.difficulty} Mode ---")
+
+    service.finish_session(player, session)
+    print("Congrats! You've completed all the riddles in Classic Mode.")
+
+# Time Challenge Mode
+def time_challenge_mode(service, player):
+    print("\nWelcome to Time Challenge Mode!")
+    session = service.new_session(TIME_CHALLENGE, player, requeue_missed=True)
+
+    while not session.finished:  # Continue until the remaining time runs out
+        display_question(session.current)
+        answer = int(input("Your answer (1-4): "))
+        
+        correct = session.answer(answer)
+        if correct is None:
+            break  # The time ran out while the riddle was on screen
+        if correct:
+            print("Correct!")
+        else:
+            print("Incorrect!")
+            print(f"Time left: {session.remaining_time}s")
+    
+    service.finish_session(player, session)
+    final_score = session.final_score
+    print(f"\nTime's up! Your final score is {final_score}.")
+    print(f"Your highest streak was {session.highest_streak}.")
+    print(f"Your score is multiplied by the highest streak for a total of {final_score} points.")
+    print(f"You answered {session.correct_answers} questions correctly.")
+
+# Main menu function
+def main_menu(service):
+    print("Welcome to the Riddle Game! Get ready to challenge your mind with some fun riddles.")
+    player = service.guest()
+    print(f"You are playing as {player}.")
+    while True:
+        print("\nSelect Game Mode:")
+        print("1) Classic Mode")
+        print("2) Time Challenge Mode")
+        print("3) Exit")
+        
+        choice = input("Your choice (1-3): ")
+        
+        if choice == "1":
+            classic_mode(service, player)
+        elif choice == "2":
+            time_challenge_mode(service, player)
+        elif choice == "3":
+            print("Exiting game. Goodbye!")
+            break
+        else:
+            print("Invalid choice. Please select a valid mode (1-3).")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play the Riddle Game in the terminal.")
+    parser.add_argument("--server", metavar="HOST:PORT", help="Play on a game server instead of the local database")
+    args = parser.parse_args(argv)
+
+    service = RemoteGameService(*parse_address(args.server)) if args.server else GameService()
+    service.ensure_schema()
+    try:
+        main_menu(service)
+    finally:
+        service.close()
+
+# Start the game
+if __name__ == "__main__":
+    main()
\ No newline at end of file
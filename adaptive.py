@@ -0,0 +1,287 @@
+"""Adaptive Classic Mode: riddles picked to match the player's skill.
+
+Riddles and players are rated Elo-style. A player with rating ``p`` is
+expected to solve a riddle rated ``r`` with probability
+1 / (1 + 10 ** ((r - p) / 400)); after each answer both ratings move toward
+what happened. The next riddle is the unused one whose rating is closest to
+the rating the player should solve TARGET_SUCCESS of the time.
+
+AdaptiveModel keeps every riddle's rating, attempts, solves and total
+answer time in flat arrays, plus a RankIndex of (rating, riddle) keys, so a
+pick is a seek into the ratings order and an update is a remove and an
+insert: both O(log n) however large the catalog. Ratings start from the
+difficulty labels (or from recorded solve rates) and are saved to the
+riddle_stats and player_skill tables (see migrations.py).
+"""
+import math
+import random
+import threading
+import time
+from array import array
+
+from gameengine import ADAPTIVE, CLASSIC_DIFFICULTIES, CLASSIC_HP, REQUIRED_CORRECT
+from history import solve_rates
+from instrumentation import timed
+from leaderboard import RankIndex
+from questiondealer import new_seed
+
+DEFAULT_RATING = 1000.0
+DIFFICULTY_RATINGS = {"Easy": 800.0, "Medium": 1000.0, "Hard": 1200.0}
+PLAYER_K = 48.0  # How far one answer moves a player's rating
+RIDDLE_K = 8.0  # Riddles see many players, so they move more slowly
+TARGET_SUCCESS = 0.7
+TARGET_JITTER = 60.0  # Spread in the target rating, so sessions do not all see the same riddles
+MIN_HISTORY_ATTEMPTS = 20  # Answers needed before a recorded solve rate replaces the label's rating
+
+SELECT_RIDDLE_STATS = "SELECT riddle_id, rating, attempts, solved, total_ms FROM riddle_stats"
+UPSERT_RIDDLE_STATS = '''
+    INSERT INTO riddle_stats (riddle_id, rating, attempts, solved, total_ms) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (riddle_id) DO UPDATE SET
+        rating = excluded.rating, attempts = excluded.attempts,
+        solved = excluded.solved, total_ms = excluded.total_ms
+'''
+SELECT_PLAYER_SKILL = "SELECT rating FROM player_skill WHERE username = ?"
+UPSERT_PLAYER_SKILL = '''
+    INSERT INTO player_skill (username, rating, answers) VALUES (?, ?, ?)
+    ON CONFLICT (username) DO UPDATE SET rating = excluded.rating, answers = player_skill.answers + excluded.answers
+'''
+
+
+def expected_success(player_rating, riddle_rating):
+    return 1.0 / (1.0 + 10.0 ** ((riddle_rating - player_rating) / 400.0))
+
+
+def rating_for_success(player_rating, success):
+    """The riddle rating a player is expected to solve with the given probability."""
+    return player_rating - 400.0 * math.log10(success / (1.0 - success))
+
+
+class AdaptiveModel:
+    """Ratings and answer statistics for a set of riddles, updated as answers come in."""
+
+    def __init__(self, riddles, version=0):
+        self.version = version
+        self.riddles = list(riddles)
+        self.positions = {riddle.id: i for i, riddle in enumerate(self.riddles)}
+        count = len(self.riddles)
+        self.ratings = array("d", (DIFFICULTY_RATINGS.get(riddle.difficulty, DEFAULT_RATING) for riddle in self.riddles))
+        self.attempts = array("q", bytes(8 * count))
+        self.solved = array("q", bytes(8 * count))
+        self.total_ms = array("q", bytes(8 * count))
+        self._order = RankIndex(zip(self.ratings, range(count)))
+        self._players = {}
+        self._player_answers = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    @timed("db.load_ratings")
+    def load(cls, pool, riddles, version=0):
+        """Build a model, starting from saved statistics or, failing that, recorded solve rates."""
+        model = cls(riddles, version)
+        saved = set()
+        with pool.connection() as conn:
+            for riddle_id, rating, attempts, solved, total_ms in conn.execute(SELECT_RIDDLE_STATS):
+                i = model.positions.get(riddle_id)
+                if i is not None:
+                    model.ratings[i] = rating
+                    model.attempts[i] = attempts
+                    model.solved[i] = solved
+                    model.total_ms[i] = total_ms
+                    saved.add(i)
+        for riddle_id, attempts, solved, rate in solve_rates(pool):
+            i = model.positions.get(riddle_id)
+            if i is None or i in saved or attempts < MIN_HISTORY_ATTEMPTS:
+                continue
+            # Clamp so riddles everyone (or no one) solved still get a finite rating
+            rate = min(max(rate, 0.02), 0.98)
+            model.ratings[i] = rating_for_success(DEFAULT_RATING, rate)
+            model.attempts[i] = attempts
+            model.solved[i] = solved
+            model._dirty.add(i)
+        model._order = RankIndex(zip(model.ratings, range(len(model.riddles))))
+        return model
+
+    def __len__(self):
+        return len(self.riddles)
+
+    def player_rating(self, username, pool=None):
+        """A player's current rating, read from player_skill the first time."""
+        with self._lock:
+            rating = self._players.get(username)
+        if rating is None:
+            rating = DEFAULT_RATING
+            if pool is not None and username is not None:
+                with pool.connection() as conn:
+                    row = conn.execute(SELECT_PLAYER_SKILL, (username,)).fetchone()
+                if row:
+                    rating = row[0]
+            with self._lock:
+                rating = self._players.setdefault(username, rating)
+        return rating
+
+    def pick(self, target_rating, exclude=()):
+        """Return the riddle rated closest to target_rating that is not in exclude, or None."""
+        with self._lock:
+            order = self._order
+            size = len(order)
+            above = order.rank((target_rating, -1))
+            below = above - 1
+            # Walk outward from the target, taking the nearer side each step
+            while below >= 0 or above < size:
+                if above < size:
+                    rating_above, i_above = order.select(above)
+                if below >= 0:
+                    rating_below, i_below = order.select(below)
+                if above < size and (below < 0 or rating_above - target_rating <= target_rating - rating_below):
+                    above += 1
+                    i = i_above
+                else:
+                    below -= 1
+                    i = i_below
+                riddle = self.riddles[i]
+                if riddle.id not in exclude:
+                    return riddle
+        return None
+
+    def record(self, username, riddle, correct, elapsed_ms):
+        """Update the riddle's statistics and both ratings. Returns the player's new rating."""
+        player_rating = self.player_rating(username)
+        with self._lock:
+            i = self.positions[riddle.id]
+            old_rating = self.ratings[i]
+            surprise = (1.0 if correct else 0.0) - expected_success(player_rating, old_rating)
+            new_rating = old_rating - RIDDLE_K * surprise
+            self._order.remove((old_rating, i))
+            self._order.insert((new_rating, i))
+            self.ratings[i] = new_rating
+            self.attempts[i] += 1
+            self.solved[i] += bool(correct)
+            self.total_ms[i] += elapsed_ms
+            self._dirty.add(i)
+
+            player_rating += PLAYER_K * surprise
+            self._players[username] = player_rating
+            self._player_answers[username] = self._player_answers.get(username, 0) + 1
+        return player_rating
+
+    @timed("db.save_ratings")
+    def save(self, pool):
+        """Write changed riddle statistics and player ratings in one transaction."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            riddle_rows = [
+                (self.riddles[i].id, self.ratings[i], self.attempts[i], self.solved[i], self.total_ms[i])
+                for i in dirty
+            ]
+            player_rows = [
+                (username, self._players[username], answers)
+                for username, answers in self._player_answers.items()
+                if username is not None
+            ]
+            self._player_answers = {}
+        with pool.transaction() as conn:
+            conn.executemany(UPSERT_RIDDLE_STATS, riddle_rows)
+            conn.executemany(UPSERT_PLAYER_SKILL, player_rows)
+
+
+class AdaptiveSession:
+    """Classic Mode rules (5 HP, 7 correct per stage) with riddles chosen by AdaptiveModel.
+
+    The stages keep Classic's names so the GUI can show them the same way,
+    but every riddle comes from the whole Easy/Medium/Hard pool.
+    """
+
+    __slots__ = ("model", "username", "seed", "rng", "rating", "hp", "progress", "difficulty_index",
+                 "used", "current", "finished", "completed", "clock", "started_at", "dealt_at", "answers")
+
+    mode = ADAPTIVE
+
+    def __init__(self, model, username=None, seed=None, clock=time.monotonic, pool=None):
+        self.model = model
+        self.username = username
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.rating = model.player_rating(username, pool)
+        self.hp = CLASSIC_HP
+        self.progress = 0
+        self.difficulty_index = 0
+        self.used = set()
+        self.finished = False
+        self.completed = False
+        self.clock = clock
+        self.started_at = time.time()
+        self.answers = []
+        self.current = None
+        self._next_question()
+
+    @property
+    def difficulty(self):
+        return CLASSIC_DIFFICULTIES[self.difficulty_index]
+
+    @property
+    def required(self):
+        return REQUIRED_CORRECT[self.difficulty]
+
+    @property
+    def catalog_version(self):
+        return self.model.version
+
+    @property
+    def requeue_missed(self):
+        return False  # Missed riddles are never dealt again; the model picks each one
+
+    def _next_question(self, now=None):
+        target = rating_for_success(self.rating, TARGET_SUCCESS) + self.rng.gauss(0.0, TARGET_JITTER)
+        self.current = self.model.pick(target, self.used)
+        self.dealt_at = self.clock() if now is None else now
+        if self.current is None:
+            self.finished = True
+        else:
+            self.used.add(self.current.id)
+
+    def answer(self, choice, now=None):
+        """Answer the current riddle with option 1-4. Returns True if correct."""
+        if self.finished:
+            raise RuntimeError("Adaptive session is already finished.")
+
+        question = self.current
+        correct = choice == question.correct_answer
+        now = self.clock() if now is None else now
+        seconds = now - self.dealt_at
+        self.answers.append((question.id, choice, correct, seconds))
+        self.rating = self.model.record(self.username, question, correct, round(seconds * 1000))
+
+        if correct:
+            self.progress += 1
+            if self.progress >= self.required:
+                if self.difficulty_index == len(CLASSIC_DIFFICULTIES) - 1:
+                    self.finished = True
+                    self.completed = True
+                    return correct
+                self.difficulty_index += 1
+                self.progress = 0
+        else:
+            self.hp -= 1
+            if self.hp <= 0:
+                self.finished = True
+                return correct
+
+        self._next_question(now)
+        return correct
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model(pool, catalog):
+    """Return the process-wide model for the catalog, rebuilding it when the riddles change."""
+    global _model
+    with _model_lock:
+        if _model is None or _model.version != catalog.version:
+            if _model is not None:
+                _model.save(pool)
+            riddles = [riddle for name in CLASSIC_DIFFICULTIES for riddle in catalog.difficulty(name)]
+            _model = AdaptiveModel.load(pool, riddles, catalog.version)
+        return _model
@@ -0,0 +1,408 @@
+"""Monte-Carlo balance simulator for Classic and Time Challenge.
+
+Simulated players play the rules of gameengine.py against the riddles in the
+database, with the HP, correct answers per difficulty, Time Challenge length
+and wrong-answer penalty all adjustable, so they can be tuned before the game
+changes.
+
+Each session's player gets an Elo-style skill drawn from a normal
+distribution and solves a riddle with adaptive.expected_success() against
+the riddle's rating (its saved riddle_stats rating, or the one for its
+difficulty label). Answer times are log-normal around a median think time.
+
+Sessions run in batches spread over a ProcessPoolExecutor. With NumPy a
+batch is played as arrays, one row per session and one column per riddle
+dealt; without it every session is played in a loop. Both deal from a
+riddle's deck without repeats, except that the NumPy path draws with
+replacement from decks larger than EXACT_DEAL_LIMIT, where a repeat is rare
+and changes nothing measurable.
+
+    python balance.py --sessions 1000000
+    python balance.py --mode classic --hp 4 --required 6
+    python balance.py --mode time --penalty 5 --skill 1100
+"""
+import argparse
+import math
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from adaptive import DEFAULT_RATING, DIFFICULTY_RATINGS, expected_success
+from database import DB_PATH, connect
+from gameengine import (CLASSIC_DIFFICULTIES, CLASSIC_HP, REQUIRED_CORRECT, TIME_CHALLENGE_DIFFICULTY,
+                        TIME_CHALLENGE_SECONDS, WRONG_ANSWER_PENALTY, final_score)
+from migrations import migrate
+from questiondealer import QuestionDealer, mix64
+from riddlecatalog import load_catalog
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SESSIONS = 100_000
+BATCH_SIZE = 10_000
+SKILL = DEFAULT_RATING
+SKILL_SPREAD = 150.0
+THINK_SECONDS = 6.0  # Median time to answer
+THINK_SPREAD = 0.5  # Standard deviation of the log of the answer time
+EXACT_DEAL_LIMIT = 256  # Larger decks are dealt with replacement on the NumPy path
+BLOCK = 32  # Riddles dealt per step of a NumPy Time Challenge batch
+
+SELECT_RATINGS = "SELECT riddle_id, rating FROM riddle_stats"
+
+
+class Rules:
+    """The balance knobs of both modes."""
+
+    __slots__ = ("hp", "required", "seconds", "penalty")
+
+    def __init__(self, hp=CLASSIC_HP, required=None, seconds=TIME_CHALLENGE_SECONDS, penalty=WRONG_ANSWER_PENALTY):
+        self.hp = hp
+        # Correct answers needed in each of CLASSIC_DIFFICULTIES
+        self.required = tuple(REQUIRED_CORRECT[name] if required is None else required for name in CLASSIC_DIFFICULTIES)
+        self.seconds = seconds
+        self.penalty = penalty
+
+
+class Players:
+    """The distributions simulated players are drawn from."""
+
+    __slots__ = ("skill", "spread", "think", "think_spread")
+
+    def __init__(self, skill=SKILL, spread=SKILL_SPREAD, think=THINK_SECONDS, think_spread=THINK_SPREAD):
+        self.skill = skill
+        self.spread = spread
+        self.think = think
+        self.think_spread = think_spread
+
+
+def riddle_ratings(conn):
+    """Return ([ratings per Classic difficulty], [Time Challenge ratings]) for the riddles in the database."""
+    catalog = load_catalog(conn)
+    saved = dict(conn.execute(SELECT_RATINGS))
+
+    def ratings(name):
+        return [saved.get(riddle.id, DIFFICULTY_RATINGS.get(name, DEFAULT_RATING)) for riddle in catalog.difficulty(name)]
+
+    return [ratings(name) for name in CLASSIC_DIFFICULTIES], ratings(TIME_CHALLENGE_DIFFICULTY)
+
+
+def classic_session(rng, tiers, rules, players):
+    """Play one Classic session. Returns (answers, difficulties cleared, HP left)."""
+    skill = rng.gauss(players.skill, players.spread)
+    hp = rules.hp
+    answers = cleared = 0
+    for ratings, required in zip(tiers, rules.required):
+        solved = 0
+        for rating in QuestionDealer(ratings, rng.getrandbits(64)):
+            answers += 1
+            if rng.random() < expected_success(skill, rating):
+                solved += 1
+                if solved >= required:
+                    break
+            else:
+                hp -= 1
+                if hp <= 0:
+                    return answers, cleared, 0
+        if solved < required:  # Ran out of riddles
+            return answers, cleared, hp
+        cleared += 1
+    return answers, cleared, hp
+
+
+def time_challenge_session(rng, ratings, rules, players):
+    """Play one Time Challenge session. Returns (answers, score, highest streak)."""
+    skill = rng.gauss(players.skill, players.spread)
+    think = math.log(players.think)
+    elapsed = 0.0  # Including penalties
+    answers = score = streak = highest = 0
+    for rating in QuestionDealer(ratings, rng.getrandbits(64)):
+        seconds = rng.lognormvariate(think, players.think_spread)
+        if elapsed + seconds >= rules.seconds:
+            break
+        answers += 1
+        elapsed += seconds
+        if rng.random() < expected_success(skill, rating):
+            score += 1
+            streak += 1
+            if streak > highest:
+                highest = streak
+        else:
+            streak = 0
+            elapsed += rules.penalty
+    return answers, score, highest
+
+
+def classic_batch(rng, tiers, rules, players, size):
+    stats = new_stats()
+    for _ in range(size):
+        answers, cleared, hp = classic_session(rng, tiers, rules, players)
+        stats["answers"] += answers
+        stats["cleared"][cleared] += 1
+        if cleared == len(tiers):
+            stats["hp_left"][hp] += 1
+    stats["sessions"] = size
+    return stats
+
+
+def time_challenge_batch(rng, ratings, rules, players, size):
+    stats = new_stats()
+    for _ in range(size):
+        answers, score, highest = time_challenge_session(rng, ratings, rules, players)
+        stats["answers"] += answers
+        stats["score"][score] += 1
+        stats["final_score"][final_score(score, highest)] += 1
+        stats["streak"][highest] += 1
+    stats["sessions"] = size
+    return stats
+
+
+def deal(rng, size, deck, width):
+    """Riddle indexes for each of size sessions: a shuffled deck, or draws from a large one."""
+    if deck <= EXACT_DEAL_LIMIT:
+        return rng.random((size, deck)).argsort(axis=1)[:, :width]
+    return rng.integers(0, deck, (size, width))
+
+
+def solves(rng, skills, ratings):
+    """Whether each session solves each riddle, from expected_success() as arrays."""
+    chance = 1.0 / (1.0 + 10.0 ** ((ratings - skills[:, None]) / 400.0))
+    return rng.random(chance.shape) < chance
+
+
+def histogram(values):
+    return Counter(dict(zip(*(column.tolist() for column in numpy.unique(values, return_counts=True)))))
+
+
+def classic_batch_numpy(rng, tiers, rules, players, size):
+    """classic_batch() as arrays: each tier deals every session at most the riddles it could need."""
+    skills = rng.normal(players.skill, players.spread, size)
+    rows = numpy.arange(size)
+    hp = numpy.full(size, rules.hp)
+    answers = numpy.zeros(size, dtype=numpy.int64)
+    cleared = numpy.zeros(size, dtype=numpy.int64)
+    playing = numpy.ones(size, dtype=bool)
+    for ratings, required in zip(tiers, rules.required):
+        width = min(len(ratings), required + rules.hp - 1)
+        if not width:
+            playing[:] = False
+            break
+        correct = solves(rng, skills, ratings[deal(rng, size, len(ratings), width)])
+        solved = correct.cumsum(axis=1)
+        missed = (~correct).cumsum(axis=1)
+        done = solved >= required
+        out = missed >= hp[:, None]
+        passed = playing & done.any(axis=1) & (missed[rows, done.argmax(axis=1)] < hp)
+        # The answer each session stopped on: the last correct one, the last HP, or the end of the deck
+        stop = numpy.where(passed, done.argmax(axis=1), numpy.where(out.any(axis=1), out.argmax(axis=1), width - 1))
+        answers += numpy.where(playing, stop + 1, 0)
+        hp = numpy.where(playing, hp - missed[rows, stop], hp)
+        cleared += passed
+        playing = passed
+
+    stats = new_stats()
+    stats["sessions"] = size
+    stats["answers"] = int(answers.sum())
+    stats["cleared"] = histogram(cleared)
+    stats["hp_left"] = histogram(hp[playing]) if playing.any() else Counter()
+    return stats
+
+
+def time_challenge_batch_numpy(rng, ratings, rules, players, size):
+    """time_challenge_batch() as arrays, dealing BLOCK riddles at a time until every session is over."""
+    skills = rng.normal(players.skill, players.spread, size)
+    think = math.log(players.think)
+    deck = len(ratings)
+    order = deal(rng, size, deck, deck) if deck <= EXACT_DEAL_LIMIT else None
+    elapsed = numpy.zeros(size)
+    answers = numpy.zeros(size, dtype=numpy.int64)
+    score = numpy.zeros(size, dtype=numpy.int64)
+    streak = numpy.zeros(size, dtype=numpy.int64)
+    highest = numpy.zeros(size, dtype=numpy.int64)
+    playing = numpy.ones(size, dtype=bool)
+    position = 0
+    while position < deck and playing.any():
+        width = min(BLOCK, deck - position)
+        picks = order[:, position:position + width] if order is not None else rng.integers(0, deck, (size, width))
+        correct = solves(rng, skills, ratings[picks])
+        seconds = rng.lognormal(think, players.think_spread, (size, width))
+        cost = seconds + rules.penalty * ~correct
+        started = elapsed[:, None] + cost.cumsum(axis=1) - cost
+        # Answer times only grow, so the answers in time are a prefix of each row
+        answered = playing[:, None] & (started + seconds < rules.seconds)
+        right = correct & answered
+
+        # Run lengths of correct answers, the first run carrying on from the last block
+        solved = right.cumsum(axis=1)
+        missed = ~right
+        runs = solved - numpy.maximum.accumulate(numpy.where(missed, solved, 0), axis=1)
+        runs += streak[:, None] * ~numpy.logical_or.accumulate(missed, axis=1)
+        highest = numpy.maximum(highest, runs.max(axis=1))
+        streak = runs[:, -1]
+
+        answers += answered.sum(axis=1)
+        score += right.sum(axis=1)
+        elapsed += numpy.where(answered, cost, 0.0).sum(axis=1)
+        playing &= answered[:, -1]
+        position += width
+
+    stats = new_stats()
+    stats["sessions"] = size
+    stats["answers"] = int(answers.sum())
+    stats["score"] = histogram(score)
+    stats["final_score"] = histogram(final_score(score, highest))
+    stats["streak"] = histogram(highest)
+    return stats
+
+
+def new_stats():
+    return {"sessions": 0, "answers": 0, "cleared": Counter(), "hp_left": Counter(),
+            "score": Counter(), "final_score": Counter(), "streak": Counter()}
+
+
+def merge(total, stats):
+    for key, value in stats.items():
+        if isinstance(value, Counter):
+            total[key].update(value)
+        else:
+            total[key] += value
+
+
+_worker = None  # (tiers, time challenge ratings, rules, players), set in each worker process
+
+
+def start_worker(tiers, time_ratings, rules, players, use_numpy):
+    global _worker
+    if use_numpy:
+        tiers = [numpy.array(ratings) for ratings in tiers]
+        time_ratings = numpy.array(time_ratings)
+    _worker = (tiers, time_ratings, rules, players)
+
+
+def run_batch(mode, size, seed, use_numpy):
+    tiers, time_ratings, rules, players = _worker
+    if use_numpy:
+        rng = numpy.random.default_rng(seed)
+        if mode == "classic":
+            return classic_batch_numpy(rng, tiers, rules, players, size)
+        return time_challenge_batch_numpy(rng, time_ratings, rules, players, size)
+    rng = random.Random(seed)
+    if mode == "classic":
+        return classic_batch(rng, tiers, rules, players, size)
+    return time_challenge_batch(rng, time_ratings, rules, players, size)
+
+
+def simulate(mode, sessions, tiers, time_ratings, rules=None, players=None, seed=0,
+             workers=None, batch_size=BATCH_SIZE, use_numpy=True):
+    """Play sessions of mode ("classic" or "time") across worker processes and return the merged stats."""
+    rules = rules or Rules()
+    players = players or Players()
+    use_numpy = use_numpy and numpy is not None
+    total = new_stats()
+    batches = [min(batch_size, sessions - start) for start in range(0, sessions, batch_size)]
+    with ProcessPoolExecutor(workers, initializer=start_worker,
+                             initargs=(tiers, time_ratings, rules, players, use_numpy)) as executor:
+        futures = [executor.submit(run_batch, mode, size, mix64(seed + index), use_numpy)
+                   for index, size in enumerate(batches)]
+        for future in futures:
+            merge(total, future.result())
+    return total
+
+
+def mean(counts):
+    sessions = sum(counts.values())
+    return sum(value * count for value, count in counts.items()) / sessions if sessions else 0.0
+
+
+def percentile(counts, fraction):
+    wanted = fraction * sum(counts.values())
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= wanted:
+            return value
+    return 0
+
+
+def print_histogram(title, counts, sessions, width=40):
+    print(f"  {title}")
+    peak = max(counts.values(), default=0)
+    for value in range(min(counts, default=0), max(counts, default=-1) + 1):
+        share = counts[value] / sessions
+        print(f"    {value:>4} {share:7.2%} {'#' * round(width * counts[value] / peak)}")
+
+
+def print_classic(stats, rules):
+    sessions = stats["sessions"]
+    tiers = len(rules.required)
+    required = "/".join(map(str, rules.required))
+    print(f"Classic ({rules.hp} HP, {required} correct per difficulty), {sessions:,} sessions")
+    print(f"  Completed          {stats['cleared'][tiers] / sessions:7.2%}")
+    for index, name in enumerate(CLASSIC_DIFFICULTIES[:tiers]):
+        reached = sum(count for cleared, count in stats["cleared"].items() if cleared > index)
+        print(f"  Cleared {name:<10} {reached / sessions:7.2%}")
+    print(f"  Answers per game   {stats['answers'] / sessions:7.2f}")
+    if stats["hp_left"]:
+        print_histogram("HP left on completion", stats["hp_left"], stats["cleared"][tiers])
+
+
+def print_time_challenge(stats, rules):
+    sessions = stats["sessions"]
+    print(f"Time Challenge ({rules.seconds:g} s, {rules.penalty:g} s penalty), {sessions:,} sessions")
+    print(f"  Answers per game   {stats['answers'] / sessions:7.2f}")
+    for title, key in (("Score", "score"), ("Highest streak", "streak"), ("Final score", "final_score")):
+        counts = stats[key]
+        print(f"  {title:<18} mean {mean(counts):8.2f}  p50 {percentile(counts, 0.5):>5}  "
+              f"p90 {percentile(counts, 0.9):>5}  p99 {percentile(counts, 0.99):>5}")
+    print_histogram("Highest streak", stats["streak"], sessions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many Classic and Time Challenge sessions to check the balance.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+    parser.add_argument("--mode", choices=("classic", "time", "both"), default="both")
+    parser.add_argument("--sessions", type=int, default=SESSIONS, help="Sessions per mode (default: %(default)s)")
+    parser.add_argument("--hp", type=int, default=CLASSIC_HP)
+    parser.add_argument("--required", type=int, help="Correct answers per Classic difficulty (default: the game's)")
+    parser.add_argument("--seconds", type=float, default=TIME_CHALLENGE_SECONDS, help="Time Challenge length")
+    parser.add_argument("--penalty", type=float, default=WRONG_ANSWER_PENALTY, help="Seconds lost per wrong answer")
+    parser.add_argument("--skill", type=float, default=SKILL, help="Mean player rating (default: %(default)s)")
+    parser.add_argument("--skill-spread", type=float, default=SKILL_SPREAD)
+    parser.add_argument("--think", type=float, default=THINK_SECONDS, help="Median seconds to answer (default: %(default)s)")
+    parser.add_argument("--think-spread", type=float, default=THINK_SPREAD)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-numpy", action="store_true", help="Play every session in a loop even if NumPy is installed")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        migrate(conn)
+        tiers, time_ratings = riddle_ratings(conn)
+    finally:
+        conn.close()
+
+    rules = Rules(args.hp, args.required, args.seconds, args.penalty)
+    players = Players(args.skill, args.skill_spread, args.think, args.think_spread)
+    use_numpy = not args.no_numpy
+    engine = "NumPy" if use_numpy and numpy is not None else "plain Python"
+    print(f"{sum(map(len, tiers))} Classic and {len(time_ratings)} Time Challenge riddles; "
+          f"players rated {args.skill:.0f} +/- {args.skill_spread:.0f}, answering in {args.think:.1f} s (median)")
+    for mode, report in (("classic", print_classic), ("time", print_time_challenge)):
+        if args.mode not in (mode, "both"):
+            continue
+        started = time.perf_counter()
+        stats = simulate(mode, args.sessions, tiers, time_ratings, rules, players, args.seed,
+                         args.workers, args.batch_size, use_numpy)
+        seconds = time.perf_counter() - started
+        print()
+        report(stats, rules)
+        print(f"  ({seconds:.1f}s with {engine} on {args.workers or os.cpu_count()} workers)")
+
+
+if __name__ == "__main__":
+    main()
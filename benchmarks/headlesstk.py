@@ -0,0 +1,118 @@
+"""A stand-in for tkinter that keeps widget options in memory and draws nothing.
+
+Only the parts of tkinter mainriddlegame.py uses are here. Widgets store
+their options the way Tk does, so a benchmark still pays for building the
+text of every label and button it updates; layout calls and bindings are
+no-ops. after() queues callbacks, which run only when run_pending() is
+called, so tickers and background polls never fire behind a benchmark's back.
+"""
+import itertools
+
+END = "end"
+
+
+class Widget:
+    def __init__(self, master=None, **options):
+        self.master = master
+        self.options = options
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, name):
+        return self.options.get(name)
+
+    def _ignore(self, *args, **kwargs):
+        pass
+
+    pack = grid = place = bind = bind_all = unbind_all = tkraise = destroy = update_idletasks = update = _ignore
+
+
+class Tk(Widget):
+    def __init__(self):
+        super().__init__()
+        self.pending = {}
+        self.handles = itertools.count(1)
+
+    def title(self, text):
+        self.options["title"] = text
+
+    def geometry(self, size):
+        self.options["geometry"] = size
+
+    def after(self, ms, callback):
+        handle = f"after#{next(self.handles)}"
+        self.pending[handle] = callback
+        return handle
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, handle):
+        self.pending.pop(handle, None)
+
+    def run_pending(self):
+        """Run every queued callback once (callbacks they queue wait for the next call)."""
+        pending, self.pending = self.pending, {}
+        for callback in pending.values():
+            callback()
+
+    def quit(self):
+        pass
+
+    def mainloop(self):
+        pass
+
+
+class Frame(Widget):
+    pass
+
+
+class Label(Widget):
+    pass
+
+
+class Button(Widget):
+    pass
+
+
+class Entry(Widget):
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.text = ""
+
+    def get(self):
+        return self.text
+
+    def insert(self, index, text):
+        self.text = self.text + text if index == END else text + self.text
+
+    def delete(self, first, last=None):
+        self.text = ""
+
+
+class Scrollbar(Widget):
+    def set(self, first, last):
+        self.options["position"] = (first, last)
+
+
+class Canvas(Widget):
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.items = []
+
+    def _create(self, *args, **options):
+        self.items.append((args, options))
+        return len(self.items)
+
+    create_oval = create_text = create_window = _create
+
+    def bbox(self, *args):
+        return (0, 0, 0, 0)
+
+    def yview(self, *args):
+        pass
+
+    yview_scroll = yview
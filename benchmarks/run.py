@@ -0,0 +1,418 @@
+"""Benchmarks for the game's hot paths, runnable without a display.
+
+Each size is a synthetic database, built once into benchmarks/data and
+copied afresh for every run:
+
+    small       1,000 players      100 riddles
+    medium    100,000 players   10,000 riddles
+    large   1,000,000 players  100,000 riddles
+
+Every size runs in a process of its own, so the process-wide catalog,
+leaderboard and connection caches start cold. The GUI is driven through
+RiddleGameGUI with headlesstk standing in for tkinter, so widget updates are
+timed but nothing is drawn; with --display the real tkinter is used and
+every redraw is flushed (run under xvfb-run on a machine with no screen).
+
+    login, sign_up         per second, on the background hashing threads
+    guest                  continue_as_guest latency, and storing the guest,
+                           per tenth of the run as guest rows accumulate
+    fetch_questions        catalog load from the table (cold) and the
+                           version check that usually replaces it (warm)
+    time_challenge_start   new session, first riddle shown and ticker started
+    leaderboard            opening the screen, and scrolling to a random rank
+    show_question          redraw after each answer
+    next_question          a click on an answer until the next riddle is up
+                           (the answer, the next deal and the redraw), in
+                           Classic and Time Challenge
+    score_commit           best scores per second, one transaction each and
+                           batched through the ResultSink
+
+Results are written as JSON (benchmarks/results/<time>.json unless --output
+is given). Against a baseline (benchmarks/baseline.json, written with
+--save-baseline) every timing more than --threshold worse is reported as a
+regression (small differences in the fastest timings are ignored as
+noise), and the exit status is 1.
+
+Absolute timings only mean something on the machine that made them, so
+every run also times a fixed calibration workload (Python and in-memory
+SQLite), and the baseline is scaled by the ratio of the two calibrations
+before comparing. That makes the committed baseline a rough guide on other
+machines; save a local one with --save-baseline --baseline <file> for
+exact comparisons.
+
+    python benchmarks/run.py --sizes small,medium
+    python benchmarks/run.py --save-baseline
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# The game modules live one directory up
+sys.path.insert(0, os.path.dirname(HERE))
+
+import headlesstk
+import mainriddlegame
+from credentials import hash_password, hash_in_background
+from database import ConnectionPool, connect
+from gameservice import GameService
+from instrumentation import Histogram
+from migrations import fill_synthetic, migrate
+from riddlecatalog import load_catalog
+
+SIZES = {
+    "small": (1_000, 100),
+    "medium": (100_000, 10_000),
+    "large": (1_000_000, 100_000),
+}
+DATA_DIR = os.path.join(HERE, "data")
+RESULTS_DIR = os.path.join(HERE, "results")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+NOISE_FLOOR_US = 50  # A timing must also be this much slower to count as a regression
+CALIBRATION_ROUNDS = 5
+PASSWORD = "benchmark"
+
+LOGINS = 20
+SIGN_UPS = 20
+GUESTS = 5000
+REPEAT = 200
+COLD_LOADS = 5
+LEADERBOARD_OPENS = 50
+SCROLLS = 500
+ANSWERS = 2000
+DIRECT_SCORES = 1000
+BATCHED_SCORES = 20000
+
+
+def synthetic_db(players, riddles):
+    """Path of the template database for a size, building it the first time."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"synthetic-{players}-{riddles}.db")
+    if os.path.exists(path):
+        return path
+    building = path + ".building"
+    for leftover in (building, building + "-wal", building + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    print(f"Building {os.path.basename(path)}...", flush=True)
+    conn = connect(building)
+    migrate(conn)
+    fill_synthetic(conn, players, riddles, hash_password(PASSWORD))
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    os.replace(building, path)
+    return path
+
+
+def latency(histogram):
+    """The percentiles a benchmark reports for a histogram of microseconds."""
+    summary = histogram.summary()
+    return {"p50_us": summary["p50"], "p90_us": summary["p90"], "p99_us": summary["p99"]}
+
+
+def time_calls(histogram, function, *args):
+    started = time.perf_counter_ns()
+    result = function(*args)
+    histogram.record((time.perf_counter_ns() - started) // 1000)
+    return result
+
+
+class Bench:
+    """One size's database, service and GUI, and the benchmarks run against them."""
+
+    def __init__(self, path, players, display):
+        self.players = players
+        self.rng = random.Random(1)
+        self.service = GameService(ConnectionPool(path))
+        self.service.ensure_schema()
+        if display:
+            import tkinter as tk
+        else:
+            tk = headlesstk
+        mainriddlegame.tk = tk
+        self.root = tk.Tk()
+        self.redraw = self.root.update_idletasks
+        self.gui = mainriddlegame.RiddleGameGUI(self.root, self.service)
+        self.gui.continue_as_guest_menu()
+
+    def close(self):
+        self.gui.stop_ticker()
+        self.root.destroy()
+        self.service.close()
+        self.service.pool.close()
+
+    def random_player(self):
+        return f"player{self.rng.randrange(self.players)}"
+
+    def throughput(self, function, args_list):
+        started = time.perf_counter()
+        futures = [hash_in_background(function, *args) for args in args_list]
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for result in results if not result["success"])
+        return {"per_s": len(results) / elapsed, "failed": failed}
+
+    def login(self):
+        return self.throughput(self.service.login, [(self.random_player(), PASSWORD) for _ in range(LOGINS)])
+
+    def sign_up(self):
+        return self.throughput(self.service.sign_up, [(f"bench{i}", PASSWORD) for i in range(SIGN_UPS)])
+
+    def guest(self):
+        gui = self.gui
+        tenths = []
+        menu = Histogram()
+        store = Histogram()
+        for tenth in range(10):
+            window = Histogram()
+            for _ in range(GUESTS // 10):
+                time_calls(window, gui.continue_as_guest_menu)
+                # A guest is only stored once they record a result
+                time_calls(store, self.service.persist_guest, gui.player)
+            self.redraw()
+            menu.merge(window)
+            tenths.append(window.percentile(0.5))
+        return {**latency(menu), "store_p50_us": store.percentile(0.5), "store_p99_us": store.percentile(0.99),
+                "first_tenth_p50_us": tenths[0], "last_tenth_p50_us": tenths[-1], "p50_us_by_tenth": tenths}
+
+    def fetch_questions(self):
+        cold = Histogram()
+        warm = Histogram()
+        with self.service.pool.connection() as conn:
+            for _ in range(COLD_LOADS):
+                time_calls(cold, load_catalog, conn)
+        for _ in range(REPEAT):
+            time_calls(warm, self.service.catalog)
+        return {"cold_p50_us": cold.percentile(0.5), **latency(warm)}
+
+    def time_challenge_start(self):
+        histogram = Histogram()
+        for _ in range(REPEAT):
+            started = time.perf_counter_ns()
+            self.gui.time_challenge_mode()
+            self.redraw()
+            histogram.record((time.perf_counter_ns() - started) // 1000)
+            self.gui.stop_ticker()
+        return latency(histogram)
+
+    def leaderboard(self):
+        gui = self.gui
+        opens = Histogram()
+        scrolls = Histogram()
+        started = time.perf_counter_ns()
+        gui.leaderboard()  # Loads the in-memory leaderboard for the player's rank
+        self.redraw()
+        first = (time.perf_counter_ns() - started) // 1000
+        for _ in range(LEADERBOARD_OPENS):
+            time_calls(opens, gui.leaderboard)
+            self.redraw()
+        view = gui.widgets["leaderboard_view"]
+        for _ in range(SCROLLS):
+            started = time.perf_counter_ns()
+            view.scroll_to(self.rng.randrange(len(view.pager)))
+            self.redraw()
+            scrolls.record((time.perf_counter_ns() - started) // 1000)
+        return {"first_open_us": first, **latency(opens),
+                "scroll_p50_us": scrolls.percentile(0.5), "scroll_p99_us": scrolls.percentile(0.99)}
+
+    def show_question(self):
+        gui = self.gui
+        histogram = Histogram()
+        gui.classic_mode()
+        for _ in range(ANSWERS):
+            session = gui.session
+            session.answer(session.current.correct_answer)
+            if session.finished:
+                gui.classic_mode()
+                continue
+            started = time.perf_counter_ns()
+            gui.show_question()
+            self.redraw()
+            histogram.record((time.perf_counter_ns() - started) // 1000)
+        return latency(histogram)
+
+    def next_question(self):
+        gui = self.gui
+        results = {}
+        for mode, start in (("classic", gui.classic_mode), ("time_challenge", gui.time_challenge_mode)):
+            histogram = Histogram()
+            start()
+            for number in range(ANSWERS):
+                session = gui.session
+                # Mostly right, so Classic sessions get through their difficulties
+                choice = session.current.correct_answer if number % 4 else 5 - session.current.correct_answer
+                started = time.perf_counter_ns()
+                gui.check_answer(choice)
+                self.redraw()
+                elapsed = (time.perf_counter_ns() - started) // 1000
+                if gui.mode is None:
+                    start()  # The session ended; that click went to the result screen
+                    continue
+                histogram.record(elapsed)
+            gui.stop_ticker()
+            results.update({f"{mode}_{name}": value for name, value in latency(histogram).items()})
+        return results
+
+    def score_commit(self):
+        players = self.service.players
+        started = time.perf_counter()
+        for _ in range(DIRECT_SCORES):
+            players.record_score(self.random_player(), self.rng.randrange(2000))
+        direct = DIRECT_SCORES / (time.perf_counter() - started)
+
+        results = self.service.results
+        results.flush()
+        started = time.perf_counter()
+        for _ in range(BATCHED_SCORES):
+            results.submit_score(self.random_player(), self.rng.randrange(2000))
+        results.flush()
+        batched = BATCHED_SCORES / (time.perf_counter() - started)
+        return {"direct_per_s": direct, "batched_per_s": batched}
+
+
+BENCHMARKS = ("login", "sign_up", "guest", "fetch_questions", "time_challenge_start", "leaderboard",
+              "show_question", "next_question", "score_commit")
+
+
+def run_size(size, names, display):
+    """Run the named benchmarks on a fresh copy of one size's database. Returns {benchmark: metrics}."""
+    players, riddles = SIZES[size]
+    template = synthetic_db(players, riddles)
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "benchmark.db")
+        shutil.copyfile(template, path)
+        bench = Bench(path, players, display)
+        results = {}
+        try:
+            for name in names:
+                print(f"  {size} {name}...", flush=True)
+                results[name] = getattr(bench, name)()
+        finally:
+            bench.close()
+    return results
+
+
+def calibrate():
+    """Microseconds for a fixed Python and SQLite workload, the best of CALIBRATION_ROUNDS."""
+    best = None
+    for _ in range(CALIBRATION_ROUNDS):
+        started = time.perf_counter_ns()
+        rng = random.Random(0)
+        values = sorted(rng.random() for _ in range(20_000))
+        conn = connect(":memory:")
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value REAL)")
+        conn.executemany("INSERT INTO t (value) VALUES (?)", ((value,) for value in values))
+        conn.execute("CREATE INDEX t_value ON t (value)")
+        for value in values[::40]:
+            conn.execute("SELECT COUNT(*) FROM t WHERE value < ?", (value,)).fetchone()
+        conn.close()
+        elapsed = (time.perf_counter_ns() - started) // 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def flatten(results):
+    """{"size.benchmark.metric": value} for every numeric metric."""
+    return {f"{size}.{benchmark}.{metric}": value
+            for size, benchmarks in results.items()
+            for benchmark, metrics in benchmarks.items()
+            for metric, value in metrics.items()
+            if isinstance(value, (int, float))}
+
+
+def compare(current, baseline, threshold):
+    """Yield (metric, baseline, current, change, regressed) for metrics in both runs.
+
+    The baseline's values are first scaled to this machine by the ratio of
+    the two runs' calibration times. change is the fractional change for the
+    worse: timings (``_us``) that grew, rates (``per_s``) that fell. Timings
+    within NOISE_FLOOR_US of the baseline never count as regressions.
+    """
+    now = flatten(current["results"])
+    before = flatten(baseline["results"])
+    scale = 1.0
+    if current.get("calibration_us") and baseline.get("calibration_us"):
+        scale = current["calibration_us"] / baseline["calibration_us"]
+    for metric in sorted(now.keys() & before.keys()):
+        old, new = before[metric], now[metric]
+        if metric.endswith("_us"):
+            old *= scale
+            change = (new - old) / old if old else 0.0
+            regressed = change > threshold and new - old > NOISE_FLOOR_US
+        elif metric.endswith("per_s"):
+            old /= scale
+            change = (old - new) / old if old else 0.0
+            regressed = change > threshold
+        else:
+            continue
+        yield metric, old, new, change, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths on synthetic databases.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help="Comma-separated sizes (default: %(default)s)")
+    parser.add_argument("--only", help="Comma-separated benchmarks to run (default: all)")
+    parser.add_argument("--display", action="store_true", help="Draw with the real tkinter instead of headlesstk")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline to compare with (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Fraction worse than the baseline that counts as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes.split(",")
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark {name!r}; choose from {', '.join(BENCHMARKS)}")
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"Unknown size {size!r}; choose from {', '.join(SIZES)}")
+
+    current = {"time": time.time(), "python": platform.python_version(), "machine": platform.platform(),
+               "display": args.display, "calibration_us": calibrate(), "results": {}}
+    for size in sizes:
+        # A fresh process per size, so no cache carries over from the last database
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            current["results"][size] = executor.submit(run_size, size, names, args.display).result()
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as out:
+        json.dump(current, out, indent=2)
+    print(f"\nResults written to {output}.")
+
+    for metric, value in sorted(flatten(current["results"]).items()):
+        print(f"{metric:<55} {value:>12.1f}")
+
+    regressions = 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"\nCompared with {args.baseline}, scaled by calibration "
+              f"{current['calibration_us']} us / {baseline.get('calibration_us', current['calibration_us'])} us "
+              f"(change for the worse):")
+        for metric, old, new, change, regressed in compare(current, baseline, args.threshold):
+            regressions += regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{metric:<55} {old:>12.1f} {new:>12.1f} {change:>+8.0%}{flag}")
+        print(f"{regressions} regressions beyond {args.threshold:.0%}.")
+    if args.save_baseline:
+        shutil.copyfile(output, args.baseline)
+        print(f"Saved as the baseline in {args.baseline}.")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Time Challenge countdown on a monotonic clock.
+
+ChallengeClock only does the accounting: elapsed time, pauses and penalty
+seconds. ClockTicker drives it from any scheduler with Tk's
+``after(ms, callback)`` / ``after_cancel(handle)`` interface, keeping exactly
+one pending callback and aiming each one at the next whole-second change of
+the display, so late callbacks never accumulate into drift. Both take an
+injectable clock, which lets tests run them against a fake one.
+"""
+import math
+import time
+
+
+class ChallengeClock:
+    """Seconds left in a challenge, excluding pauses and including penalties."""
+
+    __slots__ = ("duration", "clock", "started_at", "paused_at", "paused_total", "deduction")
+
+    def __init__(self, duration, now=None, clock=time.monotonic):
+        self.duration = duration
+        self.clock = clock
+        self.started_at = clock() if now is None else now
+        self.paused_at = None
+        self.paused_total = 0.0
+        self.deduction = 0
+
+    def elapsed(self, now=None):
+        """Seconds of play so far, not counting time spent paused."""
+        if self.paused_at is not None:
+            now = self.paused_at
+        elif now is None:
+            now = self.clock()
+        return now - self.started_at - self.paused_total
+
+    def remaining(self, now=None):
+        """Exact time left, in fractional seconds (may be negative)."""
+        return self.duration - self.elapsed(now) - self.deduction
+
+    def seconds_left(self, now=None):
+        """Whole seconds to display: 180 until a full second has gone by."""
+        return max(0, math.ceil(self.remaining(now)))
+
+    def expired(self, now=None):
+        return self.remaining(now) <= 0
+
+    @property
+    def paused(self):
+        return self.paused_at is not None
+
+    def pause(self, now=None):
+        if self.paused_at is None:
+            self.paused_at = self.clock() if now is None else now
+
+    def resume(self, now=None):
+        if self.paused_at is not None:
+            if now is None:
+                now = self.clock()
+            self.paused_total += now - self.paused_at
+            self.paused_at = None
+
+    def penalize(self, seconds):
+        """Take seconds off the remaining time, e.g. for a wrong answer."""
+        self.deduction += seconds
+
+    def sync(self, remaining, now=None):
+        """Adjust this clock so it has exactly ``remaining`` seconds left, e.g.
+        to follow a server that keeps the authoritative time."""
+        self.deduction = self.duration - self.elapsed(now) - remaining
+
+    def until_next_second(self, now=None):
+        """Delay until the displayed seconds next change, or until expiry."""
+        remaining = self.remaining(now)
+        if remaining <= 0:
+            return 0.0
+        return remaining - (math.ceil(remaining) - 1)
+
+
+class ClockTicker:
+    """Calls on_tick whenever the displayed seconds of a ChallengeClock change.
+
+    on_tick is also called once at expiry, after which ticking stops. Only one
+    scheduler callback is ever pending; start, resume and penalties all go
+    through reschedule(), which cancels it before scheduling the next one.
+    """
+
+    def __init__(self, clock, scheduler, on_tick):
+        self.clock = clock
+        self.scheduler = scheduler
+        self.on_tick = on_tick
+        self.handle = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.reschedule()
+
+    def stop(self):
+        self.running = False
+        self._cancel()
+
+    def reschedule(self):
+        """Cancel the pending tick and schedule one for the next second boundary."""
+        self._cancel()
+        if not self.running or self.clock.paused:
+            return
+        delay_ms = max(1, math.ceil(self.clock.until_next_second() * 1000))
+        self.handle = self.scheduler.after(delay_ms, self._fire)
+
+    def _cancel(self):
+        if self.handle is not None:
+            self.scheduler.after_cancel(self.handle)
+            self.handle = None
+
+    def _fire(self):
+        self.handle = None
+        if not self.running:
+            return
+        self.on_tick()
+        if self.clock.expired():
+            self.running = False
+        elif self.running and self.handle is None:
+            self.reschedule()
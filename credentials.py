@@ -0,0 +1,212 @@
+"""Password hashing for player accounts.
+
+New passwords are stored as salted scrypt (or PBKDF2-SHA256) hashes that
+carry their own cost parameters:
+
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+
+Hashes from older versions of the game (bare unsalted SHA-256 hex) still
+verify, and verify_password reports that they should be replaced, so they
+are upgraded on the player's next login. All comparisons are constant-time.
+Hashing is slow on purpose, so the GUI and server run sign-ups and logins
+on a small thread pool of their own through hash_in_background; other
+background work goes through gameservice.run_in_background, so it never
+queues behind a password check.
+
+Run ``python credentials.py --target-ms 100`` to find cost parameters that
+take about that long to verify on this machine.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+SCRYPT = "scrypt"
+PBKDF2 = "pbkdf2_sha256"
+LEGACY_SHA256 = "sha256"
+
+DEFAULT_SCHEME = SCRYPT
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+HASHING_WORKERS = 4
+
+# Hashing threads, created on first use; the KDFs release the GIL, so logins run in parallel
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _encode(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    # OpenSSL's default 32 MiB limit is too small for n=2**15 and up
+    maxmem = 128 * r * (n + p + 2)
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=HASH_BYTES)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations, dklen=HASH_BYTES)
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords with one scheme and set of cost parameters."""
+
+    def __init__(self, scheme=DEFAULT_SCHEME, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, iterations=PBKDF2_ITERATIONS):
+        if scheme not in (SCRYPT, PBKDF2):
+            raise ValueError(f"Unknown password scheme: {scheme}")
+        self.scheme = scheme
+        self.n = n
+        self.r = r
+        self.p = p
+        self.iterations = iterations
+
+    def hash(self, password):
+        """Return a new salted hash string for the password."""
+        salt = os.urandom(SALT_BYTES)
+        if self.scheme == SCRYPT:
+            digest = _scrypt(password, salt, self.n, self.r, self.p)
+            return f"{SCRYPT}${self.n}${self.r}${self.p}${_encode(salt)}${_encode(digest)}"
+        digest = _pbkdf2(password, salt, self.iterations)
+        return f"{PBKDF2}${self.iterations}${_encode(salt)}${_encode(digest)}"
+
+    def verify(self, password, stored_hash):
+        """Check a password. Returns (matches, replacement_hash_or_None).
+
+        A replacement hash is returned when the password matches but the
+        stored hash is a legacy one or uses different cost parameters. With
+        no stored hash (unknown player) it still spends the time of a hash,
+        so response times do not reveal which usernames exist.
+        """
+        if stored_hash is None:
+            self.hash(password)
+            return False, None
+
+        scheme = identify(stored_hash)
+        if scheme == LEGACY_SHA256:
+            candidate = hashlib.sha256(password.encode()).hexdigest()
+            matches = hmac.compare_digest(candidate, stored_hash.lower())
+        elif scheme == SCRYPT:
+            _, n, r, p, salt, digest = stored_hash.split("$")
+            candidate = _scrypt(password, _decode(salt), int(n), int(r), int(p))
+            matches = hmac.compare_digest(candidate, _decode(digest))
+        elif scheme == PBKDF2:
+            _, iterations, salt, digest = stored_hash.split("$")
+            candidate = _pbkdf2(password, _decode(salt), int(iterations))
+            matches = hmac.compare_digest(candidate, _decode(digest))
+        else:
+            return False, None
+
+        if matches and self.needs_rehash(stored_hash):
+            return True, self.hash(password)
+        return matches, None
+
+    def needs_rehash(self, stored_hash):
+        """True if the hash is not in this hasher's scheme and cost parameters."""
+        if self.scheme == SCRYPT:
+            return not stored_hash.startswith(f"{SCRYPT}${self.n}${self.r}${self.p}$")
+        return not stored_hash.startswith(f"{PBKDF2}${self.iterations}$")
+
+
+def identify(stored_hash):
+    """Name the scheme of a stored hash, or None if it is not recognised."""
+    if not stored_hash:
+        return None
+    prefix = stored_hash.split("$", 1)[0]
+    if prefix in (SCRYPT, PBKDF2):
+        return prefix
+    if len(stored_hash) == 64 and all(c in "0123456789abcdefABCDEF" for c in stored_hash):
+        return LEGACY_SHA256
+    return None
+
+
+default_hasher = PasswordHasher()
+
+
+def hash_password(password):
+    """Hash a password with the default hasher."""
+    return default_hasher.hash(password)
+
+
+def verify_password(password, stored_hash):
+    """Verify with the default hasher; see PasswordHasher.verify."""
+    return default_hasher.verify(password, stored_hash)
+
+
+def hash_in_background(function, *args):
+    """Run credential work, function(*args), on the hashing thread pool and return its Future."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Imported here: concurrent.futures is slow to import and only needed once hashing starts
+                from concurrent.futures import ThreadPoolExecutor
+                _executor = ThreadPoolExecutor(max_workers=HASHING_WORKERS, thread_name_prefix="credentials")
+    return _executor.submit(function, *args)
+
+
+def time_verification(hasher, rounds=3):
+    """Median seconds to verify one password with the given hasher."""
+    stored = hasher.hash("benchmark-password")
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hasher.verify("benchmark-password", stored)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate(target_seconds, scheme=DEFAULT_SCHEME):
+    """Find the cheapest cost that takes at least target_seconds to verify here.
+
+    Returns (hasher, measured_seconds). For scrypt, n is doubled; for PBKDF2
+    the iteration count is scaled from the previous measurement.
+    """
+    if scheme == SCRYPT:
+        n = 2 ** 10
+        while True:
+            hasher = PasswordHasher(SCRYPT, n=n)
+            seconds = time_verification(hasher)
+            if seconds >= target_seconds or n >= 2 ** 20:
+                return hasher, seconds
+            n *= 2
+
+    iterations = 10_000
+    while True:
+        hasher = PasswordHasher(PBKDF2, iterations=iterations)
+        seconds = time_verification(hasher)
+        if seconds >= target_seconds * 0.95:
+            return hasher, seconds
+        iterations = int(iterations * max(1.1, target_seconds / seconds))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pick password hashing costs for a target verification time.")
+    parser.add_argument("--target-ms", type=float, default=100.0, help="Target time to verify one password (default: %(default)s)")
+    parser.add_argument("--scheme", choices=(SCRYPT, PBKDF2), default=DEFAULT_SCHEME)
+    args = parser.parse_args(argv)
+
+    hasher, seconds = calibrate(args.target_ms / 1000, args.scheme)
+    if hasher.scheme == SCRYPT:
+        print(f"scrypt n={hasher.n} r={hasher.r} p={hasher.p}: {seconds * 1000:.1f} ms per verification")
+        print(f"Set SCRYPT_N = 2 ** {hasher.n.bit_length() - 1} in credentials.py")
+    else:
+        print(f"pbkdf2_sha256 iterations={hasher.iterations}: {seconds * 1000:.1f} ms per verification")
+        print(f"Set PBKDF2_ITERATIONS = {hasher.iterations} in credentials.py")
+
+
+if __name__ == "__main__":
+    main()
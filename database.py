@@ -0,0 +1,224 @@
+"""Data access for the Riddle Game.
+
+ConnectionPool hands each thread its own SQLite connection out of a small,
+bounded pool, so many sessions (GUI, CLI, server workers) can read riddles
+and write scores at the same time. Connections run in WAL mode with a busy
+timeout (plus the other PRAGMAs below, applied as each connection opens),
+and every query below is a module-level constant so sqlite3's
+per-connection statement cache can reuse the prepared statement.
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from instrumentation import span, timed
+
+DB_PATH = "riddledb.db"
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 128
+MMAP_SIZE = 256 * 1024 * 1024  # Read pages straight from the OS page cache
+CACHE_SIZE_KIB = 16 * 1024  # Per-connection page cache
+
+
+def connect(path=DB_PATH):
+    """Open a connection configured the way every part of the game expects."""
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,  # Autocommit; writes use ConnectionPool.transaction()
+        check_same_thread=False,  # The pool moves idle connections between threads
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    # In WAL mode NORMAL only syncs at checkpoints; a crash can lose the last
+    # commits but never corrupts the database
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    return conn
+
+
+class ConnectionPool:
+    """A bounded pool of SQLite connections with one checked out per thread.
+
+    Nested ``connection()`` blocks on the same thread reuse the connection the
+    thread already holds; it goes back to the pool when the outermost block
+    exits. At most ``size`` connections exist; further threads wait for one.
+    """
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+
+    def _checkout(self):
+        with span("db.checkout"):  # Includes any wait for a free connection
+            self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            conn = connect(self.path)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def _checkin(self, conn):
+        self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Yield this thread's connection, checking one out if it has none."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is not None:
+            local.depth += 1
+            try:
+                yield conn
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._checkout()
+        local.conn = conn
+        local.depth = 1
+        try:
+            yield conn
+        finally:
+            local.conn = None
+            local.depth = 0
+            self._checkin(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes in one IMMEDIATE transaction on this thread's connection."""
+        with self.connection() as conn:
+            if conn.in_transaction:
+                # Already inside an outer transaction; it commits for us
+                yield conn
+                return
+            with span("db.transaction"):
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+
+    def close(self):
+        """Close every connection the pool has opened."""
+        with self._lock:
+            connections, self._all = self._all, []
+        for conn in connections:
+            conn.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(path=DB_PATH):
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(path)
+    return _pool
+
+
+INSERT_PLAYER = "INSERT INTO playerinfo (username, password_hash, created_at) VALUES (?, ?, strftime('%s', 'now'))"
+SELECT_PASSWORD_HASH = "SELECT password_hash FROM playerinfo WHERE username = ?"
+UPDATE_PASSWORD_HASH = "UPDATE playerinfo SET password_hash = ? WHERE username = ?"
+SELECT_USERNAME_EXISTS = "SELECT COUNT(*) FROM playerinfo WHERE username = ?"
+SELECT_PLAYER_DATA = "SELECT classic_completion, best_score FROM playerinfo WHERE username = ?"
+UPDATE_CLASSIC_COMPLETED = "UPDATE playerinfo SET classic_completion = 'completed' WHERE username = ? AND classic_completion != 'completed'"
+UPDATE_BEST_SCORE_IF_HIGHER = "UPDATE playerinfo SET best_score = ? WHERE username = ? AND best_score < ?"
+UPDATE_BEST_SCORE_MAX = "UPDATE playerinfo SET best_score = MAX(best_score, ?) WHERE username = ?"
+SELECT_LEADERBOARD = '''
+    SELECT username, classic_completion, best_score
+    FROM playerinfo
+    WHERE best_score IS NOT NULL  -- Exclude players without a best score
+    ORDER BY best_score DESC, ROWID DESC  -- Order by best score, then by ROWID (newer players first)
+    LIMIT ?
+'''
+
+
+class PlayerRepository:
+    """Reads and writes rows of the playerinfo table through a ConnectionPool."""
+
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
+
+    @timed("db.add_player")
+    def add_player(self, username, password_hash):
+        """Insert a player and return its id. Raises sqlite3.IntegrityError if the name is taken."""
+        with self.pool.transaction() as conn:
+            return conn.execute(INSERT_PLAYER, (username, password_hash)).lastrowid
+
+    @timed("db.password_hash")
+    def password_hash(self, username):
+        """Return the stored password hash, or None for an unknown player."""
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_PASSWORD_HASH, (username,)).fetchone()
+        return row[0] if row else None
+
+    @timed("db.update_password_hash")
+    def update_password_hash(self, username, password_hash):
+        with self.pool.transaction() as conn:
+            conn.execute(UPDATE_PASSWORD_HASH, (password_hash, username))
+
+    @timed("db.username_exists")
+    def username_exists(self, username):
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_USERNAME_EXISTS, (username,)).fetchone()[0] > 0
+
+    @timed("db.player_data")
+    def player_data(self, username):
+        """Return (classic_completion, best_score), or (None, None) for an unknown player."""
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_PLAYER_DATA, (username,)).fetchone()
+        return row if row else (None, None)
+
+    @timed("db.mark_classic_completed")
+    def mark_classic_completed(self, username):
+        """Set classic_completion to 'completed'. Returns True if it was not already."""
+        with self.pool.transaction() as conn:
+            return conn.execute(UPDATE_CLASSIC_COMPLETED, (username,)).rowcount > 0
+
+    @timed("db.record_score")
+    def record_score(self, username, final_score):
+        """Store final_score if it beats the player's best. Returns True if it did."""
+        with self.pool.transaction() as conn:
+            return conn.execute(UPDATE_BEST_SCORE_IF_HIGHER, (final_score, username, final_score)).rowcount > 0
+
+    @timed("db.record_results")
+    def record_results(self, best_scores, completed_usernames):
+        """Apply a batch of results in one transaction.
+
+        best_scores is an iterable of (final_score, username) pairs; each only
+        raises the stored best_score. completed_usernames are marked as having
+        completed Classic Mode.
+        """
+        with self.pool.transaction() as conn:
+            conn.executemany(UPDATE_BEST_SCORE_MAX, best_scores)
+            conn.executemany(UPDATE_CLASSIC_COMPLETED, ((username,) for username in completed_usernames))
+
+    @timed("db.top_players")
+    def top_players(self, limit):
+        """Return the top (username, classic_completion, best_score) rows."""
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_LEADERBOARD, (limit,)).fetchall()
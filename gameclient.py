@@ -0,0 +1,226 @@
+"""Client side of the game server protocol (see gameserver.py).
+
+RemoteGameService has the same methods as gameservice.GameService, so the
+GUI and the CLI play against a server just by being handed one instead.
+Sessions are RemoteSession objects with the attributes the GUI reads from
+the local session classes; the rules and the correct answers stay on the
+server. A Time Challenge keeps a local ChallengeClock for the countdown
+display and resynchronises it with the server's time on every reply.
+"""
+import json
+import socket
+import threading
+
+from challengeclock import ChallengeClock
+from gameengine import ADAPTIVE, TIME_CHALLENGE, TIME_CHALLENGE_SECONDS
+
+CONNECT_TIMEOUT = 5.0
+
+
+class RemoteError(Exception):
+    """The server refused a request."""
+
+
+def parse_address(address, default_port=8765):
+    """Split "host:port" (or just "host") into (host, port)."""
+    host, _, port = address.rpartition(":")
+    if not host:
+        return port, default_port
+    return host, int(port)
+
+
+class GameClient:
+    """One connection to a game server; requests may come from any thread."""
+
+    def __init__(self, host, port, timeout=CONNECT_TIMEOUT):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.settimeout(None)
+        self.reader = self.sock.makefile("rb")
+        self.next_id = 0
+        self._lock = threading.Lock()
+
+    def request(self, op, **fields):
+        """Send one request and return the reply's fields; raises RemoteError if it failed."""
+        with self._lock:
+            self.next_id += 1
+            fields["op"] = op
+            fields["id"] = self.next_id
+            self.sock.sendall(json.dumps(fields).encode() + b"\n")
+            line = self.reader.readline()
+        if not line:
+            raise ConnectionError("The game server closed the connection.")
+        response = json.loads(line)
+        if not response.pop("ok", False):
+            raise RemoteError(response.get("error", "Request failed."))
+        response.pop("id", None)
+        return response
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class RemoteQuestion:
+    """A riddle as the server sends it: text and choices, but not the answer."""
+
+    __slots__ = ("riddle", "choices")
+
+    def __init__(self, riddle, choices):
+        self.riddle = riddle
+        self.choices = tuple(choices)
+
+
+class RemoteSession:
+    """A session running on the server, mirrored from its replies."""
+
+    def __init__(self, client, state):
+        self.client = client
+        self.id = state["session"]
+        self.mode = state["mode"]
+        self.result = None
+        if self.mode == TIME_CHALLENGE:
+            self.timer = ChallengeClock(TIME_CHALLENGE_SECONDS)
+        self.update(state)
+
+    def update(self, state):
+        """Copy a state reply from the server into this session."""
+        question = state["question"]
+        self.current = None if question is None else RemoteQuestion(question["riddle"], question["choices"])
+        self.finished = state["finished"]
+        self.result = state.get("result", self.result)
+        if self.mode == TIME_CHALLENGE:
+            # Pause first, so the sync is measured against a clock that is already stopped
+            if state["paused"]:
+                self.timer.pause()
+            else:
+                self.timer.resume()
+            self.timer.sync(state["remaining"])
+            self.remaining_time = state["remaining_time"]
+            self.score = state["score"]
+            self.current_streak = state["current_streak"]
+            self.highest_streak = state["highest_streak"]
+            self.correct_answers = state["correct_answers"]
+            self.final_score = state["final_score"]
+            self.total_deduction = state["deduction"]
+        else:
+            self.hp = state["hp"]
+            self.progress = state["progress"]
+            self.required = state["required"]
+            self.difficulty = state["difficulty"]
+            self.difficulty_index = state["difficulty_index"]
+            self.completed = state["completed"]
+            if self.mode == ADAPTIVE:
+                self.rating = state["rating"]
+
+    def refresh(self):
+        self.update(self.client.request("state", session=self.id))
+
+    def answer(self, choice):
+        """Answer the current riddle with option 1-4. Returns True if correct, or None if it came too late."""
+        return self.apply_answer(self.send_answer(choice))
+
+    def send_answer(self, choice):
+        """The answer's round trip alone, returning the server's reply; safe to run off the GUI thread."""
+        if self.finished:
+            raise RuntimeError(f"{self.mode} session is already finished.")
+        return self.client.request("answer", session=self.id, choice=choice)
+
+    def apply_answer(self, state):
+        """Copy a send_answer() reply into the session and return what answer() would have."""
+        self.update(state)
+        return None if state.get("late") else state["correct"]
+
+    def tick(self):
+        """Recompute the remaining time; the server decides when it has run out."""
+        if not self.finished:
+            self.remaining_time = self.timer.seconds_left()
+            if self.remaining_time <= 0:
+                self.refresh()
+        return self.remaining_time
+
+    def pause(self):
+        self.update(self.client.request("pause", session=self.id))
+
+    def resume(self):
+        self.update(self.client.request("resume", session=self.id))
+
+
+class RemotePager:
+    """LeaderboardPager's interface over the server's leaderboard op."""
+
+    def __init__(self, client):
+        self.client = client
+        self.refresh()
+
+    def refresh(self):
+        self.total = self.client.request("leaderboard", count=0)["total"]
+
+    def __len__(self):
+        return self.total
+
+    def rows(self, start, count):
+        response = self.client.request("leaderboard", start=start, count=count)
+        self.total = response["total"]
+        return [tuple(row) for row in response["rows"]]
+
+
+class RemoteGameService:
+    """GameService's interface, served by a game server."""
+
+    remote = True  # Every call is a network round trip, so the GUI keeps them off its thread
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.client = None
+
+    def ensure_schema(self):
+        """Connect to the server; the schema is the server's concern."""
+        if self.client is None:
+            self.client = GameClient(self.host, self.port)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    def sign_up(self, username, password):
+        response = self.client.request("sign_up", username=username, password=password)
+        return {"success": response["success"], "message": response["message"]}
+
+    def login(self, username, password):
+        response = self.client.request("login", username=username, password=password)
+        return {"success": response["success"], "message": response["message"]}
+
+    def guest(self):
+        return self.client.request("guest")["username"]
+
+    def player_data(self, username):
+        """Return (classic_completion, best_score) for the player this connection is playing as."""
+        response = self.client.request("player")
+        return response["classic_completion"], response["best_score"]
+
+    def catalog(self):
+        """The riddles stay on the server; there is nothing to load here."""
+        return None
+
+    def new_session(self, mode, username=None, requeue_missed=False):
+        return RemoteSession(self.client, self.client.request("start", mode=mode, requeue_missed=requeue_missed))
+
+    def finish_session(self, username, session):
+        """The server records sessions as they finish; this returns what it reported and closes the session."""
+        if session.result is None:
+            session.refresh()
+        self.client.request("end", session=session.id)
+        return session.result
+
+    def abandon_session(self, username, session):
+        """The server records the session as abandoned when it is ended unfinished."""
+        self.client.request("end", session=session.id)
+
+    def leaderboard_pager(self):
+        return RemotePager(self.client)
+
+    def rank(self, username):
+        response = self.client.request("leaderboard", count=0)
+        return response.get("rank"), response["total"]
@@ -0,0 +1,200 @@
+"""Headless game rules for the Riddle Game.
+
+Nothing in here touches Tk or the database, so the GUI, the CLI and a server
+can all drive the same sessions, and balance tests can run them in bulk.
+
+Every session keeps an ``answers`` list of (riddle_id, choice, correct,
+seconds_to_answer) tuples for the session history, and the version of the
+riddle catalog it was dealt from, so it can be replayed (see replay.py).
+"""
+import time
+
+from challengeclock import ChallengeClock
+from questiondealer import QuestionDealer, mix64, new_seed
+
+CLASSIC = "Classic"
+TIME_CHALLENGE = "Time Challenge"
+ADAPTIVE = "Adaptive"  # Classic rules with riddles matched to the player (see adaptive.py)
+
+CLASSIC_DIFFICULTIES = ("Easy", "Medium", "Hard")
+CLASSIC_HP = 5
+REQUIRED_CORRECT = {"Easy": 7, "Medium": 7, "Hard": 7}
+
+TIME_CHALLENGE_DIFFICULTY = "Medium1"
+TIME_CHALLENGE_SECONDS = 180
+WRONG_ANSWER_PENALTY = 10
+
+
+def final_score(score, highest_streak):
+    """A Time Challenge's final score. Batch jobs apply it to whole NumPy arrays too."""
+    return score * highest_streak
+
+
+class ClassicSession:
+    """One run through Classic Mode: 5 HP, 7 correct answers per difficulty."""
+
+    __slots__ = ("questions_data", "seed", "requeue_missed", "hp", "progress",
+                 "difficulty_index", "questions", "current", "finished", "completed",
+                 "clock", "started_at", "dealt_at", "answers", "catalog_version")
+
+    mode = CLASSIC
+
+    def __init__(self, questions_data, seed=None, requeue_missed=False, clock=time.monotonic, catalog_version=0):
+        # questions_data maps each difficulty to a sequence of Riddle records
+        self.questions_data = questions_data
+        self.seed = new_seed() if seed is None else seed
+        self.requeue_missed = requeue_missed
+        self.catalog_version = catalog_version
+        self.clock = clock
+        self.started_at = time.time()
+        self.answers = []
+        self.hp = CLASSIC_HP
+        self.progress = 0
+        self.difficulty_index = 0
+        self.finished = False
+        self.completed = False
+        self.current = None
+        self._deal_difficulty()
+
+    @property
+    def difficulty(self):
+        return CLASSIC_DIFFICULTIES[self.difficulty_index]
+
+    @property
+    def required(self):
+        return REQUIRED_CORRECT[self.difficulty]
+
+    def _deal_difficulty(self, now=None):
+        # Each difficulty gets its own order, derived from the session seed
+        tier_seed = mix64(self.seed + self.difficulty_index)
+        self.questions = QuestionDealer(self.questions_data.get(self.difficulty, ()), tier_seed)
+        self._next_question(now)
+
+    def _next_question(self, now=None):
+        self.current = self.questions.deal()
+        self.dealt_at = self.clock() if now is None else now
+        if self.current is None:
+            self.finished = True
+
+    def answer(self, choice, now=None):
+        """Answer the current riddle with option 1-4. Returns True if correct."""
+        if self.finished:
+            raise RuntimeError("Classic session is already finished.")
+
+        question = self.current
+        correct = choice == question.correct_answer
+        now = self.clock() if now is None else now
+        self.answers.append((question.id, choice, correct, now - self.dealt_at))
+
+        if correct:
+            self.progress += 1
+            if self.progress >= self.required:
+                if self.difficulty_index == len(CLASSIC_DIFFICULTIES) - 1:
+                    self.finished = True
+                    self.completed = True
+                    return correct
+                self.difficulty_index += 1
+                self.progress = 0
+                self._deal_difficulty(now)
+                return correct
+        else:
+            self.hp -= 1
+            if self.hp <= 0:
+                self.finished = True
+                return correct
+            if self.requeue_missed:
+                self.questions.requeue(question)
+
+        self._next_question(now)
+        return correct
+
+
+class TimeChallengeSession:
+    """One Time Challenge run: 180 seconds, 10 seconds off per wrong answer,
+    final score is the score multiplied by the highest streak."""
+
+    __slots__ = ("seed", "requeue_missed", "timer", "remaining_time", "score", "current_streak",
+                 "highest_streak", "correct_answers", "questions", "current", "finished",
+                 "started_at", "dealt_at", "answers", "catalog_version")
+
+    mode = TIME_CHALLENGE
+
+    def __init__(self, questions, seed=None, requeue_missed=False, now=None, clock=time.monotonic, catalog_version=0):
+        self.seed = new_seed() if seed is None else seed
+        self.requeue_missed = requeue_missed
+        self.catalog_version = catalog_version
+        self.timer = ChallengeClock(TIME_CHALLENGE_SECONDS, now, clock)
+        self.started_at = time.time()
+        self.answers = []
+        self.remaining_time = TIME_CHALLENGE_SECONDS
+        self.score = 0
+        self.current_streak = 0
+        self.highest_streak = 0
+        self.correct_answers = 0
+        self.finished = False
+        self.current = None
+        self.questions = QuestionDealer(questions, self.seed)
+        self._next_question(now)
+
+    @property
+    def final_score(self):
+        return final_score(self.score, self.highest_streak)
+
+    @property
+    def total_deduction(self):
+        return self.timer.deduction
+
+    def _next_question(self, now=None):
+        self.current = self.questions.deal()
+        # Measured on the challenge clock, so time spent paused is not counted
+        self.dealt_at = self.timer.elapsed(now)
+        if self.current is None:
+            self.finished = True
+
+    def tick(self, now=None):
+        """Recompute the remaining time. Returns the whole seconds left."""
+        self.remaining_time = self.timer.seconds_left(now)
+        if self.remaining_time <= 0:
+            self.finished = True
+        return self.remaining_time
+
+    def pause(self, now=None):
+        """Stop the clock, e.g. while the player is back on the main menu."""
+        self.timer.pause(now)
+
+    def resume(self, now=None):
+        """Restart the clock, not counting the time spent paused."""
+        self.timer.resume(now)
+
+    def answer(self, choice, now=None):
+        """Answer the current riddle with option 1-4. Returns True if correct.
+
+        The clock is checked first: an answer given after the time ran out is
+        not counted, the session finishes and None is returned instead.
+        """
+        if self.finished:
+            raise RuntimeError("Time Challenge session is already finished.")
+        if self.tick(now) <= 0:
+            return None
+
+        question = self.current
+        correct = choice == question.correct_answer
+        self.answers.append((question.id, choice, correct, self.timer.elapsed(now) - self.dealt_at))
+
+        if correct:
+            self.score += 1
+            self.correct_answers += 1
+            self.current_streak += 1
+            if self.current_streak > self.highest_streak:
+                self.highest_streak = self.current_streak
+        else:
+            self.current_streak = 0
+            self.timer.penalize(WRONG_ANSWER_PENALTY)
+            if self.requeue_missed:
+                self.questions.requeue(question)
+
+        if self.tick(now) <= 0:
+            return correct
+
+        self._next_question(now)
+        return correct
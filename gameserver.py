@@ -0,0 +1,394 @@
+"""Multi-player game server: line-delimited JSON over TCP.
+
+One asyncio event loop serves every connection. Each request is a JSON
+object on its own line with an ``op`` and an optional ``id``; the reply is
+one line with the same ``id``, ``"ok": true`` and the op's fields, or
+``"ok": false`` and an ``error`` message.
+
+    {"id": 1, "op": "login", "username": "alice", "password": "secret"}
+    {"id": 1, "ok": true, "success": true, "message": "Login successful! ..."}
+
+Ops: sign_up, login, guest, player, start (mode), state, answer (session,
+choice), pause, resume, end (session), leaderboard (start, count), stats
+and metrics (an instrumentation snapshot; see instrumentation.py).
+The rules are the same GameService and session classes the GUI uses
+locally; sessions live in the server, so the time left in a Time Challenge
+is the server's. Every running Time Challenge has its deadline on one
+TimerWheel, moved on each penalty and dropped while paused, and sessions
+whose time runs out are finished and recorded at the deadline whether or
+not their player is still answering. Password hashing and database work run
+on worker threads, and results are written in batches by the service's
+ResultSink, so the loop itself only runs the game rules.
+
+    python gameserver.py --port 8765 --metrics metrics.jsonl
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+from database import DB_PATH, ConnectionPool
+from gameengine import ADAPTIVE, TIME_CHALLENGE
+from gameservice import MODES, GameService
+from instrumentation import enable, snapshot, span
+from timerwheel import TimerWheel
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_SESSIONS_PER_CONNECTION = 4  # A paused Classic, a paused Time Challenge and the one being played
+MAX_LINE_BYTES = 64 * 1024
+MAX_LEADERBOARD_ROWS = 100
+
+log = logging.getLogger(__name__)
+
+
+class RequestError(Exception):
+    """A request that cannot be served; its message is sent back to the client."""
+
+
+def int_field(request, name, default):
+    """An integer field of a request, or default if it is missing; raises RequestError if it is not a whole number."""
+    value = request.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise RequestError(f"{name} must be a whole number.")
+    return value
+
+
+def session_state(session_id, session):
+    """What a client needs to show a session: the current riddle (without its answer) and the stats."""
+    question = session.current
+    state = {
+        "session": session_id,
+        "mode": session.mode,
+        "finished": session.finished,
+        "question": None if session.finished or question is None else {"riddle": question.riddle, "choices": list(question.choices)},
+    }
+    if session.mode == TIME_CHALLENGE:
+        state.update(
+            remaining=max(0.0, session.timer.remaining()),
+            paused=session.timer.paused,
+            remaining_time=session.remaining_time,
+            score=session.score,
+            current_streak=session.current_streak,
+            highest_streak=session.highest_streak,
+            correct_answers=session.correct_answers,
+            final_score=session.final_score,
+            deduction=session.total_deduction,
+        )
+    else:
+        state.update(
+            hp=session.hp,
+            progress=session.progress,
+            required=session.required,
+            difficulty=session.difficulty,
+            difficulty_index=session.difficulty_index,
+            completed=session.completed,
+        )
+        if session.mode == ADAPTIVE:
+            state["rating"] = session.rating
+    return state
+
+
+class ClientConnection:
+    """Per-connection state: who is playing and their open sessions."""
+
+    def __init__(self):
+        self.player = None
+        self.sessions = {}
+        self.results = {}  # session id -> future of what finish_session returned
+        self.timers = {}  # session id -> Timer for its Time Challenge deadline
+
+
+class GameServer:
+    """Serves GameService operations to many clients from one event loop."""
+
+    def __init__(self, service):
+        self.service = service
+        self.session_ids = itertools.count(1)
+        self.connections = 0
+        self.requests = 0
+        self.expired = 0
+        self.server = None
+        self.deadlines = TimerWheel()
+        self.deadlines_pending = None  # Set when the wheel goes from empty to not
+        self.ops = {
+            "sign_up": self.op_sign_up,
+            "login": self.op_login,
+            "guest": self.op_guest,
+            "player": self.op_player,
+            "start": self.op_start,
+            "state": self.op_state,
+            "answer": self.op_answer,
+            "pause": self.op_pause,
+            "resume": self.op_resume,
+            "end": self.op_end,
+            "leaderboard": self.op_leaderboard,
+            "stats": self.op_stats,
+            "metrics": self.op_metrics,
+        }
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        loop = asyncio.get_running_loop()
+        # Load the catalog and leaderboard before the first player arrives
+        await loop.run_in_executor(None, self.service.ensure_schema)
+        await loop.run_in_executor(None, self.service.catalog)
+        await loop.run_in_executor(None, self.service.leaderboard)
+        self.deadlines_pending = asyncio.Event()
+        self.expiry_task = asyncio.create_task(self.expire_sessions())
+        self.server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_BYTES)
+        return self.server
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await self.start(host, port)
+        log.info("Serving on %s", ", ".join(str(sock.getsockname()) for sock in server.sockets))
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        client = ClientConnection()
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                response = await self.respond(client, line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                if writer.transport.get_write_buffer_size() > MAX_LINE_BYTES:
+                    await writer.drain()
+        finally:
+            self.connections -= 1
+            writer.close()
+            for session_id, session in list(client.sessions.items()):
+                await self.end(client, session_id, session)
+
+    async def respond(self, client, line):
+        self.requests += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("Requests must be JSON objects.")
+            request_id = request.get("id")
+            op_name = request.get("op")
+            op = self.ops.get(op_name)
+            if op is None:
+                raise RequestError(f"Unknown op: {op_name!r}")
+            with span("server." + op_name):
+                response = await op(client, request)
+            response["ok"] = True
+        except json.JSONDecodeError:
+            response = {"ok": False, "error": "Requests must be one JSON object per line."}
+        except RequestError as error:
+            response = {"ok": False, "error": str(error)}
+        except Exception:
+            log.exception("Request %r failed", line[:200])
+            response = {"ok": False, "error": "Internal server error."}
+        response["id"] = request_id
+        return response
+
+    async def run_blocking(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    def require_player(self, client):
+        if client.player is None:
+            raise RequestError("Sign up, log in or continue as a guest first.")
+        return client.player
+
+    def require_session(self, client, request):
+        session_id = request.get("session")
+        session = client.sessions.get(session_id)
+        if session is None:
+            raise RequestError(f"No such session: {session_id!r}")
+        return session_id, session
+
+    async def op_sign_up(self, client, request):
+        username = str(request.get("username", ""))
+        result = await self.run_blocking(self.service.sign_up, username, str(request.get("password", "")))
+        if result["success"]:
+            client.player = username
+        return result
+
+    async def op_login(self, client, request):
+        username = str(request.get("username", ""))
+        result = await self.run_blocking(self.service.login, username, str(request.get("password", "")))
+        if result["success"]:
+            client.player = username
+        return result
+
+    async def op_guest(self, client, request):
+        client.player = await self.run_blocking(self.service.guest)
+        return {"username": client.player}
+
+    async def op_player(self, client, request):
+        classic_completion, best_score = await self.run_blocking(self.service.player_data, self.require_player(client))
+        return {"username": client.player, "classic_completion": classic_completion, "best_score": best_score}
+
+    async def op_start(self, client, request):
+        player = self.require_player(client)
+        mode = request.get("mode")
+        if mode not in MODES:
+            raise RequestError(f"Mode must be one of {', '.join(MODES)}.")
+        if len(client.sessions) >= MAX_SESSIONS_PER_CONNECTION:
+            raise RequestError("Too many open sessions; end one first.")
+        session = await self.run_blocking(self.service.new_session, mode, player, bool(request.get("requeue_missed")))
+        session_id = next(self.session_ids)
+        client.sessions[session_id] = session
+        self.schedule_deadline(client, session_id, session)
+        return await self.state(client, session_id, session)
+
+    async def op_state(self, client, request):
+        session_id, session = self.require_session(client, request)
+        return await self.state(client, session_id, session)
+
+    async def op_answer(self, client, request):
+        session_id, session = self.require_session(client, request)
+        choice = request.get("choice")
+        if choice not in (1, 2, 3, 4):
+            raise RequestError("choice must be 1, 2, 3 or 4.")
+        correct = None if session.finished else session.answer(choice)
+        if correct is None:
+            # Too late: the time ran out before the answer arrived
+            response = await self.state(client, session_id, session)
+            response["correct"] = False
+            response["late"] = True
+            return response
+        if session.mode == TIME_CHALLENGE and not correct:
+            self.schedule_deadline(client, session_id, session)  # The penalty brought it forward
+        response = await self.state(client, session_id, session)
+        response["correct"] = correct
+        return response
+
+    async def op_pause(self, client, request):
+        session_id, session = self.require_session(client, request)
+        if session.mode == TIME_CHALLENGE and not session.finished:
+            session.pause()
+            self.deadlines.cancel(client.timers.pop(session_id, None))
+        return await self.state(client, session_id, session)
+
+    async def op_resume(self, client, request):
+        session_id, session = self.require_session(client, request)
+        if session.mode == TIME_CHALLENGE and not session.finished:
+            session.resume()
+            session.tick()
+            self.schedule_deadline(client, session_id, session)
+        return await self.state(client, session_id, session)
+
+    async def op_end(self, client, request):
+        session_id, session = self.require_session(client, request)
+        await self.end(client, session_id, session)
+        del client.sessions[session_id]
+        client.results.pop(session_id, None)
+        return {"session": session_id}
+
+    async def op_leaderboard(self, client, request):
+        start = max(0, int_field(request, "start", 0))
+        count = min(MAX_LEADERBOARD_ROWS, max(0, int_field(request, "count", 10)))
+        board = await self.run_blocking(self.service.leaderboard)
+        response = {"total": len(board), "start": start, "rows": board.top(count, start)}
+        if client.player is not None:
+            response["rank"] = board.rank(client.player)
+        return response
+
+    async def op_stats(self, client, request):
+        lags = self.deadlines.lags.percentiles((0.5, 0.9, 0.99, 0.999))
+        return {
+            "connections": self.connections,
+            "requests": self.requests,
+            "deadlines": len(self.deadlines),
+            "expired": self.expired,
+            "timer_lag_ms": {f"p{fraction * 100:g}": lag * 1000 for fraction, lag in lags.items()},
+            "timer_lag_max_ms": self.deadlines.lags.max * 1000,
+        }
+
+    async def op_metrics(self, client, request):
+        return snapshot()
+
+    async def state(self, client, session_id, session):
+        """The session's state, recording it the first time it is seen finished."""
+        if session.mode == TIME_CHALLENGE and not session.finished:
+            session.tick()
+        state = session_state(session_id, session)
+        if session.finished:
+            state["result"] = await self.finish(client, session_id, session)
+        return state
+
+    def finish(self, client, session_id, session):
+        """Record a finished session once; returns a future of what finish_session returned."""
+        result = client.results.get(session_id)
+        if result is None:
+            self.deadlines.cancel(client.timers.pop(session_id, None))
+            result = asyncio.ensure_future(self.run_blocking(self.service.finish_session, client.player, session))
+            client.results[session_id] = result
+        return result
+
+    async def end(self, client, session_id, session):
+        """Stop a session's deadline; record it as finished if it is, or else as abandoned."""
+        if session.mode == TIME_CHALLENGE and not session.finished:
+            session.tick()
+        self.deadlines.cancel(client.timers.pop(session_id, None))
+        if session.finished:
+            await self.finish(client, session_id, session)  # Already recorded, unless the time just ran out
+        else:
+            self.service.abandon_session(client.player, session)
+
+    def schedule_deadline(self, client, session_id, session):
+        """Put a running Time Challenge's deadline on the wheel, replacing the one it had."""
+        if session.mode != TIME_CHALLENGE:
+            return
+        self.deadlines.cancel(client.timers.pop(session_id, None))
+        if session.finished or session.timer.paused:
+            return
+        now = time.monotonic()
+        client.timers[session_id] = self.deadlines.schedule(now + session.timer.remaining(now), (client, session_id))
+        self.deadlines_pending.set()
+
+    async def expire_sessions(self):
+        """Finish Time Challenges whose deadlines have passed, one batch per tick."""
+        while True:
+            if not self.deadlines:
+                self.deadlines_pending.clear()
+                await self.deadlines_pending.wait()
+            await asyncio.sleep(self.deadlines.tick)
+            for client, session_id in self.deadlines.advance():
+                session = client.sessions.get(session_id)
+                if session is None:
+                    continue
+                client.timers.pop(session_id, None)
+                session.tick()
+                if session.finished:
+                    self.expired += 1
+                    self.finish(client, session_id, session)
+                else:
+                    self.schedule_deadline(client, session_id, session)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Riddle Game to many players over TCP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+    parser.add_argument("--metrics", metavar="FILE", help="Record spans and counters and append snapshots to FILE")
+    parser.add_argument("--metrics-interval", type=float, default=60.0, help="Seconds between snapshots")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.metrics:
+        enable(args.metrics, args.metrics_interval)
+
+    service = GameService(ConnectionPool(args.db))
+    try:
+        asyncio.run(GameServer(service).serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        log.info("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Accounts, sessions and results for one game database.
+
+GameService is everything the GUI, the CLI and the game server need beyond
+the rules in gameengine: signing up, logging in, guests, starting sessions
+of each mode and recording them once they finish. The GUI and CLI use it
+directly for local play, or gameclient.RemoteGameService, which has the
+same methods, to play against a server (gameserver.py) that wraps one.
+"""
+import re
+import sqlite3
+import threading
+
+from adaptive import AdaptiveSession, get_model
+from credentials import hash_password, verify_password
+from database import PlayerRepository, get_pool
+from gameengine import ADAPTIVE, CLASSIC, TIME_CHALLENGE, TIME_CHALLENGE_DIFFICULTY, ClassicSession, TimeChallengeSession
+from guests import GuestAllocator, is_guest
+from instrumentation import count, timed
+from leaderboard import LeaderboardPager, get_leaderboard, loaded_leaderboard
+from migrations import migrate
+from replay import ReplayLog, replay_path
+from resultsink import ResultSink
+from riddlecatalog import get_catalog
+
+MODES = (CLASSIC, ADAPTIVE, TIME_CHALLENGE)
+BACKGROUND_WORKERS = 2
+
+# Threads for general background work (catalog loads, model saves), created on first use;
+# password hashing has its own pool in credentials.py
+_background = None
+_background_lock = threading.Lock()
+
+
+def run_in_background(function, *args):
+    """Run function(*args) on the general background thread pool and return its Future."""
+    global _background
+    if _background is None:
+        with _background_lock:
+            if _background is None:
+                from concurrent.futures import ThreadPoolExecutor  # Slow to import; see credentials.py
+                _background = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="background")
+    return _background.submit(function, *args)
+
+
+def is_valid_username(username):
+    """Validate username: alphanumeric, max 16 characters, no spaces or special characters."""
+    return re.fullmatch(r'[A-Za-z0-9]{1,16}', username) is not None
+
+
+def note_new_player(player_id, username):
+    """Adds a new player to the in-memory leaderboard, if it has been loaded."""
+    board = loaded_leaderboard()
+    if board is not None:
+        board.add_player(player_id, username)
+
+
+class GameService:
+    """Game operations on one database, shared by every session in the process."""
+
+    remote = False
+
+    def __init__(self, pool=None, results=None):
+        self.pool = pool or get_pool()
+        self.players = PlayerRepository(self.pool)
+        self.results = results or ResultSink(self.players, replays=ReplayLog(replay_path(self.pool.path)))
+        self.guests = GuestAllocator(self.pool)
+        self._queued_bests = {}  # username: best score submitted by this process, which may not be written yet
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def ensure_schema(self):
+        """Bring the database schema up to date; only the first call does any work."""
+        with self._schema_lock:
+            if not self._schema_ready:
+                with self.pool.connection() as conn:
+                    migrate(conn)
+                self._schema_ready = True
+
+    def close(self):
+        """Write any results still queued."""
+        self.results.close()
+
+    @timed("sign_up")
+    def sign_up(self, username, password):
+        """Sign up a new player with a password."""
+        if not is_valid_username(username):
+            count("sign_up.failed")
+            return {"success": False, "message": "Invalid username. Please use only alphanumeric characters (max 16)."}
+
+        if len(password) < 6:
+            count("sign_up.failed")
+            return {"success": False, "message": "Password must be at least 6 characters long."}
+
+        # Hash the password (salted, slow KDF) before storing it in the database
+        password_hash = hash_password(password)
+
+        try:
+            player_id = self.players.add_player(username, password_hash)
+            note_new_player(player_id, username)
+            count("sign_up.succeeded")
+            return {"success": True, "message": f"Sign-up successful! Welcome, {username}!"}
+        except sqlite3.IntegrityError:
+            count("sign_up.failed")
+            return {"success": False, "message": "Username already exists. Please choose a different one."}
+
+    @timed("login")
+    def login(self, username, password):
+        """Login an existing player with a password."""
+        stored_hash = self.players.password_hash(username)
+        matches, new_hash = verify_password(password, stored_hash)
+
+        if matches:
+            if new_hash:
+                # Upgrade legacy or outdated hashes now that we know the password
+                self.players.update_password_hash(username, new_hash)
+            count("login.succeeded")
+            return {"success": True, "message": f"Login successful! Welcome back, {username}!"}
+        else:
+            count("login.failed")
+            return {"success": False, "message": "Invalid username or password. Please try again."}
+
+    def guest(self):
+        """Returns a new guest name; the guest is only stored once they record a result."""
+        return self.guests.new_guest()
+
+    def persist_guest(self, username):
+        """Stores a guest's account the first time they record a result."""
+        player_id = self.guests.persist(username)
+        if player_id is not None:
+            note_new_player(player_id, username)
+
+    def player_data(self, username):
+        """Return (classic_completion, best_score), or (None, None) for an unknown player."""
+        classic_completion, best_score = self.players.player_data(username)
+        if classic_completion is None and is_guest(username):
+            return "not_completed", 0  # A guest who has not recorded anything yet
+        return classic_completion, best_score
+
+    @timed("fetch_questions")
+    def catalog(self):
+        """Returns the shared riddle catalog, reloaded only if the riddles changed."""
+        with self.pool.connection() as conn:
+            return get_catalog(conn)
+
+    @timed("start_session")
+    def new_session(self, mode, username=None, requeue_missed=False):
+        """Start a session of one of MODES for a player."""
+        catalog = self.catalog()
+        count(f"sessions.started.{mode}")
+        if mode == CLASSIC:
+            return ClassicSession(catalog.by_difficulty, requeue_missed=requeue_missed, catalog_version=catalog.version)
+        if mode == ADAPTIVE:
+            return AdaptiveSession(get_model(self.pool, catalog), username, pool=self.pool)
+        if mode == TIME_CHALLENGE:
+            return TimeChallengeSession(catalog.difficulty(TIME_CHALLENGE_DIFFICULTY), requeue_missed=requeue_missed,
+                                        catalog_version=catalog.version)
+        raise ValueError(f"Unknown game mode: {mode}")
+
+    @timed("finish_session")
+    def finish_session(self, username, session):
+        """Record a finished session and return {"classic_completed": bool, "new_best": bool}.
+
+        Classic completions and Time Challenge scores go to playerinfo (guests
+        are stored first), and every session goes to the session history. All
+        writes are queued on the ResultSink; the in-memory leaderboard, if it
+        has been loaded, is updated straight away. new_best compares with the
+        player's stored best (and any better score still queued), so finishing
+        never waits for the whole leaderboard to load.
+        """
+        result = {"classic_completed": False, "new_best": False}
+        board = loaded_leaderboard()
+
+        # Running out of riddles with HP left also counts as completing Classic Mode
+        if username and session.mode == CLASSIC and session.hp > 0:
+            if is_guest(username):
+                self.persist_guest(username)
+            self.results.submit_classic_completion(username)
+            if board is not None:
+                board.mark_classic_completed(username)
+            result["classic_completed"] = True
+            count("classic.completed")
+
+        # best_score only changes if the new score is higher
+        elif username and session.mode == TIME_CHALLENGE and (session.final_score > 0 or not is_guest(username)):
+            previous_best = self.best_score(username)
+            if is_guest(username):
+                self.persist_guest(username)
+            self.results.submit_score(username, session.final_score)
+            if board is not None:
+                board.record_score(username, session.final_score)
+            if session.final_score > previous_best:
+                self._queued_bests[username] = session.final_score
+                result["new_best"] = True
+                count("time_challenge.new_best")
+
+        self.results.submit_session(username, session)
+        count(f"sessions.finished.{session.mode}")
+        if session.mode == ADAPTIVE:
+            run_in_background(session.model.save, self.pool)
+        return result
+
+    def best_score(self, username):
+        """The player's best Time Challenge score, counting scores still queued on the ResultSink."""
+        queued = self._queued_bests.get(username, 0)
+        _, stored = self.players.player_data(username)
+        return max(queued, stored or 0)
+
+    def abandon_session(self, username, session):
+        """Record a session left unfinished in the session history, as abandoned.
+
+        Nothing goes to playerinfo or the leaderboard, and it is not added to
+        the replay log, which only holds sessions that ran to their end.
+        """
+        self.results.submit_session(username, session)
+        count(f"sessions.abandoned.{session.mode}")
+
+    @timed("leaderboard_pager")
+    def leaderboard_pager(self):
+        """A pager over the whole leaderboard, including every result submitted so far."""
+        self.results.flush()
+        return LeaderboardPager(self.pool)
+
+    def leaderboard(self):
+        """The in-memory leaderboard, loaded on first use."""
+        if loaded_leaderboard() is None:
+            self.results.flush()  # Load it with every result submitted so far
+        with self.pool.connection() as conn:
+            return get_leaderboard(conn)
+
+    def rank(self, username):
+        """Return (1-based rank or None, number of ranked players)."""
+        board = self.leaderboard()
+        return board.rank(username), len(board)
@@ -0,0 +1,128 @@
+"""Guest account names and storage.
+
+Guest names come from the guest_sequence table (see migrations.py): a
+GuestAllocator reserves a block of numbers with one UPDATE and then hands
+names out of it in memory, so names never collide (sign-up names are alphanumeric, so
+``player_<n>`` can only ever be a guest) and no lookup or retry is needed.
+
+Guests are ephemeral: a name costs nothing until the guest records a
+result, and only then is a row inserted. Guest rows have a password hash
+that never verifies, so nobody can log in as a guest. ``python guests.py
+cleanup`` removes guest rows that never recorded anything, including the
+ones older versions of the game created for every guest. Only rows older
+than a cutoff are removed: a row stored a moment ago may still have its
+first result waiting in a ResultSink queue.
+"""
+import argparse
+import hashlib
+import threading
+import time
+
+from database import DB_PATH, ConnectionPool, get_pool
+from instrumentation import timed
+
+GUEST_PREFIX = "player_"
+GUEST_PASSWORD_HASH = "!guest"  # Not a valid hash, so login never succeeds
+LEGACY_GUEST_PASSWORD_HASH = hashlib.sha256(b"guest").hexdigest()
+BLOCK_SIZE = 100
+CLEANUP_CHUNK_SIZE = 5000
+CLEANUP_MIN_AGE_HOURS = 24
+
+RESERVE_GUEST_BLOCK = "UPDATE guest_sequence SET next_number = next_number + ? WHERE id = 0"
+SELECT_NEXT_GUEST_NUMBER = "SELECT next_number FROM guest_sequence WHERE id = 0"
+INSERT_GUEST = "INSERT OR IGNORE INTO playerinfo (username, password_hash, created_at) VALUES (?, ?, strftime('%s', 'now'))"
+SELECT_STALE_GUESTS = '''
+    SELECT id, username
+    FROM playerinfo
+    WHERE password_hash IN (?, ?)
+      AND best_score = 0
+      AND classic_completion != 'completed'
+      AND (created_at IS NULL OR created_at < ?)  -- NULL: stored before created_at existed
+      AND id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+DELETE_PLAYER_BY_ID = "DELETE FROM playerinfo WHERE id = ?"
+
+
+def is_guest(username):
+    return username is not None and username.startswith(GUEST_PREFIX)
+
+
+class GuestAllocator:
+    """Hands out unique guest names from blocks reserved in the database."""
+
+    def __init__(self, pool=None, block_size=BLOCK_SIZE):
+        self.pool = pool or get_pool()
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    @timed("db.reserve_guest_block")
+    def _reserve_block(self):
+        with self.pool.transaction() as conn:
+            conn.execute(RESERVE_GUEST_BLOCK, (self.block_size,))
+            end = conn.execute(SELECT_NEXT_GUEST_NUMBER).fetchone()[0]
+        self._next = end - self.block_size
+        self._end = end
+
+    def new_guest(self):
+        """Return a fresh guest name. Nothing is stored until persist() is called."""
+        with self._lock:
+            if self._next >= self._end:
+                self._reserve_block()
+            number = self._next
+            self._next += 1
+        return f"{GUEST_PREFIX}{number}"
+
+    @timed("db.persist_guest")
+    def persist(self, username):
+        """Store a guest's row if it is not stored yet. Returns the new id, or None if it already existed."""
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(INSERT_GUEST, (username, GUEST_PASSWORD_HASH))
+            return cursor.lastrowid if cursor.rowcount else None
+
+
+def cleanup_guests(pool=None, chunk_size=CLEANUP_CHUNK_SIZE, min_age_hours=CLEANUP_MIN_AGE_HOURS):
+    """Delete guest rows with no score and no Classic completion, stored at least min_age_hours ago.
+
+    Works through the table in id order, one transaction per chunk, so the
+    write lock is only held briefly. Returns the deleted usernames.
+    """
+    pool = pool or get_pool()
+    cutoff = time.time() - min_age_hours * 3600
+    deleted = []
+    last_id = 0
+    while True:
+        with pool.transaction() as conn:
+            rows = conn.execute(
+                SELECT_STALE_GUESTS,
+                (GUEST_PASSWORD_HASH, LEGACY_GUEST_PASSWORD_HASH, cutoff, last_id, chunk_size),
+            ).fetchall()
+            conn.executemany(DELETE_PLAYER_BY_ID, ((player_id,) for player_id, _ in rows))
+        deleted += [username for _, username in rows]
+        if len(rows) < chunk_size:
+            return deleted
+        last_id = rows[-1][0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage guest accounts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    cleanup_command = commands.add_parser("cleanup", help="Delete guest accounts that never recorded a result")
+    cleanup_command.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+    cleanup_command.add_argument("--older-than", type=float, default=CLEANUP_MIN_AGE_HOURS, metavar="HOURS",
+                                 help="Only delete guests stored at least this long ago (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    pool = ConnectionPool(args.db)
+    try:
+        deleted = cleanup_guests(pool, min_age_hours=args.older_than)
+    finally:
+        pool.close()
+    print(f"Deleted {len(deleted)} stale guest accounts.")
+
+
+if __name__ == "__main__":
+    main()
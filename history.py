@@ -0,0 +1,197 @@
+"""Session history and the analytics queries over it.
+
+Every finished session is appended to the ``sessions`` table and each of its
+answers to ``answers`` (see migrations.py). Rows are never updated; they are
+written in batches by the ResultSink together with best scores.
+
+The analytics functions are generators over server-side cursors: they read
+rows in fetchmany() batches from indexes that already return them in order,
+so they run in constant memory however many answers have been recorded.
+
+    python history.py solve-rates
+    python history.py answer-times
+    python history.py scores --mode "Time Challenge" --bucket 10
+"""
+import argparse
+import time
+
+from database import DB_PATH, ConnectionPool, get_pool
+from gameengine import ADAPTIVE, CLASSIC, CLASSIC_HP, TIME_CHALLENGE
+from instrumentation import timed
+
+FETCH_SIZE = 1000
+
+SELECT_LAST_SESSION_ID = "SELECT COALESCE(MAX(id), 0) FROM sessions"
+INSERT_SESSION = '''
+    INSERT INTO sessions (id, username, mode, seed, started_at, ended_at, outcome,
+                          score, final_score, highest_streak, deduction, hp_lost, answer_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+INSERT_ANSWER = "INSERT INTO answers (session_id, position, riddle_id, choice, correct, elapsed_ms) VALUES (?, ?, ?, ?, ?, ?)"
+
+# These walk answers_by_riddle / sessions_by_mode_score in order, without a sort step
+SELECT_SOLVE_COUNTS = "SELECT riddle_id, COUNT(*), SUM(correct) FROM answers GROUP BY riddle_id ORDER BY riddle_id"
+SELECT_ANSWER_COUNTS = "SELECT riddle_id, COUNT(*) FROM answers GROUP BY riddle_id ORDER BY riddle_id"
+SELECT_ANSWER_TIMES = "SELECT riddle_id, elapsed_ms FROM answers ORDER BY riddle_id, elapsed_ms"
+SELECT_SCORES = "SELECT final_score FROM sessions WHERE mode = ? AND outcome != 'abandoned' ORDER BY final_score"
+
+
+def session_record(username, session, ended_at=None):
+    """Turn a session of any mode into (session_row, answer_rows).
+
+    A session that has not finished is recorded with the outcome "abandoned".
+    The session id is left out of both; SessionHistory.append assigns it.
+    """
+    answers = session.answers
+    if session.mode != TIME_CHALLENGE:
+        score = sum(1 for _, _, correct, _ in answers if correct)
+        final_score = score
+        highest_streak = longest_streak(answers)
+        deduction = 0
+        hp_lost = CLASSIC_HP - session.hp
+        if session.completed:
+            outcome = "completed"
+        elif session.hp <= 0:
+            outcome = "out_of_hp"
+        else:
+            outcome = "out_of_riddles"
+    else:
+        score = session.score
+        final_score = session.final_score
+        highest_streak = session.highest_streak
+        deduction = session.total_deduction
+        hp_lost = 0
+        outcome = "out_of_riddles" if session.current is None else "time_up"
+
+    # SQLite integers are signed 64-bit; seeds are stored as their two's complement
+    seed = session.seed - (1 << 64) if session.seed >= 1 << 63 else session.seed
+    if not session.finished:
+        outcome = "abandoned"
+
+    row = (username, session.mode, seed, session.started_at, time.time() if ended_at is None else ended_at,
+           outcome, score, final_score, highest_streak, deduction, hp_lost, len(answers))
+    answer_rows = [
+        (position, riddle_id, choice, int(correct), round(seconds * 1000))
+        for position, (riddle_id, choice, correct, seconds) in enumerate(answers)
+    ]
+    return row, answer_rows
+
+
+def longest_streak(answers):
+    longest = streak = 0
+    for _, _, correct, _ in answers:
+        streak = streak + 1 if correct else 0
+        longest = max(longest, streak)
+    return longest
+
+
+class SessionHistory:
+    """Appends session records and answers to the event tables."""
+
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
+
+    @timed("db.append_sessions")
+    def append(self, records):
+        """Insert (session_row, answer_rows) records in one transaction. Returns their session ids."""
+        with self.pool.transaction() as conn:
+            # The write lock is held, so no one else can take these ids
+            first_id = conn.execute(SELECT_LAST_SESSION_ID).fetchone()[0] + 1
+            ids = range(first_id, first_id + len(records))
+            conn.executemany(INSERT_SESSION, ((session_id, *row) for session_id, (row, _) in zip(ids, records)))
+            conn.executemany(INSERT_ANSWER, (
+                (session_id, *answer)
+                for session_id, (_, answer_rows) in zip(ids, records)
+                for answer in answer_rows
+            ))
+        return list(ids)
+
+
+def stream(conn, sql, params=(), fetch_size=FETCH_SIZE):
+    """Yield the rows of a query, fetch_size rows at a time."""
+    cursor = conn.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def solve_rates(pool=None):
+    """Yield (riddle_id, attempts, solved, solve_rate) for every answered riddle."""
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        for riddle_id, attempts, solved in stream(conn, SELECT_SOLVE_COUNTS):
+            yield riddle_id, attempts, solved, solved / attempts
+
+
+def median_answer_times(pool=None):
+    """Yield (riddle_id, median_ms) for every answered riddle.
+
+    Two cursors walk the same index side by side: one gives each riddle's
+    answer count, the other its answer times in ascending order, so the
+    median is picked out of the stream without holding any of it.
+    """
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        times = stream(conn, SELECT_ANSWER_TIMES)
+        for riddle_id, count in stream(conn, SELECT_ANSWER_COUNTS):
+            lower, upper = (count - 1) // 2, count // 2
+            for position in range(count):
+                elapsed_ms = next(times)[1]
+                if position == lower:
+                    low = elapsed_ms
+                if position == upper:
+                    high = elapsed_ms
+            yield riddle_id, (low + high) / 2
+
+
+def score_distribution(mode=TIME_CHALLENGE, bucket_size=10, pool=None):
+    """Yield (bucket_start, sessions) for the final scores of one mode, lowest bucket first."""
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        bucket, count = None, 0
+        for (final_score,) in stream(conn, SELECT_SCORES, (mode,)):
+            start = final_score - final_score % bucket_size
+            if start != bucket:
+                if count:
+                    yield bucket, count
+                bucket, count = start, 0
+            count += 1
+        if count:
+            yield bucket, count
+
+
+def main(argv=None):
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+
+    parser = argparse.ArgumentParser(description="Analytics over the recorded session history.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("solve-rates", parents=[database], help="Share of correct answers per riddle")
+    commands.add_parser("answer-times", parents=[database], help="Median time to answer per riddle")
+    scores_command = commands.add_parser("scores", parents=[database], help="Distribution of final scores")
+    scores_command.add_argument("--mode", choices=(CLASSIC, ADAPTIVE, TIME_CHALLENGE), default=TIME_CHALLENGE)
+    scores_command.add_argument("--bucket", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    pool = ConnectionPool(args.db)
+    try:
+        if args.command == "solve-rates":
+            for riddle_id, attempts, solved, rate in solve_rates(pool):
+                print(f"{riddle_id:<12} {solved:>8}/{attempts:<8} {rate:6.1%}")
+        elif args.command == "answer-times":
+            for riddle_id, median_ms in median_answer_times(pool):
+                print(f"{riddle_id:<12} {median_ms / 1000:8.2f}s")
+        else:
+            for bucket, sessions in score_distribution(args.mode, args.bucket, pool):
+                print(f"{bucket:>6}-{bucket + args.bucket - 1:<6} {sessions}")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Named spans, counters and latency histograms for every game action.
+
+Instrumentation is off by default, and then costs one global lookup per
+span: span() hands back a shared do-nothing context manager and @timed
+functions call straight through. enable() switches it on.
+
+Latencies go into HDR-style histograms of microseconds: exact below 128,
+then 64 sub-buckets per power of two, so every recorded value is within
+about 1.5% and a histogram is a fixed array of counts however many values
+it holds. Each thread records into its own histograms and counters, with no
+locks on the recording path; snapshot() merges them.
+
+Snapshots are JSON objects with counters and, per histogram, the count,
+mean, max and percentiles. write_snapshot() appends one as a line to a file
+(enable(path) does so at exit, and every ``interval`` seconds if given), and
+the game server returns one from its ``metrics`` op.
+
+    with span("leaderboard"):
+        ...
+
+    @timed("db.player_data")
+    def player_data(...):
+        ...
+
+    python instrumentation.py show metrics.jsonl
+"""
+import argparse
+import atexit
+import functools
+import json
+import threading
+import time
+from array import array
+
+SUB_BUCKET_BITS = 7  # 2 ** 7 exact values, then 64 sub-buckets per power of two
+MAX_VALUE_BITS = 42  # Up to about 50 days in microseconds
+PERCENTILES = (0.5, 0.9, 0.99, 0.999)
+
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_HALF = _SUB_BUCKETS // 2
+_BUCKETS = _SUB_BUCKETS + (MAX_VALUE_BITS - SUB_BUCKET_BITS) * _HALF
+
+enabled = False
+
+
+def bucket_index(value):
+    """Index of the bucket holding a non-negative integer value."""
+    if value < _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return min(_SUB_BUCKETS + (shift - 1) * _HALF + (value >> shift) - _HALF, _BUCKETS - 1)
+
+
+def bucket_range(index):
+    """The (lowest, highest) values that fall in a bucket."""
+    if index < _SUB_BUCKETS:
+        return index, index
+    shift = (index - _SUB_BUCKETS) // _HALF + 1
+    mantissa = (index - _SUB_BUCKETS) % _HALF + _HALF
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """Counts of values in log-linear buckets, plus exact count, total and max."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = array("q", bytes(8 * _BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        value = max(0, int(value))
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """The value below which ``fraction`` of the recorded values fall (bucket midpoint)."""
+        if not self.count:
+            return 0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                low, high = bucket_range(index)
+                return min((low + high) // 2, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0,
+            "max": self.max,
+            **{f"p{fraction * 100:g}": self.percentile(fraction) for fraction in PERCENTILES},
+        }
+
+
+class _Recordings:
+    """One thread's histograms and counters."""
+
+    __slots__ = ("histograms", "counters")
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+
+_recorders = []  # Every thread's _Recordings, kept after the thread ends
+_recorders_lock = threading.Lock()
+_local = threading.local()
+
+
+def _recordings():
+    try:
+        return _local.recordings
+    except AttributeError:
+        recordings = _local.recordings = _Recordings()
+        with _recorders_lock:
+            _recorders.append(recordings)
+        return recordings
+
+
+def record(name, microseconds):
+    """Record one latency, in microseconds, in the named histogram."""
+    histograms = _recordings().histograms
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = Histogram()
+    histogram.record(microseconds)
+
+
+def count(name, amount=1):
+    """Add to a named counter (does nothing while disabled)."""
+    if enabled:
+        counters = _recordings().counters
+        counters[name] = counters.get(name, 0) + amount
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, (time.perf_counter_ns() - self.started) // 1000)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing a block into the named histogram."""
+    return _Span(name) if enabled else _NULL_SPAN
+
+
+def timed(name):
+    """Decorator timing every call of a function into the named histogram."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, (time.perf_counter_ns() - started) // 1000)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    """Merge every thread's recordings into {"time", "counters", "histograms"}."""
+    histograms = {}
+    counters = {}
+    with _recorders_lock:
+        recorders = list(_recorders)
+    for recorder in recorders:
+        for name, histogram in list(recorder.histograms.items()):
+            merged = histograms.get(name)
+            if merged is None:
+                merged = histograms[name] = Histogram()
+            merged.merge(histogram)
+        for name, value in list(recorder.counters.items()):
+            counters[name] = counters.get(name, 0) + value
+    return {
+        "time": time.time(),
+        "counters": dict(sorted(counters.items())),
+        "histograms": {name: histograms[name].summary() for name in sorted(histograms)},
+    }
+
+
+def write_snapshot(path):
+    """Append a snapshot to a file as one JSON line."""
+    with open(path, "a") as out:
+        out.write(json.dumps(snapshot()) + "\n")
+
+
+def enable(path=None, interval=None):
+    """Start recording; with a path, write a snapshot there at exit and every interval seconds."""
+    global enabled
+    enabled = True
+    if path is not None:
+        atexit.register(write_snapshot, path)
+        if interval:
+            def export():
+                while True:
+                    time.sleep(interval)
+                    write_snapshot(path)
+            threading.Thread(target=export, name="metrics-export", daemon=True).start()
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def print_snapshot(data):
+    for name, value in data["counters"].items():
+        print(f"{name:<40} {value:>10}")
+    if data["histograms"]:
+        print(f"\n{'span (µs)':<32} {'count':>8} {'mean':>9} {'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>9}")
+    for name, summary in data["histograms"].items():
+        print(f"{name:<32} {summary['count']:>8} {summary['mean']:>9.0f} {summary['p50']:>8} {summary['p90']:>8} "
+              f"{summary['p99']:>8} {summary['p99.9']:>8} {summary['max']:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show instrumentation snapshots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show_command = commands.add_parser("show", help="Print the latest snapshot in a metrics file")
+    show_command.add_argument("path")
+    args = parser.parse_args(argv)
+
+    last = None
+    with open(args.path) as snapshots:
+        for line in snapshots:
+            if line.strip():
+                last = line
+    if last is None:
+        print(f"No snapshots in {args.path}.")
+        return
+    print_snapshot(json.loads(last))
+
+
+if __name__ == "__main__":
+    main()
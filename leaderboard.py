@@ -0,0 +1,370 @@
+"""Leaderboard ordering and rank lookup.
+
+The leaderboard orders players by best_score (highest first), then by id
+(newest first). LeaderboardIndex keeps that order in memory in a RankIndex,
+a chunked sorted list with a Fenwick tree over the chunk sizes, so top-N,
+"my rank" and "players around me" are O(log n) and stay flat as the player
+table grows. It is loaded once from a covering index and then updated
+incrementally whenever a score improves.
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from instrumentation import timed
+
+CHUNK_SIZE = 512
+PAGE_SIZE = 50
+CACHED_PAGES = 32
+FIRST_PAGE = object()  # _start_key() of page 0, which starts at the top rather than after a key
+
+SELECT_ALL_RANKED = '''
+    SELECT id, username, classic_completion, best_score
+    FROM playerinfo
+    WHERE best_score IS NOT NULL
+    ORDER BY best_score DESC, id DESC
+'''
+
+COUNT_RANKED = "SELECT COUNT(*) FROM playerinfo WHERE best_score IS NOT NULL"
+SELECT_RANKED_FIRST = '''
+    SELECT id, username, classic_completion, best_score
+    FROM playerinfo
+    WHERE best_score IS NOT NULL
+    ORDER BY best_score DESC, id DESC
+    LIMIT ?
+'''
+# Keyset continuation after (best_score, id), split in two so each half is a
+# single seek on the covering index even when many players share a score
+SELECT_RANKED_SAME_SCORE = '''
+    SELECT id, username, classic_completion, best_score
+    FROM playerinfo
+    WHERE best_score = ? AND id < ?
+    ORDER BY best_score DESC, id DESC
+    LIMIT ?
+'''
+SELECT_RANKED_LOWER_SCORE = '''
+    SELECT id, username, classic_completion, best_score
+    FROM playerinfo
+    WHERE best_score < ?
+    ORDER BY best_score DESC, id DESC
+    LIMIT ?
+'''
+SELECT_RANKED_KEY_AT = '''
+    SELECT best_score, id
+    FROM playerinfo
+    WHERE best_score IS NOT NULL
+    ORDER BY best_score DESC, id DESC
+    LIMIT 1 OFFSET ?
+'''
+
+
+class RankIndex:
+    """Sorted multiset of keys with O(log n) insert, remove, rank and select."""
+
+    def __init__(self, keys=(), chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        keys = sorted(keys)
+        self._chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._size = len(keys)
+        self._rebuild_tree()
+
+    def __len__(self):
+        return self._size
+
+    def _rebuild_tree(self):
+        tree = [0] * (len(self._chunks) + 1)
+        for i, chunk in enumerate(self._chunks, start=1):
+            tree[i] += len(chunk)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _add_to_tree(self, chunk_index, delta):
+        tree = self._tree
+        i = chunk_index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _count_before_chunk(self, chunk_index):
+        tree = self._tree
+        total = 0
+        i = chunk_index
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def insert(self, key):
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            self._size = 1
+            self._rebuild_tree()
+            return
+
+        chunk_index = bisect_left(self._maxes, key)
+        if chunk_index == len(self._chunks):
+            chunk_index -= 1
+        chunk = self._chunks[chunk_index]
+        insort(chunk, key)
+        self._maxes[chunk_index] = chunk[-1]
+        self._size += 1
+
+        if len(chunk) > 2 * self.chunk_size:
+            half = len(chunk) // 2
+            self._chunks[chunk_index:chunk_index + 1] = [chunk[:half], chunk[half:]]
+            self._maxes[chunk_index:chunk_index + 1] = [chunk[half - 1], chunk[-1]]
+            self._rebuild_tree()
+        else:
+            self._add_to_tree(chunk_index, 1)
+
+    def remove(self, key):
+        """Remove one occurrence of key. Raises KeyError if it is missing."""
+        chunk_index = bisect_left(self._maxes, key)
+        if chunk_index == len(self._chunks):
+            raise KeyError(key)
+        chunk = self._chunks[chunk_index]
+        position = bisect_left(chunk, key)
+        if position == len(chunk) or chunk[position] != key:
+            raise KeyError(key)
+        del chunk[position]
+        self._size -= 1
+
+        if chunk:
+            self._maxes[chunk_index] = chunk[-1]
+            self._add_to_tree(chunk_index, -1)
+        else:
+            del self._chunks[chunk_index]
+            del self._maxes[chunk_index]
+            self._rebuild_tree()
+
+    def rank(self, key):
+        """Number of keys strictly smaller than key (its 0-based position)."""
+        chunk_index = bisect_left(self._maxes, key)
+        if chunk_index == len(self._chunks):
+            return self._size
+        return self._count_before_chunk(chunk_index) + bisect_left(self._chunks[chunk_index], key)
+
+    def select(self, position):
+        """Return the key at a 0-based position."""
+        if not 0 <= position < self._size:
+            raise IndexError(position)
+        # Walk down the Fenwick tree to the chunk holding this position
+        tree = self._tree
+        chunk_index = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            next_index = chunk_index + step
+            if next_index < len(tree) and tree[next_index] <= position:
+                chunk_index = next_index
+                position -= tree[next_index]
+            step >>= 1
+        return self._chunks[chunk_index][position]
+
+    def slice(self, start, stop):
+        """Yield the keys at positions start..stop-1."""
+        start = max(0, start)
+        stop = min(stop, self._size)
+        if start >= stop:
+            return
+        key = self.select(start)
+        chunk_index = bisect_left(self._maxes, key)
+        offset = bisect_left(self._chunks[chunk_index], key)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = self._chunks[chunk_index]
+            items = chunk[offset:offset + remaining]
+            yield from items
+            remaining -= len(items)
+            chunk_index += 1
+            offset = 0
+
+
+class LeaderboardIndex:
+    """In-memory leaderboard for every player, kept in step with score updates."""
+
+    def __init__(self, rows=()):
+        # rows are (id, username, classic_completion, best_score)
+        self._lock = threading.Lock()
+        self._players = {}
+        keys = []
+        for player_id, username, classic_completion, best_score in rows:
+            key = (-best_score, -player_id)
+            self._players[username] = [key, classic_completion]
+            keys.append(key)
+        self._order = RankIndex(keys)
+        self._usernames = {key[1]: username for username, (key, _) in self._players.items()}
+
+    @classmethod
+    @timed("db.load_leaderboard")
+    def load(cls, conn):
+        """Build the index from the playerinfo table."""
+        return cls(conn.execute(SELECT_ALL_RANKED))
+
+    def __len__(self):
+        return len(self._order)
+
+    def _row(self, key):
+        username = self._usernames[key[1]]
+        return (username, self._players[username][1], -key[0])
+
+    def add_player(self, player_id, username, classic_completion="not_completed", best_score=0):
+        with self._lock:
+            if username in self._players:
+                return
+            key = (-best_score, -player_id)
+            self._players[username] = [key, classic_completion]
+            self._usernames[key[1]] = username
+            self._order.insert(key)
+
+    def record_score(self, username, final_score):
+        """Raise a player's best score. Returns True if it improved."""
+        with self._lock:
+            entry = self._players.get(username)
+            if entry is None or final_score <= -entry[0][0]:
+                return False
+            old_key = entry[0]
+            new_key = (-final_score, old_key[1])
+            self._order.remove(old_key)
+            self._order.insert(new_key)
+            entry[0] = new_key
+            return True
+
+    def mark_classic_completed(self, username):
+        with self._lock:
+            entry = self._players.get(username)
+            if entry is not None:
+                entry[1] = "completed"
+
+    def remove_player(self, username):
+        with self._lock:
+            entry = self._players.pop(username, None)
+            if entry is not None:
+                self._order.remove(entry[0])
+                del self._usernames[entry[0][1]]
+
+    def top(self, count, start=0):
+        """Return (username, classic_completion, best_score) rows from a 0-based offset."""
+        with self._lock:
+            return [self._row(key) for key in self._order.slice(start, start + count)]
+
+    def rank(self, username):
+        """Return the 1-based rank of a player, or None if unknown."""
+        with self._lock:
+            entry = self._players.get(username)
+            if entry is None:
+                return None
+            return self._order.rank(entry[0]) + 1
+
+    def around(self, username, radius=5):
+        """Return (first_rank, rows) for the players within radius of username."""
+        rank = self.rank(username)
+        if rank is None:
+            return None, []
+        start = max(0, rank - 1 - radius)
+        return start + 1, self.top(2 * radius + 1, start)
+
+
+class LeaderboardPager:
+    """Pages leaderboard rows in from the database with keyset pagination.
+
+    Each page is fetched with a seek past the (best_score, id) key that ended
+    the page before it. Page boundaries are remembered, so scrolling forward
+    or back never uses OFFSET; only a jump to a page with no known boundary
+    needs one OFFSET lookup over the covering index to find its starting key.
+    Only the most recently used pages are kept.
+    """
+
+    def __init__(self, pool, page_size=PAGE_SIZE, cached_pages=CACHED_PAGES):
+        self.pool = pool
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.refresh()
+
+    @timed("db.count_ranked")
+    def refresh(self):
+        """Drop cached pages and recount the players."""
+        self._pages = OrderedDict()
+        self._ends = {}  # page number -> (best_score, id) of its last row
+        with self.pool.connection() as conn:
+            self.total = conn.execute(COUNT_RANKED).fetchone()[0]
+
+    def __len__(self):
+        return self.total
+
+    def _start_key(self, conn, page):
+        """Key of the row just before the page starts, FIRST_PAGE for page 0, or None past the end."""
+        if page == 0:
+            return FIRST_PAGE
+        key = self._ends.get(page - 1)
+        if key is None:
+            key = conn.execute(SELECT_RANKED_KEY_AT, (page * self.page_size - 1,)).fetchone()
+            if key is not None:
+                self._ends[page - 1] = key
+        return key
+
+    @timed("db.leaderboard_page")
+    def _fetch(self, page):
+        limit = self.page_size
+        with self.pool.connection() as conn:
+            key = self._start_key(conn, page)
+            if key is FIRST_PAGE:
+                rows = conn.execute(SELECT_RANKED_FIRST, (limit,)).fetchall()
+            elif key is None:
+                rows = []  # Fewer players than the count said, e.g. some were deleted since
+            else:
+                best_score, player_id = key
+                rows = conn.execute(SELECT_RANKED_SAME_SCORE, (best_score, player_id, limit)).fetchall()
+                if len(rows) < limit:
+                    rows += conn.execute(SELECT_RANKED_LOWER_SCORE, (best_score, limit - len(rows))).fetchall()
+        if rows:
+            self._ends[page] = (rows[-1][3], rows[-1][0])
+        return [(username, classic_completion, best_score) for _, username, classic_completion, best_score in rows]
+
+    def page(self, page):
+        rows = self._pages.get(page)
+        if rows is None:
+            rows = self._fetch(page)
+            self._pages[page] = rows
+            if len(self._pages) > self.cached_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return rows
+
+    def rows(self, start, count):
+        """Return (username, classic_completion, best_score) rows for 0-based ranks start..start+count-1."""
+        start = max(0, start)
+        stop = min(start + count, self.total)
+        rows = []
+        position = start
+        while position < stop:
+            page, offset = divmod(position, self.page_size)
+            page_rows = self.page(page)[offset:offset + stop - position]
+            if not page_rows:
+                break
+            rows += page_rows
+            position += len(page_rows)
+        return rows
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard(conn):
+    """Return the process-wide leaderboard, loading it on first use."""
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                _leaderboard = LeaderboardIndex.load(conn)
+    return _leaderboard
+
+
+def loaded_leaderboard():
+    """Return the process-wide leaderboard if it has been loaded, else None."""
+    return _leaderboard
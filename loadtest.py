@@ -0,0 +1,228 @@
+"""Load test for the game server: many simulated players on one machine.
+
+Each simulated player connects, continues as a guest and plays sessions
+back to back (alternating Classic and Time Challenge, answering at random
+after a short think time) until the test ends. Some players walk away
+from a Time Challenge near the end and only come back after it has run out,
+so the server's deadline timers are exercised too. Request latencies are
+measured on the client side and reported as percentiles, followed by the
+server's own counts and timer lag (and, with --metrics, its span latencies).
+
+By default a server is started in a subprocess on a scratch database filled
+from the bundled riddle pack; pass --host/--port to test a running server.
+
+    python loadtest.py --clients 2000 --duration 30
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from gameengine import CLASSIC, TIME_CHALLENGE
+from instrumentation import print_snapshot
+from riddlepack import import_pack
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RIDDLE_PACK = os.path.join(HERE, "Riddle Data", "riddles.jsonl")
+SERVER_START_TIMEOUT = 30.0
+WALK_AWAY_SECONDS = 10.0  # Time left when a walking-away player stops answering
+
+
+def raise_open_file_limit():
+    """Allow as many sockets as the hard limit permits (on Unix)."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path, port, metrics=None):
+    """Start gameserver.py on a fresh copy of the riddles and wait until it accepts connections."""
+    import_pack(RIDDLE_PACK, db_path)
+    command = [sys.executable, os.path.join(HERE, "gameserver.py"), "--db", db_path, "--port", str(port)]
+    if metrics:
+        command += ["--metrics", metrics]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("The game server exited during start-up.")
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("The game server did not start in time.")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.sessions = 0
+        self.errors = 0
+        self.server = {}
+        self.metrics = {}
+
+
+class SimulatedPlayer:
+    """One connection playing sessions until the deadline."""
+
+    def __init__(self, host, port, stats, think_time, walk_away, rng):
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.think_time = think_time
+        self.walk_away = walk_away
+        self.rng = rng
+        self.ids = itertools.count(1)
+
+    async def request(self, op, **fields):
+        fields["op"] = op
+        fields["id"] = next(self.ids)
+        started = time.perf_counter()
+        self.writer.write(json.dumps(fields).encode() + b"\n")
+        line = await self.reader.readline()
+        self.stats.latencies.append(time.perf_counter() - started)
+        if not line:
+            raise ConnectionError("The game server closed the connection.")
+        response = json.loads(line)
+        if not response["ok"]:
+            self.stats.errors += 1
+        return response
+
+    async def play(self, deadline, modes):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            await self.request("guest")
+            for mode in modes:
+                state = await self.request("start", mode=mode)
+                walk_away = mode == TIME_CHALLENGE and self.rng.random() < self.walk_away
+                while state.get("ok") and not state["finished"] and time.monotonic() < deadline:
+                    if walk_away and state["remaining"] < WALK_AWAY_SECONDS:
+                        # Come back after the server has ended the challenge
+                        await asyncio.sleep(state["remaining"] + 0.5)
+                        state = await self.request("state", session=state["session"])
+                        continue
+                    await asyncio.sleep(self.think_time * self.rng.uniform(0.5, 1.5))
+                    state = await self.request("answer", session=state["session"], choice=self.rng.randint(1, 4))
+                if not state.get("ok"):
+                    break
+                await self.request("end", session=state["session"])
+                if not state["finished"]:
+                    break  # Out of time
+                self.stats.sessions += 1
+        except (ConnectionError, OSError):
+            self.stats.errors += 1
+        finally:
+            self.writer.close()
+
+
+async def server_stats(host, port):
+    """The server's stats and metrics replies."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"op": "stats"}\n{"op": "metrics"}\n')
+    stats = json.loads(await reader.readline())
+    metrics = json.loads(await reader.readline())
+    writer.close()
+    return stats, metrics
+
+
+async def run(host, port, clients, duration, think_time, walk_away, connect_rate, seed):
+    stats = Stats()
+    rng = random.Random(seed)
+    deadline = time.monotonic() + duration
+    tasks = []
+    for i in range(clients):
+        player = SimulatedPlayer(host, port, stats, think_time, walk_away, random.Random(rng.random()))
+        modes = itertools.cycle((CLASSIC, TIME_CHALLENGE) if i % 2 else (TIME_CHALLENGE, CLASSIC))
+        tasks.append(asyncio.create_task(player.play(deadline, modes)))
+        # Ramp up rather than opening every connection at once
+        if connect_rate and i % connect_rate == connect_rate - 1:
+            await asyncio.sleep(1)
+    await asyncio.gather(*tasks)
+    stats.server, stats.metrics = await server_stats(host, port)
+    return stats
+
+
+def report(stats, clients, elapsed):
+    latencies = sorted(stats.latencies)
+    print(f"Clients:        {clients}")
+    print(f"Requests:       {len(latencies)} in {elapsed:.1f}s ({len(latencies) / elapsed:.0f}/s)")
+    print(f"Sessions:       {stats.sessions} finished")
+    print(f"Errors:         {stats.errors}")
+    for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p99.9", 0.999)):
+        print(f"Latency {label:<6} {percentile(latencies, fraction) * 1000:8.2f} ms")
+    if latencies:
+        print(f"Latency max    {latencies[-1] * 1000:8.2f} ms")
+    server = stats.server
+    if server.get("ok"):
+        print(f"Server:         {server['requests']} requests, {server['expired']} Time Challenges ended by their deadline")
+        for label, lag_ms in server["timer_lag_ms"].items():
+            print(f"Timer lag {label:<5}{lag_ms:8.2f} ms")
+        print(f"Timer lag max  {server['timer_lag_max_ms']:8.2f} ms")
+    if stats.metrics.get("histograms"):
+        print()
+        print_snapshot(stats.metrics)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the game server with simulated players.")
+    parser.add_argument("--host", help="Test a running server instead of starting one")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to play for")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="Average time each player takes to answer")
+    parser.add_argument("--walk-away", type=float, default=0.2, help="Share of Time Challenges left to run out")
+    parser.add_argument("--connect-rate", type=int, default=500, help="New connections per second (0: all at once)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--metrics", metavar="FILE", help="Run the server with instrumentation, exporting to FILE")
+    args = parser.parse_args(argv)
+
+    raise_open_file_limit()
+    server = None
+    scratch = None
+    host, port = args.host, args.port
+    if host is None:
+        scratch = tempfile.TemporaryDirectory()
+        host, port = "127.0.0.1", args.port or free_port()
+        server = start_server(os.path.join(scratch.name, "loadtest.db"), port, args.metrics)
+    try:
+        started = time.monotonic()
+        stats = asyncio.run(run(host, port, args.clients, args.duration, args.think_ms / 1000, args.walk_away,
+                                 args.connect_rate, args.seed))
+        report(stats, args.clients, time.monotonic() - started)
+    finally:
+        if server is not None:
+            # SIGINT lets the server write the results still queued before it exits
+            server.send_signal(signal.SIGINT)
+            server.wait()
+        if scratch is not None:
+            scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
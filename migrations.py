@@ -0,0 +1,351 @@
+"""Versioned schema migrations.
+
+Every table, index and trigger the game uses is created here, by a list of
+numbered migration steps. The database records how far it has got in
+``PRAGMA user_version``; migrate() applies the missing steps in order, each
+in its own transaction together with the version bump, so a database is
+never left half-migrated. Databases created by older versions of the game
+(user_version 0, tables already present) are brought up to date the same
+way, since every step only creates what does not exist yet.
+
+The riddle search index needs SQLite's FTS5 extension. Where it is missing,
+migration 7 only logs a warning, and every later migrate() call checks
+again and builds the index once SQLite has been upgraded.
+
+    python migrations.py migrate
+    python migrations.py benchmark --players 100000 --riddles 10000
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from database import DB_PATH, connect
+
+log = logging.getLogger(__name__)
+
+
+def add_column(conn, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN, unless the table already has the column."""
+    if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def create_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS playerinfo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            classic_completion TEXT NOT NULL DEFAULT 'not_completed',
+            best_score INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS riddles (
+            id TEXT PRIMARY KEY,
+            riddle TEXT NOT NULL,
+            choice_1 TEXT NOT NULL,
+            choice_2 TEXT NOT NULL,
+            choice_3 TEXT NOT NULL,
+            choice_4 TEXT NOT NULL,
+            correct_answer INTEGER NOT NULL,
+            difficulty TEXT NOT NULL
+        )
+    ''')
+
+
+def track_riddle_versions(conn):
+    # A counter bumped by triggers on any change, so the catalog knows when to reload
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS riddle_catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO riddle_catalog_version (id, version) VALUES (1, 1)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS riddles_version_{event.lower()} AFTER {event} ON riddles
+            BEGIN
+                UPDATE riddle_catalog_version SET version = version + 1 WHERE id = 1;
+            END
+        ''')
+
+
+def create_guest_sequence(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS guest_sequence (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            next_number INTEGER NOT NULL
+        )
+    ''')
+    # Older versions named guests player_1000..player_9999
+    conn.execute("INSERT OR IGNORE INTO guest_sequence (id, next_number) VALUES (0, 10000)")
+
+
+# Covering index for the leaderboard: ordered scans and keyset seeks never touch the table
+CREATE_LEADERBOARD_INDEX = '''
+    CREATE INDEX IF NOT EXISTS playerinfo_leaderboard
+    ON playerinfo (best_score DESC, id DESC, username, classic_completion)
+'''
+DROP_LEADERBOARD_INDEX = "DROP INDEX IF EXISTS playerinfo_leaderboard"
+
+
+def create_hot_path_indexes(conn):
+    conn.execute(CREATE_LEADERBOARD_INDEX)
+    # Riddles of one difficulty (deck building, exports) without a full table scan
+    conn.execute("CREATE INDEX IF NOT EXISTS riddles_difficulty ON riddles (difficulty)")
+    conn.execute("ANALYZE")
+
+
+def create_session_history(conn):
+    # Append-only event tables; answers are clustered by session for cheap appends
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            username TEXT,
+            mode TEXT NOT NULL,
+            seed INTEGER NOT NULL,
+            started_at REAL NOT NULL,
+            ended_at REAL NOT NULL,
+            outcome TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            final_score INTEGER NOT NULL,
+            highest_streak INTEGER NOT NULL,
+            deduction INTEGER NOT NULL,
+            hp_lost INTEGER NOT NULL,
+            answer_count INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS answers (
+            session_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            riddle_id TEXT NOT NULL,
+            choice INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            elapsed_ms INTEGER NOT NULL,
+            PRIMARY KEY (session_id, position)
+        ) WITHOUT ROWID
+    ''')
+    # Per-riddle analytics read these in order instead of sorting
+    conn.execute("CREATE INDEX IF NOT EXISTS answers_by_riddle ON answers (riddle_id, elapsed_ms, correct)")
+    conn.execute("CREATE INDEX IF NOT EXISTS sessions_by_mode_score ON sessions (mode, final_score)")
+
+
+def create_adaptive_stats(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS riddle_stats (
+            riddle_id TEXT PRIMARY KEY,
+            rating REAL NOT NULL,
+            attempts INTEGER NOT NULL,
+            solved INTEGER NOT NULL,
+            total_ms INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_skill (
+            username TEXT PRIMARY KEY,
+            rating REAL NOT NULL,
+            answers INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def has_fts5(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(text)")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.fts5_probe")
+    return True
+
+
+def create_riddle_search(conn):
+    # Full-text index over the riddle and its choices; the text stays in riddles
+    # (external content) and triggers keep the index in step with it
+    if not has_fts5(conn):
+        log.warning("SQLite was built without FTS5; riddle search will scan the table instead.")
+        return
+    columns = "riddle, choice_1, choice_2, choice_3, choice_4"
+    new_values = "new.riddle, new.choice_1, new.choice_2, new.choice_3, new.choice_4"
+    old_values = "old.riddle, old.choice_1, old.choice_2, old.choice_3, old.choice_4"
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS riddles_search USING fts5(
+            {columns}, content='riddles', content_rowid='rowid', tokenize='porter unicode61 remove_diacritics 2'
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS riddles_search_insert AFTER INSERT ON riddles BEGIN
+            INSERT INTO riddles_search (rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS riddles_search_delete AFTER DELETE ON riddles BEGIN
+            INSERT INTO riddles_search (riddles_search, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS riddles_search_update AFTER UPDATE ON riddles BEGIN
+            INSERT INTO riddles_search (riddles_search, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO riddles_search (rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    ''')
+    conn.execute("INSERT INTO riddles_search (riddles_search) VALUES ('rebuild')")
+
+
+def add_player_aggregates(conn):
+    # Filled in by playerstats.py from the session history
+    add_column(conn, "playerinfo", "average_streak", "REAL NOT NULL DEFAULT 0")
+    add_column(conn, "playerinfo", "percentile_rank", "REAL NOT NULL DEFAULT 0")
+
+
+def add_player_created_at(conn):
+    # Unix time the row was inserted; NULL for rows from before this migration
+    add_column(conn, "playerinfo", "created_at", "REAL")
+
+
+# (version, description, step); append new steps, never edit or reorder old ones
+MIGRATIONS = [
+    (1, "create playerinfo and riddles", create_tables),
+    (2, "track riddle catalog versions", track_riddle_versions),
+    (3, "create guest sequence", create_guest_sequence),
+    (4, "index leaderboard and riddle difficulty", create_hot_path_indexes),
+    (5, "create session history", create_session_history),
+    (6, "create adaptive mode ratings", create_adaptive_stats),
+    (7, "index riddle text for search", create_riddle_search),
+    (8, "add player aggregates", add_player_aggregates),
+    (9, "record when players are created", add_player_created_at),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def has_riddle_search(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'riddles_search'").fetchone() is not None
+
+
+def add_missing_riddle_search(conn):
+    """Build the search index if migration 7 had to skip it and FTS5 is available now. Returns True if built."""
+    if has_riddle_search(conn) or not has_fts5(conn):
+        return False
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not has_riddle_search(conn):
+            create_riddle_search(conn)
+            log.info("Built the riddle search index skipped by migration 7")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return True
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Apply every migration above the database's version, up to target. Returns the versions applied."""
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version > target:
+            break
+        if version <= schema_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if version > schema_version(conn):
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                applied.append(version)
+                log.info("Applied migration %d: %s", version, description)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    if schema_version(conn) >= 7:
+        add_missing_riddle_search(conn)
+    return applied
+
+
+# Queries on the hot paths, with sample parameters, for the benchmark
+HOT_QUERIES = [
+    ("riddles of one difficulty", "SELECT id, riddle, choice_1, choice_2, choice_3, choice_4, correct_answer FROM riddles WHERE difficulty = ?", ("Medium",)),
+    ("leaderboard top 10", "SELECT username, classic_completion, best_score FROM playerinfo WHERE best_score IS NOT NULL ORDER BY best_score DESC, id DESC LIMIT 10", ()),
+    ("leaderboard page after a key", "SELECT id, username, classic_completion, best_score FROM playerinfo WHERE best_score < ? ORDER BY best_score DESC, id DESC LIMIT 50", (500,)),
+    ("players with a best score above", "SELECT COUNT(*) FROM playerinfo WHERE best_score > ?", (900,)),
+    ("login lookup", "SELECT password_hash FROM playerinfo WHERE username = ?", ("player1234",)),
+]
+
+
+def fill_synthetic(conn, players, riddles, password_hash="!"):
+    """Insert players player0.. with random best scores, all with one password hash, and riddles r0.."""
+    rng = random.Random(1)
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO playerinfo (username, password_hash, best_score) VALUES (?, ?, ?)",
+        ((f"player{i}", password_hash, rng.randrange(1000)) for i in range(players)),
+    )
+    conn.executemany(
+        "INSERT INTO riddles VALUES (?, ?, 'a', 'b', 'c', 'd', 1, ?)",
+        ((f"r{i}", f"Riddle number {i}?", rng.choice(("Easy", "Medium", "Hard", "Medium1"))) for i in range(riddles)),
+    )
+    conn.execute("COMMIT")
+
+
+def measure(conn, repeat):
+    for name, sql, params in HOT_QUERIES:
+        plan = "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        started = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        milliseconds = (time.perf_counter() - started) * 1000 / repeat
+        print(f"  {name:<32} {milliseconds:9.3f} ms  {plan}")
+
+
+def benchmark(players, riddles, repeat):
+    """Time the hot queries on a synthetic database before and after the index migration."""
+    with tempfile.TemporaryDirectory() as directory:
+        conn = connect(os.path.join(directory, "benchmark.db"))
+        migrate(conn, target=3)
+        fill_synthetic(conn, players, riddles)
+        print(f"\nBefore ({players} players, {riddles} riddles, schema version {schema_version(conn)}):")
+        measure(conn, repeat)
+        migrate(conn)
+        print(f"\nAfter (schema version {schema_version(conn)}):")
+        measure(conn, repeat)
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate the game database or benchmark its hot queries.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_command = commands.add_parser("migrate", help="Bring a database up to the latest schema")
+    migrate_command.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+
+    benchmark_command = commands.add_parser("benchmark", help="Show query plans and timings before and after the indexes")
+    benchmark_command.add_argument("--players", type=int, default=100_000)
+    benchmark_command.add_argument("--riddles", type=int, default=10_000)
+    benchmark_command.add_argument("--repeat", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "migrate":
+        conn = connect(args.db)
+        try:
+            migrate(conn)
+            print(f"Schema version {schema_version(conn)}.")
+        finally:
+            conn.close()
+    else:
+        benchmark(args.players, args.riddles, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Bulk recompute of the per-player stats in playerinfo from the session history.
+
+The game updates one player's row at a time as sessions finish. After the
+Time Challenge formula (gameengine.final_score) changes, or sessions are
+backfilled into the history, recompute() rebuilds every row at once:
+
+    best_score          best Time Challenge final score, by the current formula
+    classic_completion  'completed' once a Classic session ended with HP left
+    average_streak      mean highest streak over the Time Challenge sessions
+    percentile_rank     percentage of players with a lower best score
+
+Players are read in id order and sessions in chunks, and the sessions are
+folded into arrays indexed by the player's position, with NumPy when it is
+installed and plain lists otherwise. Only the players whose stats changed
+are written back, one chunk at a time, each with a single UPDATE ... FROM a
+temporary table. When most of the table changes, the leaderboard index is
+dropped for the write and built again once at the end, in the same
+transaction, which is much faster than updating it row by row.
+
+The history only goes back to migration 5, so by default it can only raise
+best scores and mark completions; --replace trusts it alone, which is what
+a formula change needs. Running servers keep their in-memory leaderboard,
+so run this while the game is stopped, or restart them afterwards.
+
+    python playerstats.py
+    python playerstats.py --replace
+"""
+import argparse
+import bisect
+import time
+from itertools import repeat
+
+from database import DB_PATH, connect
+from gameengine import CLASSIC, TIME_CHALLENGE, final_score
+from instrumentation import timed
+from migrations import CREATE_LEADERBOARD_INDEX, DROP_LEADERBOARD_INDEX, migrate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CHUNK_SIZE = 100_000
+INDEX_REBUILD_SHARE = 0.1  # Of the players; a write changing more rebuilds the leaderboard index
+
+SELECT_PLAYERS = '''
+    SELECT id, username, best_score, classic_completion = 'completed', average_streak, percentile_rank
+    FROM playerinfo
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+# (username, Time Challenge?, completed Classic?, score, highest streak)
+SELECT_SESSIONS = '''
+    SELECT username, mode = ?, mode = ? AND outcome != 'out_of_hp', score, highest_streak
+    FROM sessions
+    WHERE username IS NOT NULL AND outcome != 'abandoned'
+'''
+# NumPy record types of the two queries' rows
+PLAYER_ROW = [("id", "i8"), ("username", "O"), ("best_score", "i8"), ("completed", "?"),
+              ("average_streak", "f8"), ("percentile_rank", "f8")]
+SESSION_ROW = [("username", "O"), ("time_challenge", "?"), ("classic_completed", "?"),
+               ("score", "i8"), ("highest_streak", "i8")]
+CREATE_RECOMPUTED = '''
+    CREATE TEMP TABLE IF NOT EXISTS recomputed (
+        id INTEGER PRIMARY KEY,
+        best_score INTEGER NOT NULL,
+        classic_completion TEXT NOT NULL,
+        average_streak REAL NOT NULL,
+        percentile_rank REAL NOT NULL
+    )
+'''
+INSERT_RECOMPUTED = "INSERT INTO recomputed VALUES (?, ?, ?, ?, ?)"
+UPDATE_FROM_RECOMPUTED = '''
+    UPDATE playerinfo
+    SET best_score = r.best_score, classic_completion = r.classic_completion,
+        average_streak = r.average_streak, percentile_rank = r.percentile_rank
+    FROM recomputed AS r
+    WHERE playerinfo.id = r.id
+'''
+CLEAR_RECOMPUTED = "DELETE FROM recomputed"
+
+
+def completion(completed):
+    return "completed" if completed else "not_completed"
+
+
+def player_chunks(conn, chunk_size=CHUNK_SIZE):
+    """Yield lists of SELECT_PLAYERS rows in id order, chunk_size at a time."""
+    last_id = 0
+    while True:
+        rows = conn.execute(SELECT_PLAYERS, (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def read_players(conn, chunk_size=CHUNK_SIZE, use_numpy=False):
+    """Every player's SELECT_PLAYERS row, as a list or, with use_numpy, a PLAYER_ROW array."""
+    if not use_numpy:
+        return [row for rows in player_chunks(conn, chunk_size) for row in rows]
+    arrays = [numpy.array(rows, dtype=PLAYER_ROW) for rows in player_chunks(conn, chunk_size)]
+    return numpy.concatenate(arrays) if arrays else numpy.zeros(0, dtype=PLAYER_ROW)
+
+
+def session_chunks(conn, chunk_size=CHUNK_SIZE):
+    """Yield lists of SELECT_SESSIONS rows, chunk_size at a time."""
+    cursor = conn.execute(SELECT_SESSIONS, (TIME_CHALLENGE, CLASSIC))
+    rows = cursor.fetchmany(chunk_size)
+    while rows:
+        yield rows
+        rows = cursor.fetchmany(chunk_size)
+
+
+def aggregate(players, chunks, replace):
+    """Return the (id, best_score, classic_completion, average_streak, percentile_rank) rows that changed."""
+    positions = {row[1]: position for position, row in enumerate(players)}
+    if replace:
+        best = [0] * len(players)
+        completed = [False] * len(players)
+    else:
+        best = [row[2] for row in players]
+        completed = [bool(row[3]) for row in players]
+    streaks = [0] * len(players)
+    games = [0] * len(players)
+    for rows in chunks:
+        for username, time_challenge, classic_completed, score, highest_streak in rows:
+            position = positions.get(username)
+            if position is None:  # A guest who never finished anything worth storing
+                continue
+            if time_challenge:
+                best[position] = max(best[position], final_score(score, highest_streak))
+                streaks[position] += highest_streak
+                games[position] += 1
+            elif classic_completed:
+                completed[position] = True
+
+    ranked = sorted(best)
+    changed = []
+    for position, (player_id, _, *stored) in enumerate(players):
+        average = streaks[position] / games[position] if games[position] else 0.0
+        percentile = 100.0 * bisect.bisect_left(ranked, best[position]) / len(ranked)
+        if [best[position], completed[position], average, percentile] != stored:
+            changed.append((player_id, best[position], completion(completed[position]), average, percentile))
+    return changed
+
+
+def aggregate_numpy(players, chunks, replace):
+    """aggregate() over arrays: each chunk of sessions is a handful of scatter operations."""
+    players = numpy.asarray(players, dtype=PLAYER_ROW)
+    positions = {username: position for position, username in enumerate(players["username"].tolist())}
+    count = len(players)
+    best = numpy.zeros(count, dtype=numpy.int64) if replace else players["best_score"].copy()
+    completed = numpy.zeros(count, dtype=bool) if replace else players["completed"].copy()
+    streaks = numpy.zeros(count)
+    games = numpy.zeros(count)
+    for rows in chunks:
+        sessions = numpy.array(rows, dtype=SESSION_ROW)
+        where = numpy.fromiter(map(positions.get, sessions["username"], repeat(-1)), dtype=numpy.int64, count=len(rows))
+        known = where >= 0
+        challenges = sessions[known & sessions["time_challenge"]]
+        challengers = where[known & sessions["time_challenge"]]
+        numpy.maximum.at(best, challengers, final_score(challenges["score"], challenges["highest_streak"]))
+        streaks += numpy.bincount(challengers, weights=challenges["highest_streak"], minlength=count)
+        games += numpy.bincount(challengers, minlength=count)
+        completed[where[known & sessions["classic_completed"]]] = True
+
+    average = numpy.divide(streaks, games, out=numpy.zeros(count), where=games > 0)
+    percentile = 100.0 * numpy.searchsorted(numpy.sort(best), best, side="left") / count
+    changed = numpy.flatnonzero((best != players["best_score"]) | (completed != players["completed"])
+                                | (average != players["average_streak"]) | (percentile != players["percentile_rank"]))
+    return list(zip(players["id"][changed].tolist(), best[changed].tolist(),
+                    map(completion, completed[changed].tolist()),
+                    average[changed].tolist(), percentile[changed].tolist()))
+
+
+def write_chunk(conn, rows):
+    conn.executemany(INSERT_RECOMPUTED, rows)
+    conn.execute(UPDATE_FROM_RECOMPUTED)
+    conn.execute(CLEAR_RECOMPUTED)
+
+
+def write(conn, rows, chunk_size=CHUNK_SIZE, rebuild_index=False):
+    """Write recomputed rows, one UPDATE per chunk of players.
+
+    Each chunk is its own transaction, unless rebuild_index is set: then the
+    leaderboard index is dropped, every chunk written and the index built
+    again, all in one transaction.
+    """
+    conn.execute(CREATE_RECOMPUTED)
+    if rebuild_index:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(DROP_LEADERBOARD_INDEX)
+            for start in range(0, len(rows), chunk_size):
+                write_chunk(conn, rows[start:start + chunk_size])
+            conn.execute(CREATE_LEADERBOARD_INDEX)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return
+    for start in range(0, len(rows), chunk_size):
+        conn.execute("BEGIN")
+        try:
+            write_chunk(conn, rows[start:start + chunk_size])
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+@timed("db.recompute_player_stats")
+def recompute(db_path=DB_PATH, replace=False, chunk_size=CHUNK_SIZE, use_numpy=True):
+    """Rebuild every player's stats from the session history and return a summary dict."""
+    started = time.perf_counter()
+    conn = connect(db_path)
+    try:
+        migrate(conn)
+        use_numpy = use_numpy and numpy is not None
+        players = read_players(conn, chunk_size, use_numpy)
+        summary = {"players": len(players), "changed": 0}
+        if len(players):
+            changed = (aggregate_numpy if use_numpy else aggregate)(players, session_chunks(conn, chunk_size), replace)
+            write(conn, changed, chunk_size, rebuild_index=len(changed) > INDEX_REBUILD_SHARE * len(players))
+            summary["changed"] = len(changed)
+    finally:
+        conn.close()
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute every player's stats from the session history.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+    parser.add_argument("--replace", action="store_true",
+                        help="Take best scores and completions from the history alone, e.g. after a formula change")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--no-numpy", action="store_true", help="Aggregate in plain Python even if NumPy is installed")
+    args = parser.parse_args(argv)
+
+    summary = recompute(args.db, args.replace, args.chunk_size, not args.no_numpy)
+    print(f"Recomputed {summary['players']} players in {summary['seconds']:.2f}s; {summary['changed']} rows changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Lazy, seeded question dealing.
+
+A QuestionDealer walks a pseudo-random permutation of its riddles one index
+at a time instead of copying and shuffling the whole list, so dealing is O(1)
+per question and the memory per session does not depend on catalog size.
+The same seed always deals the same order, which makes sessions replayable.
+"""
+import random
+from collections import deque
+
+_MASK64 = (1 << 64) - 1
+_ROUNDS = 3
+
+
+def mix64(value):
+    """splitmix64 finalizer: a cheap, well-distributed 64-bit hash."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def new_seed():
+    """Pick a fresh 64-bit seed for a session."""
+    return random.getrandbits(64)
+
+
+class QuestionDealer:
+    """Deals riddles in a seeded random order, then any requeued misses.
+
+    The order comes from a keyed bit mixer (multiply by an odd constant, add,
+    xor-shift) over the next power of two above ``len(riddles)``; every step
+    is invertible, so it is a bijection, and values past the end are
+    cycle-walked back into range.
+    """
+
+    __slots__ = ("riddles", "seed", "position", "requeued", "_mask", "_shift", "_rounds")
+
+    def __init__(self, riddles, seed=None):
+        self.riddles = riddles
+        self.seed = new_seed() if seed is None else seed & _MASK64
+        self.position = 0
+        self.requeued = deque()
+
+        bits = max(1, (len(riddles) - 1).bit_length())
+        self._mask = (1 << bits) - 1
+        self._shift = max(1, bits // 2)
+        key = self.seed
+        rounds = []
+        for _ in range(_ROUNDS):
+            key = mix64(key)
+            rounds.append(((key & self._mask) | 1, (key >> 32) & self._mask))
+        self._rounds = tuple(rounds)
+
+    def _mix(self, index):
+        mask = self._mask
+        shift = self._shift
+        for multiplier, increment in self._rounds:
+            index = (index * multiplier + increment) & mask
+            index ^= index >> shift
+        return index
+
+    def permuted_index(self, position):
+        """Map a deal position to a riddle index; a bijection on range(len(riddles))."""
+        count = len(self.riddles)
+        index = self._mix(position)
+        while index >= count:
+            index = self._mix(index)
+        return index
+
+    def deal(self):
+        """Return the next riddle, or None once the deck and the requeue are empty."""
+        if self.position < len(self.riddles):
+            riddle = self.riddles[self.permuted_index(self.position)]
+            self.position += 1
+            return riddle
+        if self.requeued:
+            return self.requeued.popleft()
+        return None
+
+    def requeue(self, riddle):
+        """Put a missed riddle back, to be dealt after the rest of the deck."""
+        self.requeued.append(riddle)
+
+    def __len__(self):
+        """Number of riddles still to be dealt."""
+        return len(self.riddles) - self.position + len(self.requeued)
+
+    def __iter__(self):
+        riddle = self.deal()
+        while riddle is not None:
+            yield riddle
+            riddle = self.deal()
@@ -0,0 +1,272 @@
+"""Binary replay log of finished sessions, and a replayer that checks them.
+
+Every finished session is appended to a replay log next to the database
+(``riddledb.replays`` for ``riddledb.db``). A record holds the seed, the
+order the riddles were dealt in, each choice and the time it was made, so
+the session can be re-run through the game rules exactly as it was played:
+
+    record     <I size of the rest of the record>
+    header     <BBQdIiBHH mode, flags, seed, started_at, catalog version,
+                          score, hp, answers, username bytes>
+    username   UTF-8
+    answers    <BdB choice, seconds since the first riddle was dealt,
+                    riddle id bytes> followed by the riddle id, per answer
+
+Times are on the session's own monotonic clock; for a Time Challenge that
+is the challenge clock, which stops while the game is paused. The file
+starts with a magic number and format version and is only ever appended
+to; a record cut short by a crash is reported and ignored.
+
+replay() deals the same riddles from the same seed on a fake clock and
+checks that every recorded answer was to the riddle the rules dealt, and
+that the score, HP and completion come out as recorded. An Adaptive
+session's riddles depend on ratings that have changed since, so its
+recorded order is taken as given and only the rules are checked.
+
+    python replay.py verify
+    python replay.py show --limit 5
+"""
+import argparse
+import os
+import struct
+import threading
+import time
+
+from adaptive import DEFAULT_RATING, AdaptiveSession
+from database import DB_PATH, ConnectionPool
+from gameengine import (ADAPTIVE, CLASSIC, TIME_CHALLENGE, TIME_CHALLENGE_DIFFICULTY, TIME_CHALLENGE_SECONDS,
+                        ClassicSession, TimeChallengeSession)
+from instrumentation import timed
+from riddlecatalog import get_catalog
+
+MAGIC = b"RPLY"
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")
+RECORD_SIZE = struct.Struct("<I")
+RECORD_HEADER = struct.Struct("<BBQdIiBHH")
+ANSWER = struct.Struct("<BdB")
+
+MODE_CODES = {CLASSIC: 0, ADAPTIVE: 1, TIME_CHALLENGE: 2}
+MODES_BY_CODE = {code: mode for mode, code in MODE_CODES.items()}
+REQUEUE_MISSED = 1
+COMPLETED = 2
+
+
+def replay_path(db_path=DB_PATH):
+    """The replay log that goes with a database file."""
+    return os.path.splitext(db_path)[0] + ".replays"
+
+
+class Replay:
+    """One decoded replay record."""
+
+    __slots__ = ("username", "mode", "seed", "started_at", "catalog_version", "requeue_missed",
+                 "completed", "score", "hp", "answers")
+
+    def __init__(self, username, mode, seed, started_at, catalog_version, requeue_missed, completed, score, hp, answers):
+        self.username = username
+        self.mode = mode
+        self.seed = seed
+        self.started_at = started_at
+        self.catalog_version = catalog_version
+        self.requeue_missed = requeue_missed
+        self.completed = completed
+        self.score = score
+        self.hp = hp
+        self.answers = answers  # [(riddle_id, choice, seconds since the first deal)]
+
+    def __repr__(self):
+        return f"Replay({self.username!r}, {self.mode!r}, score={self.score}, answers={len(self.answers)})"
+
+
+def session_score(session):
+    """The score a replay checks: the final score of a Time Challenge, correct answers otherwise."""
+    if session.mode == TIME_CHALLENGE:
+        return session.final_score
+    return sum(1 for _, _, correct, _ in session.answers if correct)
+
+
+def encode(username, session):
+    """Pack a finished session into one replay record."""
+    name = (username or "").encode()
+    flags = (REQUEUE_MISSED if session.requeue_missed else 0) | (COMPLETED if getattr(session, "completed", False) else 0)
+    hp = 0 if session.mode == TIME_CHALLENGE else session.hp
+    parts = [RECORD_HEADER.pack(MODE_CODES[session.mode], flags, session.seed, session.started_at,
+                                session.catalog_version, session_score(session), hp, len(session.answers), len(name)),
+             name]
+    # Each riddle is dealt as the one before is answered, so the answer times add up to the time since the first deal
+    at = 0.0
+    for riddle_id, choice, _, seconds in session.answers:
+        at += seconds
+        riddle = str(riddle_id).encode()
+        parts.append(ANSWER.pack(choice, at, len(riddle)))
+        parts.append(riddle)
+    body = b"".join(parts)
+    return RECORD_SIZE.pack(len(body)) + body
+
+
+def decode(body):
+    """Unpack the body of one replay record (everything after its size)."""
+    mode, flags, seed, started_at, catalog_version, score, hp, count, name_length = RECORD_HEADER.unpack_from(body)
+    offset = RECORD_HEADER.size
+    username = body[offset:offset + name_length].decode() or None
+    offset += name_length
+    answers = []
+    unpack_answer = ANSWER.unpack_from
+    for _ in range(count):
+        choice, at, id_length = unpack_answer(body, offset)
+        offset += ANSWER.size
+        answers.append((body[offset:offset + id_length].decode(), choice, at))
+        offset += id_length
+    return Replay(username, MODES_BY_CODE[mode], seed, started_at, catalog_version,
+                  bool(flags & REQUEUE_MISSED), bool(flags & COMPLETED), score, hp, answers)
+
+
+class ReplayLog:
+    """Appends replay records to a log file; safe to share between threads."""
+
+    def __init__(self, path=None):
+        self.path = path or replay_path()
+        self._lock = threading.Lock()
+
+    @timed("replay.append")
+    def append(self, records):
+        """Append encoded records, writing the file header first if the file is new."""
+        with self._lock, open(self.path, "ab") as log:
+            if log.tell() == 0:
+                log.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION))
+            log.write(b"".join(records))
+
+
+class TruncatedLog(Exception):
+    """The log ends part-way through a record."""
+
+
+def read_replays(path):
+    """Yield every record in a replay log, raising TruncatedLog if the last is incomplete."""
+    with open(path, "rb") as log:
+        header = log.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            return
+        magic, version = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} replay log.")
+        while True:
+            size = log.read(RECORD_SIZE.size)
+            if not size:
+                return
+            if len(size) == RECORD_SIZE.size:
+                (length,) = RECORD_SIZE.unpack(size)
+                body = log.read(length)
+                if len(body) == length:
+                    yield decode(body)
+                    continue
+            raise TruncatedLog(f"{path} ends part-way through a record.")
+
+
+class ScriptedModel:
+    """Stands in for AdaptiveModel in a replay: deals the recorded riddles in order."""
+
+    def __init__(self, riddles, version):
+        self.riddles = iter(riddles)
+        self.version = version
+
+    def player_rating(self, username, pool=None):
+        return DEFAULT_RATING
+
+    def pick(self, target_rating, exclude=()):
+        return next(self.riddles, None)
+
+    def record(self, username, riddle, correct, elapsed_ms):
+        return DEFAULT_RATING
+
+
+def new_replay_session(record, catalog, clock):
+    if record.mode == CLASSIC:
+        return ClassicSession(catalog.by_difficulty, record.seed, record.requeue_missed, clock=clock)
+    if record.mode == TIME_CHALLENGE:
+        return TimeChallengeSession(catalog.difficulty(TIME_CHALLENGE_DIFFICULTY), record.seed, record.requeue_missed,
+                                    now=0.0, clock=clock)
+    riddles = [catalog.by_id.get(riddle_id) for riddle_id, _, _ in record.answers]
+    if None in riddles:
+        raise ValueError("riddle no longer in the catalog")
+    return AdaptiveSession(ScriptedModel(riddles, catalog.version), record.username, record.seed, clock=clock)
+
+
+def replay(record, catalog):
+    """Re-run a recorded session. Returns (ok, message)."""
+    if record.catalog_version != catalog.version:
+        return False, f"recorded on catalog version {record.catalog_version}, now {catalog.version}"
+    try:
+        session = new_replay_session(record, catalog, clock=lambda: 0.0)
+    except (KeyError, ValueError) as error:
+        return False, str(error)
+
+    timed = record.mode == TIME_CHALLENGE
+    for position, (riddle_id, choice, at) in enumerate(record.answers):
+        if session.finished:
+            return False, f"answer {position + 1} came after the session had ended"
+        if session.current.id != riddle_id:
+            return False, f"answer {position + 1} is to riddle {riddle_id}, but {session.current.id} was dealt"
+        if session.answer(choice, now=at) is None:  # The same rule as live play: the clock is checked first
+            return False, f"answer {position + 1} came after the time ran out"
+
+    if timed and not session.finished:
+        session.tick(now=TIME_CHALLENGE_SECONDS)  # The time ran out while a riddle was on screen
+    if not session.finished:
+        return False, "the session had not ended"
+    score = session_score(session)
+    if score != record.score:
+        return False, f"score is {score}, recorded as {record.score}"
+    if record.mode != TIME_CHALLENGE and (session.hp != record.hp or session.completed != record.completed):
+        return False, f"HP {session.hp} and completed {session.completed}, recorded as {record.hp} and {record.completed}"
+    return True, "ok"
+
+
+def verify(path, catalog):
+    """Replay every record in a log. Yields (index, record, ok, message)."""
+    for index, record in enumerate(read_replays(path)):
+        ok, message = replay(record, catalog)
+        yield index, record, ok, message
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and verify session replays.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+    parser.add_argument("--log", help="Replay log (default: next to the database)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("verify", help="Replay every session and report any that do not add up")
+    show_command = commands.add_parser("show", help="Print the recorded sessions")
+    show_command.add_argument("--limit", type=int)
+    args = parser.parse_args(argv)
+    path = args.log or replay_path(args.db)
+
+    if args.command == "show":
+        for index, record in enumerate(read_replays(path)):
+            if args.limit is not None and index >= args.limit:
+                break
+            choices = " ".join(f"{riddle_id}:{choice}@{at:.1f}s" for riddle_id, choice, at in record.answers)
+            print(f"#{index} {record.username} {record.mode} seed={record.seed} score={record.score} {choices}")
+        return
+
+    pool = ConnectionPool(args.db)
+    with pool.connection() as conn:
+        catalog = get_catalog(conn)
+    pool.close()
+
+    started = time.perf_counter()
+    counts = {"ok": 0, "failed": 0}
+    try:
+        for index, record, ok, message in verify(path, catalog):
+            counts["ok" if ok else "failed"] += 1
+            if not ok:
+                print(f"#{index} {record.username} {record.mode}: {message}")
+    except TruncatedLog as error:
+        print(error)
+    elapsed = time.perf_counter() - started
+    total = counts["ok"] + counts["failed"]
+    print(f"Verified {total} replays in {elapsed:.2f}s: {counts['ok']} ok, {counts['failed']} failed.")
+
+
+if __name__ == "__main__":
+    main()
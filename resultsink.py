@@ -0,0 +1,200 @@
+"""Write-behind storage for finished-session results.
+
+The GUI (or a server) hands results to a ResultSink and carries on; a
+background thread collects them and applies each batch in one transaction,
+so the result screen never waits on a disk sync. Best scores, Classic
+completions, session history records and replays all go through the same
+batches; replays are appended to the replay log once the batch's
+transaction has committed.
+A batch that fails because the database is busy or locked is retried with
+a growing delay and, if it still cannot be written, put back on the queue
+for the next batch, up to MAX_REQUEUES times before it is dropped and
+logged. Pending results are flushed when the process exits.
+"""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from database import PlayerRepository
+from history import SessionHistory, session_record
+from instrumentation import count, timed
+from replay import encode
+
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.2  # Seconds to wait for more results before writing a batch
+WRITE_ATTEMPTS = 5
+RETRY_DELAY = 0.05  # Seconds before the first retry, doubled after each one
+MAX_REQUEUES = 3  # Times a result that could not be written goes back on the queue
+FLUSH_TIMEOUT = 5.0  # Seconds flush() waits by default
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+# Kinds of queued result
+SCORE = "score"
+CLASSIC_COMPLETION = "classic_completion"
+SESSION = "session"
+REPLAY = "replay"
+
+
+class ResultSink:
+    """Queues best scores and Classic completions and writes them in batches."""
+
+    def __init__(self, players=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, history=None, replays=None):
+        self.players = players or PlayerRepository()
+        self.history = history or SessionHistory(self.players.pool)
+        self.replays = replays  # A replay.ReplayLog, or None to keep no replays
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="result-sink", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def submit_score(self, username, final_score):
+        """Queue a Time Challenge final score; only a new best is kept."""
+        self.start()
+        self.queue.put((SCORE, username, final_score, 0))
+
+    def submit_classic_completion(self, username):
+        """Queue a Classic Mode completion."""
+        self.start()
+        self.queue.put((CLASSIC_COMPLETION, username, None, 0))
+
+    def submit_session(self, username, session):
+        """Queue a session, and its answers, for the session history and, if it finished, the replay log."""
+        self.start()
+        self.queue.put((SESSION, username, session_record(username, session), 0))
+        if self.replays is not None and session.finished:
+            self.queue.put((REPLAY, username, encode(username, session), 0))
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait until everything submitted so far has been written, or timeout seconds have passed.
+
+        Returns True if nothing is left unwritten.
+        """
+        if self.thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    log.warning("%d results still unwritten after waiting %.1fs", self.queue.unfinished_tasks, timeout)
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self):
+        """Write what is pending and stop the background thread."""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(_STOP)
+            thread.join()
+            atexit.unregister(self.close)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            results = [item for item in batch if item is not _STOP]
+            stopping = len(results) != len(batch)
+            try:
+                if results and not self._write_with_retries(results):
+                    if stopping:
+                        log.error("Dropping %d results that could not be saved before exit", len(results))
+                        count("results.dropped", len(results))
+                    else:
+                        self._requeue(results)
+            except Exception:
+                log.exception("Failed to save %d results; dropping them", len(results))
+                count("results.dropped", len(results))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _requeue(self, results):
+        """Put unwritten results back on the queue, dropping those already requeued MAX_REQUEUES times."""
+        dropped = 0
+        for kind, username, value, requeues in results:
+            if requeues < MAX_REQUEUES:
+                # Back on the queue before task_done(), so flush() keeps waiting for them
+                self.queue.put((kind, username, value, requeues + 1))
+            else:
+                dropped += 1
+        if dropped:
+            log.error("Dropping %d results that could not be saved after %d attempts", dropped, MAX_REQUEUES + 1)
+            count("results.dropped", dropped)
+
+    def _write_with_retries(self, results):
+        """Write a batch, retrying while the database is busy. Returns False if it is still unwritten."""
+        delay = RETRY_DELAY
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                self._write(results)
+                return True
+            except sqlite3.OperationalError as error:
+                log.warning("Saving %d results failed (attempt %d of %d): %s",
+                            len(results), attempt, WRITE_ATTEMPTS, error)
+                count("results.write_retries")
+                if attempt < WRITE_ATTEMPTS:
+                    time.sleep(delay)
+                    delay *= 2
+        return False
+
+    @timed("results.write_batch")
+    def _write(self, results):
+        # Only the best score per player in a batch needs to reach the table
+        best_scores = {}
+        completed = set()
+        sessions = []
+        replays = []
+        for kind, username, value, _ in results:
+            if kind == SESSION:
+                sessions.append(value)
+            elif kind == REPLAY:
+                replays.append(value)
+            elif kind == CLASSIC_COMPLETION:
+                completed.add(username)
+            elif value > best_scores.get(username, -1):
+                best_scores[username] = value
+
+        with self.players.pool.transaction():
+            self.players.record_results(
+                [(score, username) for username, score in best_scores.items()],
+                completed,
+            )
+            if sessions:
+                self.history.append(sessions)
+        if replays:
+            # The batch is committed, so a failure here must not make it be written again
+            try:
+                self.replays.append(replays)
+            except OSError:
+                log.exception("Failed to append %d replays", len(replays))
+        self.written += len(results)
+        self.batches += 1
+        count("results.written", len(results))
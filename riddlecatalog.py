@@ -0,0 +1,99 @@
+"""In-memory riddle catalog, loaded once per process.
+
+Riddles are read from the ``riddles`` table into compact records indexed by
+difficulty and id. Triggers on ``riddles`` bump a version counter, so the
+catalog is only reloaded when the table content actually changes.
+"""
+import threading
+from types import MappingProxyType
+
+from instrumentation import count, timed
+
+RIDDLE_COLUMNS = "id, riddle, choice_1, choice_2, choice_3, choice_4, correct_answer, difficulty"
+
+
+class Riddle:
+    """A single riddle with its four choices and the 1-based correct choice."""
+
+    __slots__ = ("id", "riddle", "choices", "correct_answer", "difficulty")
+
+    def __init__(self, id, riddle, choices, correct_answer, difficulty):
+        set_field = object.__setattr__
+        set_field(self, "id", id)
+        set_field(self, "riddle", riddle)
+        set_field(self, "choices", tuple(choices))
+        set_field(self, "correct_answer", correct_answer)
+        set_field(self, "difficulty", difficulty)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Riddle records are read-only.")
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a record from a ``riddles`` row selected with RIDDLE_COLUMNS."""
+        return cls(row[0], row[1], row[2:6], row[6], row[7])
+
+    def as_row(self):
+        return (self.id, self.riddle, *self.choices, self.correct_answer, self.difficulty)
+
+    def __repr__(self):
+        return f"Riddle({self.id!r}, {self.difficulty!r})"
+
+
+class RiddleCatalog:
+    """Immutable set of riddles indexed by id and by difficulty."""
+
+    __slots__ = ("version", "by_id", "by_difficulty")
+
+    def __init__(self, riddles, version=0):
+        by_id = {}
+        by_difficulty = {}
+        for riddle in riddles:
+            by_id[riddle.id] = riddle
+            by_difficulty.setdefault(riddle.difficulty, []).append(riddle)
+        self.version = version
+        self.by_id = MappingProxyType(by_id)
+        self.by_difficulty = MappingProxyType({name: tuple(items) for name, items in by_difficulty.items()})
+
+    def difficulty(self, name):
+        """Return the riddles of one difficulty as a tuple (empty if unknown)."""
+        return self.by_difficulty.get(name, ())
+
+    def __getitem__(self, riddle_id):
+        return self.by_id[riddle_id]
+
+    def __len__(self):
+        return len(self.by_id)
+
+
+def catalog_version(conn):
+    """Read the current content version of the riddles table."""
+    row = conn.execute("SELECT version FROM riddle_catalog_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+@timed("db.load_catalog")
+def load_catalog(conn):
+    """Read every riddle into a new catalog, bypassing the process cache."""
+    version = catalog_version(conn)
+    rows = conn.execute(f"SELECT {RIDDLE_COLUMNS} FROM riddles ORDER BY rowid")
+    catalog = RiddleCatalog(map(Riddle.from_row, rows), version)
+    count("catalog.riddles_loaded", len(catalog))
+    return catalog
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(conn):
+    """Return the process-wide catalog, reloading it only if the riddles changed."""
+    global _catalog
+    version = catalog_version(conn)
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+    with _catalog_lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = load_catalog(conn)
+        return _catalog
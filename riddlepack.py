@@ -0,0 +1,223 @@
+"""Import and export riddle packs.
+
+A pack is a CSV file with a header row, or a JSONL file with one object per
+line, using the riddles table's column names: id, riddle, choice_1..choice_4,
+correct_answer (1-4) and difficulty. Imports stream the file, validate each
+row, skip duplicates (same id, or the same riddle text once case and spacing
+are normalized) and insert in large batched transactions. Near duplicates,
+riddles worded almost the same as one already in the table or earlier in the
+pack, are rejected too (see riddlesearch.py) unless --allow-near-duplicates
+is given.
+
+    python riddlepack.py import "Riddle Data/riddles.jsonl"
+    python riddlepack.py export riddles.csv --difficulty Easy
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+
+from database import DB_PATH, connect
+from migrations import migrate
+from riddlesearch import DUPLICATE_SIMILARITY, DuplicateIndex, Fingerprint
+
+FIELDS = ("id", "riddle", "choice_1", "choice_2", "choice_3", "choice_4", "correct_answer", "difficulty")
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 20
+
+INSERT_RIDDLE = f"INSERT INTO riddles ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})"
+SELECT_RIDDLES = f"SELECT {', '.join(FIELDS)} FROM riddles"
+
+
+class PackError(ValueError):
+    """A row in a riddle pack that cannot be imported."""
+
+
+def pack_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    raise PackError(f"Unknown pack format for {path}; use .csv or .jsonl")
+
+
+def read_pack(path):
+    """Yield row dicts from a CSV or JSONL pack, one row at a time."""
+    with open(path, newline="", encoding="utf-8") as pack:
+        if pack_format(path) == "csv":
+            for row in csv.DictReader(pack):
+                yield row
+        else:
+            for line in pack:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def validate(row):
+    """Turn a pack row into an insertable tuple, raising PackError if it is invalid."""
+    values = []
+    for field in FIELDS:
+        value = row.get(field)
+        if field == "correct_answer":
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise PackError(f"correct_answer must be a number, got {value!r}") from None
+            if not 1 <= value <= 4:
+                raise PackError(f"correct_answer must be between 1 and 4, got {value}")
+        else:
+            value = "" if value is None else str(value).strip()
+            if not value:
+                raise PackError(f"{field} is missing")
+        values.append(value)
+    return tuple(values)
+
+
+def text_hash(riddle):
+    """Hash of the riddle text with case and whitespace normalized."""
+    normalized = " ".join(riddle.lower().split())
+    return hashlib.blake2b(normalized.encode(), digest_size=8).digest()
+
+
+def import_pack(path, db_path=DB_PATH, batch_size=BATCH_SIZE, similarity=DUPLICATE_SIMILARITY):
+    """Import a pack and return a summary dict of what happened.
+
+    Rows at least similarity alike to a riddle already present are skipped as
+    near duplicates; similarity=None turns that check off.
+    """
+    started = time.perf_counter()
+    conn = connect(db_path)
+    migrate(conn)
+
+    # Ids and text hashes already in the table, so re-importing a pack is a no-op
+    seen_ids = set()
+    seen_texts = set()
+    index = DuplicateIndex(similarity) if similarity is not None else None
+    for riddle_id, riddle in conn.execute("SELECT id, riddle FROM riddles"):
+        seen_ids.add(riddle_id)
+        seen_texts.add(text_hash(riddle))
+        if index is not None:
+            index.add(riddle_id, Fingerprint(riddle))
+
+    summary = {"read": 0, "inserted": 0, "duplicates": 0, "near_duplicates": 0, "invalid": 0, "errors": []}
+    batch = []
+
+    def flush():
+        conn.execute("BEGIN")
+        conn.executemany(INSERT_RIDDLE, batch)
+        conn.execute("COMMIT")
+        summary["inserted"] += len(batch)
+        batch.clear()
+
+    try:
+        for number, row in enumerate(read_pack(path), start=1):
+            summary["read"] += 1
+            try:
+                values = validate(row)
+            except PackError as error:
+                summary["invalid"] += 1
+                if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                    summary["errors"].append(f"row {number}: {error}")
+                continue
+
+            digest = text_hash(values[1])
+            if values[0] in seen_ids or digest in seen_texts:
+                summary["duplicates"] += 1
+                continue
+            if index is not None:
+                fingerprint = Fingerprint(values[1])
+                matches = index.matches(fingerprint)
+                if matches:
+                    summary["near_duplicates"] += 1
+                    if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                        other_id, score = matches[0]
+                        summary["errors"].append(f"row {number}: near duplicate of {other_id} ({score:.0%} alike)")
+                    continue
+                index.add(values[0], fingerprint)
+            seen_ids.add(values[0])
+            seen_texts.add(digest)
+
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        conn.close()
+
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def export_pack(path, db_path=DB_PATH, difficulty=None):
+    """Write riddles (optionally one difficulty) to a CSV or JSONL pack. Returns the row count."""
+    fmt = pack_format(path)
+    conn = connect(db_path)
+    query, params = SELECT_RIDDLES + " ORDER BY rowid", ()
+    if difficulty:
+        query, params = SELECT_RIDDLES + " WHERE difficulty = ? ORDER BY rowid", (difficulty,)
+
+    count = 0
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as pack:
+            if fmt == "csv":
+                writer = csv.writer(pack)
+                writer.writerow(FIELDS)
+                for row in conn.execute(query, params):
+                    writer.writerow(row)
+                    count += 1
+            else:
+                for row in conn.execute(query, params):
+                    pack.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n")
+                    count += 1
+    finally:
+        conn.close()
+    return count
+
+
+def print_summary(summary):
+    seconds = summary["seconds"]
+    rate = summary["read"] / seconds if seconds else 0
+    print(f"Read {summary['read']} rows in {seconds:.2f}s ({rate:,.0f} rows/sec)")
+    print(f"Inserted {summary['inserted']}, skipped {summary['duplicates']} duplicates, "
+          f"{summary['near_duplicates']} near duplicates and {summary['invalid']} invalid rows")
+    for error in summary["errors"]:
+        print(f"  {error}")
+
+
+def main(argv=None):
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+
+    parser = argparse.ArgumentParser(description="Import or export riddle packs (CSV or JSONL).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_command = commands.add_parser("import", parents=[database], help="Add the riddles from a pack to the database")
+    import_command.add_argument("pack")
+    import_command.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    import_command.add_argument("--similarity", type=float, default=DUPLICATE_SIMILARITY,
+                                help="Jaccard similarity that counts as a near duplicate (default: %(default)s)")
+    import_command.add_argument("--allow-near-duplicates", action="store_true",
+                                help="Only skip exact duplicates")
+
+    export_command = commands.add_parser("export", parents=[database], help="Write the database's riddles to a pack")
+    export_command.add_argument("pack")
+    export_command.add_argument("--difficulty")
+
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        similarity = None if args.allow_near_duplicates else args.similarity
+        print_summary(import_pack(args.pack, args.db, args.batch_size, similarity))
+    else:
+        started = time.perf_counter()
+        count = export_pack(args.pack, args.db, args.difficulty)
+        seconds = time.perf_counter() - started
+        print(f"Exported {count} riddles to {args.pack} in {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
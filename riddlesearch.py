@@ -0,0 +1,232 @@
+"""Riddle search and near-duplicate detection.
+
+search() runs a full-text query against riddles_search, an FTS5 index over
+each riddle and its four choices (see migrations.py), ranked by bm25 with
+the riddle text weighted above the choices. Every word must match, and the
+last one may be a prefix, so a query can be typed a word at a time.
+
+Near duplicates are found with MinHash over 5-character shingles of the
+normalized text. A signature is one-permutation MinHash: each shingle's
+hash picks one of SIGNATURE_BINS bins and keeps the smallest value there,
+with empty bins filled from the next full one. Signatures are cut into
+BANDS bands; riddles that share a band are candidates, and a candidate is
+only reported if the exact Jaccard similarity of the two shingle sets
+reaches the threshold. Checking one riddle against the index is a few
+dictionary lookups however large the catalog, so riddlepack.py rejects
+near duplicates as it imports.
+
+    python riddlesearch.py search "cities houses"
+    python riddlesearch.py duplicates --similarity 0.6
+"""
+import argparse
+import re
+import time
+
+from database import DB_PATH, connect
+from instrumentation import timed
+from migrations import has_riddle_search, migrate
+
+SEARCH_LIMIT = 20
+RIDDLE_WEIGHT = 10.0  # bm25 weight of the riddle text against 1.0 for each choice
+SHINGLE_SIZE = 5
+SIGNATURE_BINS = 32
+BANDS = 8  # Of SIGNATURE_BINS // BANDS rows each: riddles 80% alike are candidates 98% of the time
+DUPLICATE_SIMILARITY = 0.8
+
+_BIN_SHIFT = 32 - (SIGNATURE_BINS - 1).bit_length()
+_ROWS = SIGNATURE_BINS // BANDS
+_EMPTY = 1 << 32
+
+SEARCH = f'''
+    SELECT riddles.id, riddles.difficulty, riddles.riddle
+    FROM riddles_search JOIN riddles ON riddles.rowid = riddles_search.rowid
+    WHERE riddles_search MATCH ?
+    ORDER BY bm25(riddles_search, {RIDDLE_WEIGHT}, 1.0, 1.0, 1.0, 1.0)
+    LIMIT ?
+'''
+SEARCH_DIFFICULTY = f'''
+    SELECT riddles.id, riddles.difficulty, riddles.riddle
+    FROM riddles_search JOIN riddles ON riddles.rowid = riddles_search.rowid
+    WHERE riddles_search MATCH ? AND riddles.difficulty = ?
+    ORDER BY bm25(riddles_search, {RIDDLE_WEIGHT}, 1.0, 1.0, 1.0, 1.0)
+    LIMIT ?
+'''
+SEARCH_TEXT = "riddle || ' ' || choice_1 || ' ' || choice_2 || ' ' || choice_3 || ' ' || choice_4"
+SELECT_RIDDLE_TEXTS = "SELECT id, riddle FROM riddles ORDER BY rowid"
+
+
+def query_words(query):
+    return re.findall(r"\w+", query.lower())
+
+
+def match_expression(words):
+    """An FTS5 query matching every word, the last one as a prefix."""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+@timed("db.search_riddles")
+def search(conn, query, difficulty=None, limit=SEARCH_LIMIT):
+    """Return up to limit (id, difficulty, riddle) rows matching query, best first."""
+    words = query_words(query)
+    if not words:
+        return []
+    if not has_riddle_search(conn):
+        return scan(conn, words, difficulty, limit)
+    if difficulty is None:
+        return conn.execute(SEARCH, (match_expression(words), limit)).fetchall()
+    return conn.execute(SEARCH_DIFFICULTY, (match_expression(words), difficulty, limit)).fetchall()
+
+
+def scan(conn, words, difficulty, limit):
+    """search() without FTS5: a LIKE per word over the whole table, in table order."""
+    conditions = [f"{SEARCH_TEXT} LIKE ?"] * len(words)
+    params = [f"%{word}%" for word in words]
+    if difficulty is not None:
+        conditions.append("difficulty = ?")
+        params.append(difficulty)
+    sql = f"SELECT id, difficulty, riddle FROM riddles WHERE {' AND '.join(conditions)} ORDER BY rowid LIMIT ?"
+    return conn.execute(sql, (*params, limit)).fetchall()
+
+
+def normalize(text):
+    """Lowercase, with punctuation dropped and runs of spaces collapsed."""
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def shingles(normalized):
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def similarity(first, second):
+    """Jaccard similarity of two shingle sets."""
+    return len(first & second) / len(first | second)
+
+
+def signature(shingle_set):
+    """One-permutation MinHash of a shingle set: SIGNATURE_BINS values."""
+    # str hashes are salted per process, which is fine: signatures are never stored
+    mins = [_EMPTY] * SIGNATURE_BINS
+    for value in map(hash, shingle_set):
+        value &= 0xFFFFFFFF
+        bin_index = value >> _BIN_SHIFT
+        if value < mins[bin_index]:
+            mins[bin_index] = value
+    # Densify: an empty bin borrows from the next full one, marked with how far it looked
+    filled = list(mins)
+    for i, value in enumerate(mins):
+        distance = 1
+        while value == _EMPTY:
+            value = mins[(i + distance) % SIGNATURE_BINS]
+            if value != _EMPTY:
+                value += distance << 32
+            distance += 1
+        filled[i] = value
+    return filled
+
+
+def band_keys(values):
+    return [(band, tuple(values[band * _ROWS:(band + 1) * _ROWS])) for band in range(BANDS)]
+
+
+class Fingerprint:
+    """A riddle text prepared for a DuplicateIndex."""
+
+    __slots__ = ("normalized", "shingles", "keys")
+
+    def __init__(self, text):
+        self.normalized = normalize(text)
+        self.shingles = shingles(self.normalized)
+        self.keys = band_keys(signature(self.shingles))
+
+
+class DuplicateIndex:
+    """Riddle texts indexed by MinHash bands, to find the ones nearly the same as a new text."""
+
+    def __init__(self, threshold=DUPLICATE_SIMILARITY):
+        self.threshold = threshold
+        self.texts = {}  # riddle id -> normalized text
+        self.buckets = {}  # band key -> [riddle id]
+
+    def __len__(self):
+        return len(self.texts)
+
+    def matches(self, fingerprint):
+        """Return [(riddle id, similarity)] of indexed riddles at least threshold alike, most alike first."""
+        candidates = set()
+        for key in fingerprint.keys:
+            candidates.update(self.buckets.get(key, ()))
+        found = []
+        for riddle_id in candidates:
+            other = self.texts[riddle_id]
+            if other == fingerprint.normalized:
+                score = 1.0
+            else:
+                score = similarity(fingerprint.shingles, shingles(other))
+            if score >= self.threshold:
+                found.append((riddle_id, score))
+        found.sort(key=lambda match: -match[1])
+        return found
+
+    def add(self, riddle_id, fingerprint):
+        self.texts[riddle_id] = fingerprint.normalized
+        for key in fingerprint.keys:
+            self.buckets.setdefault(key, []).append(riddle_id)
+
+
+def catalog_index(conn, threshold=DUPLICATE_SIMILARITY):
+    """A DuplicateIndex of every riddle in the table."""
+    index = DuplicateIndex(threshold)
+    for riddle_id, riddle in conn.execute(SELECT_RIDDLE_TEXTS):
+        index.add(riddle_id, Fingerprint(riddle))
+    return index
+
+
+def near_duplicates(conn, threshold=DUPLICATE_SIMILARITY):
+    """Yield (riddle id, earlier riddle id, similarity) for every near-duplicate pair in the table."""
+    index = DuplicateIndex(threshold)
+    for riddle_id, riddle in conn.execute(SELECT_RIDDLE_TEXTS).fetchall():
+        fingerprint = Fingerprint(riddle)
+        for other_id, score in index.matches(fingerprint):
+            yield riddle_id, other_id, score
+        index.add(riddle_id, fingerprint)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search riddles and find near duplicates.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search_command = commands.add_parser("search", help="Full-text search over riddles and their choices")
+    search_command.add_argument("query")
+    search_command.add_argument("--difficulty")
+    search_command.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    duplicates_command = commands.add_parser("duplicates", help="List near-duplicate riddles")
+    duplicates_command.add_argument("--similarity", type=float, default=DUPLICATE_SIMILARITY,
+                                    help="Jaccard similarity that counts as a duplicate (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        migrate(conn)  # Also builds the search index if an older SQLite could not
+        started = time.perf_counter()
+        if args.command == "search":
+            rows = search(conn, args.query, args.difficulty, args.limit)
+            for riddle_id, difficulty, riddle in rows:
+                print(f"{riddle_id:<8} {difficulty:<8} {riddle}")
+            print(f"{len(rows)} riddles in {(time.perf_counter() - started) * 1000:.1f} ms.")
+        else:
+            texts = dict(conn.execute("SELECT id, riddle FROM riddles"))
+            pairs = 0
+            for riddle_id, other_id, score in near_duplicates(conn, args.similarity):
+                pairs += 1
+                print(f"{score:4.0%}  {other_id}: {texts[other_id]}\n      {riddle_id}: {texts[riddle_id]}")
+            print(f"{pairs} near-duplicate pairs among {len(texts)} riddles in {time.perf_counter() - started:.2f}s.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The game modules live one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import ConnectionPool, connect
+from migrations import migrate
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fully migrated, empty database file."""
+    path = str(tmp_path / "riddledb.db")
+    conn = connect(path)
+    migrate(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path)
+    yield pool
+    pool.close()
@@ -0,0 +1,109 @@
+from challengeclock import ChallengeClock, ClockTicker
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeScheduler:
+    """Tk's after/after_cancel, run by advancing a FakeClock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.pending = {}
+        self.next_handle = 0
+
+    def after(self, ms, callback):
+        self.next_handle += 1
+        self.pending[self.next_handle] = (self.clock.now + ms / 1000, callback)
+        return self.next_handle
+
+    def after_cancel(self, handle):
+        del self.pending[handle]
+
+    def advance(self, seconds):
+        end = self.clock.now + seconds
+        while self.pending:
+            handle, (due, callback) = min(self.pending.items(), key=lambda item: item[1][0])
+            if due > end:
+                break
+            del self.pending[handle]
+            self.clock.now = due
+            callback()
+        self.clock.now = end
+
+
+def test_clock_counts_down_with_pauses_and_penalties():
+    fake = FakeClock(100.0)
+    clock = ChallengeClock(180, clock=fake)
+    fake.now = 100.5
+    assert clock.seconds_left() == 180
+    fake.now = 110.0
+    assert clock.seconds_left() == 170
+    clock.pause()
+    fake.now = 200.0
+    assert clock.paused and clock.seconds_left() == 170
+    clock.resume()
+    clock.penalize(10)
+    fake.now = 205.0
+    assert clock.elapsed() == 15.0
+    assert clock.seconds_left() == 155
+    assert clock.until_next_second() == 1.0
+
+
+def test_clock_sync_and_expiry():
+    fake = FakeClock()
+    clock = ChallengeClock(180, clock=fake)
+    fake.now = 30.0
+    clock.sync(42.5)
+    assert clock.remaining() == 42.5
+    assert clock.until_next_second() == 0.5
+    fake.now = 72.5
+    assert clock.expired()
+    fake.now = 80.0
+    assert clock.seconds_left() == 0 and clock.until_next_second() == 0.0
+
+
+def test_ticker_fires_once_per_displayed_second():
+    fake = FakeClock()
+    clock = ChallengeClock(5, clock=fake)
+    scheduler = FakeScheduler(fake)
+    shown = []
+    ticker = ClockTicker(clock, scheduler, lambda: shown.append(clock.seconds_left()))
+    ticker.start()
+    scheduler.advance(2.5)
+    assert shown == [4, 3]
+    clock.penalize(1)  # 1.5s left: the next change is to 1, at 3.0
+    ticker.reschedule()
+    scheduler.advance(10)
+    assert shown == [4, 3, 1, 0]
+    assert not ticker.running and not scheduler.pending
+
+
+def test_ticker_keeps_one_callback_and_waits_while_paused():
+    fake = FakeClock()
+    clock = ChallengeClock(60, clock=fake)
+    scheduler = FakeScheduler(fake)
+    ticks = []
+    ticker = ClockTicker(clock, scheduler, lambda: ticks.append(fake.now))
+    ticker.start()
+    ticker.reschedule()
+    ticker.reschedule()
+    assert len(scheduler.pending) == 1
+
+    scheduler.advance(1.2)
+    clock.pause()
+    ticker.reschedule()
+    assert not scheduler.pending
+    scheduler.advance(30)
+    clock.resume()
+    ticker.reschedule()
+    scheduler.advance(1.0)
+    assert ticks == [1.0, 31.2 + 0.8]
+
+    ticker.stop()
+    assert not scheduler.pending
@@ -0,0 +1,43 @@
+import hashlib
+
+import pytest
+
+from credentials import LEGACY_SHA256, PBKDF2, SCRYPT, PasswordHasher, identify
+
+# Cheap costs, so the tests do not spend the time the real ones are tuned for
+FAST_SCRYPT = PasswordHasher(SCRYPT, n=2 ** 4)
+FAST_PBKDF2 = PasswordHasher(PBKDF2, iterations=1000)
+
+
+@pytest.mark.parametrize("hasher", [FAST_SCRYPT, FAST_PBKDF2])
+def test_hash_and_verify(hasher):
+    stored = hasher.hash("hunter2")
+    assert identify(stored) == hasher.scheme
+    assert stored != hasher.hash("hunter2")  # Salted
+    assert hasher.verify("hunter2", stored) == (True, None)
+    assert hasher.verify("hunter3", stored) == (False, None)
+
+
+def test_legacy_hash_is_upgraded_on_a_match():
+    legacy = hashlib.sha256(b"hunter2").hexdigest()
+    assert identify(legacy) == LEGACY_SHA256
+    matches, upgraded = FAST_SCRYPT.verify("hunter2", legacy.upper())
+    assert matches
+    assert identify(upgraded) == SCRYPT
+    assert FAST_SCRYPT.verify("hunter2", upgraded) == (True, None)
+    assert FAST_SCRYPT.verify("hunter3", legacy) == (False, None)
+
+
+def test_changed_costs_are_rehashed():
+    stored = FAST_PBKDF2.hash("hunter2")
+    matches, upgraded = FAST_SCRYPT.verify("hunter2", stored)
+    assert matches and upgraded.startswith(f"{SCRYPT}$16$")
+    assert FAST_SCRYPT.verify("hunter3", stored) == (False, None)
+
+
+def test_unknown_players_and_hashes_never_verify():
+    assert FAST_SCRYPT.verify("hunter2", None) == (False, None)
+    assert FAST_SCRYPT.verify("guest", "!guest") == (False, None)
+    assert identify("!guest") is None
+    with pytest.raises(ValueError):
+        PasswordHasher("md5")
@@ -0,0 +1,96 @@
+import pytest
+
+from gameengine import (CLASSIC_DIFFICULTIES, CLASSIC_HP, REQUIRED_CORRECT, TIME_CHALLENGE_DIFFICULTY,
+                        TIME_CHALLENGE_SECONDS, WRONG_ANSWER_PENALTY, ClassicSession, TimeChallengeSession)
+from riddlecatalog import Riddle, RiddleCatalog
+
+
+@pytest.fixture
+def catalog():
+    riddles = [Riddle(f"{difficulty}-{number}", f"Riddle {number}", ("a", "b", "c", "d"), number % 4 + 1, difficulty)
+               for difficulty in (*CLASSIC_DIFFICULTIES, TIME_CHALLENGE_DIFFICULTY) for number in range(12)]
+    return RiddleCatalog(riddles, version=1)
+
+
+def wrong(session):
+    return session.current.correct_answer % 4 + 1
+
+
+def time_challenge(catalog, **kwargs):
+    return TimeChallengeSession(catalog.difficulty(TIME_CHALLENGE_DIFFICULTY), seed=7, now=0.0, clock=lambda: 0.0,
+                                **kwargs)
+
+
+def test_classic_completes_after_every_difficulty(catalog):
+    session = ClassicSession(catalog.by_difficulty, seed=1, clock=lambda: 0.0)
+    for difficulty in CLASSIC_DIFFICULTIES:
+        assert session.difficulty == difficulty
+        for progress in range(REQUIRED_CORRECT[difficulty]):
+            assert session.progress == progress
+            assert session.current.difficulty == difficulty
+            assert session.answer(session.current.correct_answer) is True
+    assert session.finished and session.completed
+    assert session.hp == CLASSIC_HP
+    with pytest.raises(RuntimeError):
+        session.answer(1)
+
+
+def test_classic_wrong_answers_cost_hp_but_keep_progress(catalog):
+    session = ClassicSession(catalog.by_difficulty, seed=2, clock=lambda: 0.0)
+    session.answer(session.current.correct_answer)
+    for hp in range(CLASSIC_HP - 1, 0, -1):
+        assert session.answer(wrong(session)) is False
+        assert session.hp == hp and session.progress == 1
+        assert not session.finished
+    session.answer(wrong(session))
+    assert session.hp == 0
+    assert session.finished and not session.completed
+    assert [correct for _, _, correct, _ in session.answers] == [True] + [False] * CLASSIC_HP
+
+
+def test_classic_with_no_riddles_finishes_at_once():
+    session = ClassicSession({}, seed=3)
+    assert session.current is None
+    assert session.finished and not session.completed
+
+
+def test_time_challenge_streaks_and_penalties(catalog):
+    session = time_challenge(catalog)
+    for _ in range(3):
+        assert session.answer(session.current.correct_answer, now=1.0) is True
+    assert session.answer(wrong(session), now=2.0) is False
+    assert session.current_streak == 0
+    assert session.total_deduction == WRONG_ANSWER_PENALTY
+    assert session.tick(now=2.0) == TIME_CHALLENGE_SECONDS - 2 - WRONG_ANSWER_PENALTY
+    for _ in range(2):
+        session.answer(session.current.correct_answer, now=3.0)
+    assert (session.score, session.highest_streak, session.current_streak) == (5, 3, 2)
+    assert session.final_score == 15
+
+
+def test_time_challenge_pause_does_not_count(catalog):
+    session = time_challenge(catalog)
+    session.pause(now=10.0)
+    assert session.tick(now=500.0) == TIME_CHALLENGE_SECONDS - 10
+    session.resume(now=500.0)
+    assert session.tick(now=520.0) == TIME_CHALLENGE_SECONDS - 30
+    assert not session.finished
+
+
+def test_time_challenge_penalty_can_end_the_session(catalog):
+    session = time_challenge(catalog)
+    now = TIME_CHALLENGE_SECONDS - WRONG_ANSWER_PENALTY + 1
+    assert session.answer(wrong(session), now=now) is False
+    assert session.finished
+    assert len(session.answers) == 1
+
+
+def test_time_challenge_refuses_a_late_answer(catalog):
+    session = time_challenge(catalog)
+    session.answer(session.current.correct_answer, now=1.0)
+    assert session.answer(session.current.correct_answer, now=TIME_CHALLENGE_SECONDS + 0.5) is None
+    assert session.finished
+    assert session.score == 1
+    assert len(session.answers) == 1
+    with pytest.raises(RuntimeError):
+        session.answer(1, now=TIME_CHALLENGE_SECONDS + 1)
@@ -0,0 +1,48 @@
+import time
+
+from database import PlayerRepository
+from guests import GUEST_PASSWORD_HASH, LEGACY_GUEST_PASSWORD_HASH, GuestAllocator, cleanup_guests, is_guest
+
+
+def test_allocators_share_the_sequence_without_collisions(pool):
+    first = GuestAllocator(pool, block_size=3)
+    second = GuestAllocator(pool, block_size=3)
+    names = [first.new_guest(), first.new_guest(), second.new_guest()] + [first.new_guest() for _ in range(4)]
+    assert names[:3] == ["player_10000", "player_10001", "player_10003"]
+    assert names[3:] == ["player_10002", "player_10006", "player_10007", "player_10008"]
+    assert all(is_guest(name) for name in names)
+    with pool.connection() as conn:
+        assert conn.execute("SELECT next_number FROM guest_sequence").fetchone()[0] == 10009
+        assert conn.execute("SELECT COUNT(*) FROM playerinfo").fetchone()[0] == 0
+
+
+def test_persist_stores_a_row_once(pool):
+    allocator = GuestAllocator(pool)
+    name = allocator.new_guest()
+    assert allocator.persist(name) is not None
+    assert allocator.persist(name) is None
+    players = PlayerRepository(pool)
+    assert players.password_hash(name) == GUEST_PASSWORD_HASH
+    assert players.player_data(name) == ("not_completed", 0)
+
+
+def test_cleanup_only_removes_old_guests_with_nothing_recorded(pool):
+    players = PlayerRepository(pool)
+    day_ago = time.time() - 25 * 3600
+    with pool.transaction() as conn:
+        conn.executemany("INSERT INTO playerinfo (username, password_hash, best_score, created_at) VALUES (?, ?, ?, ?)", [
+            ("player_1", LEGACY_GUEST_PASSWORD_HASH, 0, None),  # From before created_at
+            ("player_2", GUEST_PASSWORD_HASH, 0, day_ago),
+            ("player_3", GUEST_PASSWORD_HASH, 12, day_ago),  # Has a score
+            ("player_4", GUEST_PASSWORD_HASH, 0, time.time()),  # May still have a result queued
+            ("alice", "scrypt$whatever", 0, day_ago),
+        ])
+        conn.execute("UPDATE playerinfo SET classic_completion = 'completed' WHERE username = 'player_2'")
+        conn.execute("INSERT INTO playerinfo (username, password_hash, created_at) VALUES ('player_5', ?, ?)",
+                     (GUEST_PASSWORD_HASH, day_ago))
+
+    assert cleanup_guests(pool, chunk_size=1) == ["player_1", "player_5"]
+    assert players.player_data("player_1") == (None, None)
+    for username in ("player_2", "player_3", "player_4", "alice"):
+        assert players.username_exists(username)
+    assert cleanup_guests(pool, min_age_hours=0) == ["player_4"]
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from leaderboard import LeaderboardPager
+
+ORDERED = "SELECT username, classic_completion, best_score FROM playerinfo ORDER BY best_score DESC, id DESC"
+
+
+@pytest.fixture
+def ranked(pool):
+    rng = random.Random(3)
+    with pool.transaction() as conn:
+        # Few distinct scores, so many ties are split across page boundaries
+        conn.executemany("INSERT INTO playerinfo (username, password_hash, best_score, classic_completion) VALUES (?, '!', ?, ?)",
+                         ((f"p{i}", rng.randrange(6), rng.choice(("completed", "not_completed"))) for i in range(103)))
+        return conn.execute(ORDERED).fetchall()
+
+
+def test_pages_match_a_full_ordered_scan(pool, ranked):
+    pager = LeaderboardPager(pool, page_size=7)
+    assert len(pager) == len(ranked)
+    assert pager.rows(0, 1000) == ranked
+    for page in range(len(ranked) // 7 + 1):
+        assert pager.page(page) == ranked[page * 7:(page + 1) * 7]
+
+
+def test_jumps_and_slices_without_known_boundaries(pool, ranked):
+    pager = LeaderboardPager(pool, page_size=7, cached_pages=2)
+    assert pager.rows(60, 15) == ranked[60:75]  # Seeks to page 8 with one OFFSET lookup
+    assert pager.rows(3, 9) == ranked[3:12]
+    assert pager.rows(-5, 8) == ranked[0:8]
+    assert pager.rows(100, 50) == ranked[100:]
+    assert len(pager._pages) == 2
+
+
+def test_past_the_end(pool, ranked):
+    pager = LeaderboardPager(pool, page_size=10)
+    assert pager.page(50) == []
+    assert pager.rows(len(ranked), 10) == []
+
+    with pool.transaction() as conn:
+        conn.execute("DELETE FROM playerinfo WHERE id > 50")
+        remaining = conn.execute(ORDERED).fetchall()
+    assert len(pager) == len(ranked)  # The count is stale until refresh()
+    assert pager.page(8) == []
+    assert pager.rows(40, 30) == remaining[40:]
+    pager.refresh()
+    assert len(pager) == 50
+    assert pager.rows(0, 100) == remaining
@@ -0,0 +1,73 @@
+import hashlib
+
+from database import connect
+from migrations import LATEST_VERSION, MIGRATIONS, has_fts5, migrate, schema_version
+
+
+def legacy_database(path):
+    """A database as the game created it before migrations: two tables, user_version 0."""
+    conn = connect(path)
+    conn.execute('''
+        CREATE TABLE playerinfo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            classic_completion TEXT NOT NULL DEFAULT 'not_completed',
+            best_score INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE riddles (
+            id TEXT PRIMARY KEY, riddle TEXT NOT NULL,
+            choice_1 TEXT NOT NULL, choice_2 TEXT NOT NULL, choice_3 TEXT NOT NULL, choice_4 TEXT NOT NULL,
+            correct_answer INTEGER NOT NULL, difficulty TEXT NOT NULL
+        )
+    ''')
+    conn.execute("INSERT INTO playerinfo (username, password_hash, classic_completion, best_score) VALUES (?, ?, 'completed', 42)",
+                 ("alice", hashlib.sha256(b"hunter2").hexdigest()))
+    conn.execute("INSERT INTO riddles VALUES ('e1', 'What has keys but opens no locks?', 'A piano', 'A map', 'A door', 'A safe', 1, 'Easy')")
+    return conn
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def test_legacy_database_is_brought_up_to_date(tmp_path):
+    conn = legacy_database(str(tmp_path / "old.db"))
+    assert schema_version(conn) == 0
+    assert migrate(conn) == [version for version, _, _ in MIGRATIONS]
+    assert schema_version(conn) == LATEST_VERSION
+
+    assert conn.execute("SELECT username, classic_completion, best_score, average_streak, created_at FROM playerinfo").fetchall() == \
+           [("alice", "completed", 42, 0.0, None)]
+    assert conn.execute("SELECT next_number FROM guest_sequence").fetchone()[0] == 10000
+    assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+    version = conn.execute("SELECT version FROM riddle_catalog_version").fetchone()[0]
+    conn.execute("UPDATE riddles SET difficulty = 'Medium' WHERE id = 'e1'")
+    assert conn.execute("SELECT version FROM riddle_catalog_version").fetchone()[0] == version + 1
+    if has_fts5(conn):
+        assert conn.execute("SELECT rowid FROM riddles_search WHERE riddles_search MATCH 'piano'").fetchall() == [(1,)]
+
+    assert migrate(conn) == []
+    conn.close()
+
+
+def test_migrations_apply_in_steps(tmp_path):
+    conn = legacy_database(str(tmp_path / "old.db"))
+    assert migrate(conn, target=4) == [1, 2, 3, 4]
+    assert "average_streak" not in columns(conn, "playerinfo")
+    assert migrate(conn) == list(range(5, LATEST_VERSION + 1))
+    assert columns(conn, "playerinfo")[-3:] == ["average_streak", "percentile_rank", "created_at"]
+    conn.close()
+
+
+def test_every_step_can_run_again(tmp_path):
+    # A step may be rerun if a crash lands between its changes and the version bump
+    conn = legacy_database(str(tmp_path / "old.db"))
+    migrate(conn)
+    schema = conn.execute("SELECT type, name FROM sqlite_master ORDER BY name").fetchall()
+    for _, _, step in MIGRATIONS:
+        step(conn)
+    assert conn.execute("SELECT type, name FROM sqlite_master ORDER BY name").fetchall() == schema
+    conn.close()
@@ -0,0 +1,69 @@
+import pytest
+
+from database import connect
+from gameengine import CLASSIC, TIME_CHALLENGE
+from playerstats import recompute
+
+INSERT_SESSION = '''
+    INSERT INTO sessions (username, mode, seed, started_at, ended_at, outcome,
+                          score, final_score, highest_streak, deduction, hp_lost, answer_count)
+    VALUES (?, ?, 0, 0, 0, ?, ?, 0, ?, 0, 0, 0)
+'''
+SELECT_STATS = '''
+    SELECT username, best_score, classic_completion, average_streak, round(percentile_rank, 2)
+    FROM playerinfo
+    ORDER BY id
+'''
+
+
+@pytest.fixture
+def history(db_path):
+    conn = connect(db_path)
+    conn.executemany("INSERT INTO playerinfo (username, password_hash, best_score) VALUES (?, '!', ?)",
+                     [("alice", 0), ("bob", 50), ("carol", 0)])
+    # (username, mode, outcome, score, highest streak); final_score is left 0, as recompute works it out
+    conn.executemany(INSERT_SESSION, [
+        ("alice", TIME_CHALLENGE, "time_up", 5, 3),
+        ("alice", TIME_CHALLENGE, "time_up", 4, 4),
+        ("alice", TIME_CHALLENGE, "abandoned", 100, 10),
+        ("bob", TIME_CHALLENGE, "time_up", 2, 2),
+        ("bob", CLASSIC, "completed", 21, 21),
+        ("carol", CLASSIC, "out_of_hp", 3, 2),
+        ("player_10001", TIME_CHALLENGE, "time_up", 9, 9),  # A guest with no row
+    ])
+    conn.close()
+    return db_path
+
+
+def stats(db_path):
+    conn = connect(db_path)
+    try:
+        return conn.execute(SELECT_STATS).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_recompute_keeps_stored_bests(history, use_numpy):
+    summary = recompute(history, chunk_size=2, use_numpy=use_numpy)
+    assert (summary["players"], summary["changed"]) == (3, 2)  # carol has nothing to change
+    assert stats(history) == [
+        ("alice", 16, "not_completed", 3.5, 33.33),
+        ("bob", 50, "completed", 2.0, 66.67),
+        ("carol", 0, "not_completed", 0.0, 0.0),
+    ]
+    assert recompute(history, chunk_size=2, use_numpy=use_numpy)["changed"] == 0
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_recompute_replace_trusts_the_history(history, use_numpy):
+    recompute(history, replace=True, use_numpy=use_numpy)
+    assert stats(history) == [
+        ("alice", 16, "not_completed", 3.5, 66.67),
+        ("bob", 4, "completed", 2.0, 33.33),
+        ("carol", 0, "not_completed", 0.0, 0.0),
+    ]
+
+
+def test_recompute_with_no_players(db_path):
+    assert recompute(db_path)["changed"] == 0
@@ -0,0 +1,37 @@
+from questiondealer import QuestionDealer
+
+
+def test_every_size_deals_a_permutation():
+    for size in (1, 2, 3, 7, 64, 65, 1000):
+        riddles = list(range(size))
+        for seed in (0, 1, 2**64 - 1):
+            assert sorted(QuestionDealer(riddles, seed)) == riddles
+
+
+def test_same_seed_same_order():
+    riddles = list(range(500))
+    assert list(QuestionDealer(riddles, 42)) == list(QuestionDealer(riddles, 42))
+    assert list(QuestionDealer(riddles, 42)) != list(QuestionDealer(riddles, 43))
+
+
+def test_order_is_shuffled():
+    riddles = list(range(500))
+    dealt = list(QuestionDealer(riddles, 7))
+    in_place = sum(1 for position, riddle in enumerate(dealt) if position == riddle)
+    assert in_place < 10
+
+
+def test_requeued_riddles_come_after_the_deck():
+    dealer = QuestionDealer(["a", "b", "c"], seed=3)
+    first = dealer.deal()
+    dealer.requeue(first)
+    assert len(dealer) == 3
+    rest = list(dealer)
+    assert sorted(rest[:2]) == sorted({"a", "b", "c"} - {first})
+    assert rest[2] == first
+    assert dealer.deal() is None
+    assert len(dealer) == 0
+
+
+def test_empty_deck():
+    assert QuestionDealer([], seed=1).deal() is None
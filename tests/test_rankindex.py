@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from leaderboard import RankIndex
+
+
+def check(index, keys):
+    keys = sorted(keys)
+    assert len(index) == len(keys)
+    assert [index.select(position) for position in range(len(keys))] == keys
+    assert list(index.slice(0, len(keys))) == keys
+    for key in set(keys):
+        assert index.rank(key) == keys.index(key)
+
+
+def test_matches_a_sorted_list_through_inserts_and_removes():
+    rng = random.Random(5)
+    keys = [rng.randrange(1000) for _ in range(300)]
+    index = RankIndex(keys, chunk_size=8)  # Small chunks, so they split and empty often
+    check(index, keys)
+    for _ in range(2000):
+        if keys and rng.random() < 0.5:
+            key = keys.pop(rng.randrange(len(keys)))
+            index.remove(key)
+        else:
+            key = rng.randrange(1000)
+            keys.append(key)
+            index.insert(key)
+    check(index, keys)
+
+
+def test_rank_of_missing_keys():
+    index = RankIndex([10, 20, 30])
+    assert index.rank(5) == 0
+    assert index.rank(25) == 2
+    assert index.rank(99) == 3
+
+
+def test_slice_is_clamped():
+    index = RankIndex(range(10), chunk_size=3)
+    assert list(index.slice(8, 20)) == [8, 9]
+    assert list(index.slice(-5, 2)) == [0, 1]
+    assert list(index.slice(5, 5)) == []
+
+
+def test_errors():
+    index = RankIndex([1, 2], chunk_size=2)
+    with pytest.raises(KeyError):
+        index.remove(3)
+    with pytest.raises(IndexError):
+        index.select(2)
+    index.remove(1)
+    index.remove(2)
+    assert len(index) == 0
+    index.insert(4)
+    assert index.select(0) == 4
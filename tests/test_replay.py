@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from gameengine import CLASSIC_DIFFICULTIES, TIME_CHALLENGE_DIFFICULTY, TIME_CHALLENGE_SECONDS, ClassicSession, TimeChallengeSession
+from replay import ReplayLog, TruncatedLog, encode, read_replays, replay
+from riddlecatalog import Riddle, RiddleCatalog
+
+
+@pytest.fixture
+def catalog():
+    riddles = [Riddle(f"{difficulty}-{number}", f"Riddle {number}", ("a", "b", "c", "d"), number % 4 + 1, difficulty)
+               for difficulty in (*CLASSIC_DIFFICULTIES, TIME_CHALLENGE_DIFFICULTY) for number in range(12)]
+    return RiddleCatalog(riddles, version=3)
+
+
+def play_classic(catalog, seed):
+    rng = random.Random(seed)
+    now = [0.0]
+    session = ClassicSession(catalog.by_difficulty, seed, requeue_missed=True, clock=lambda: now[0],
+                             catalog_version=catalog.version)
+    while not session.finished:
+        now[0] += rng.uniform(0.5, 5.0)
+        session.answer(rng.choice((1, session.current.correct_answer)))
+    return session
+
+
+def play_time_challenge(catalog, seed):
+    rng = random.Random(seed)
+    session = TimeChallengeSession(catalog.difficulty(TIME_CHALLENGE_DIFFICULTY), seed, now=0.0, clock=lambda: 0.0,
+                                   catalog_version=catalog.version)
+    now = 0.0
+    while not session.finished:
+        now += rng.uniform(1.0, 20.0)
+        session.answer(rng.choice((1, session.current.correct_answer)), now=now)
+    return session
+
+
+def read_replays_of(tmp_path, session):
+    path = tmp_path / f"{session.mode}-{session.seed}.replays"
+    ReplayLog(str(path)).append([encode("carol", session)])
+    return read_replays(str(path))
+
+
+def test_log_round_trip_and_replay(tmp_path, catalog):
+    sessions = [play_classic(catalog, seed) for seed in range(3)] + [play_time_challenge(catalog, seed) for seed in range(3)]
+    log = ReplayLog(str(tmp_path / "game.replays"))
+    log.append([encode("alice", session) for session in sessions[:2]])
+    log.append([encode(None, session) for session in sessions[2:]])
+
+    records = list(read_replays(log.path))
+    assert len(records) == len(sessions)
+    for record, session in zip(records, sessions):
+        assert record.mode == session.mode
+        assert record.seed == session.seed
+        assert record.catalog_version == catalog.version
+        assert [(riddle_id, choice) for riddle_id, choice, _ in record.answers] == \
+               [(riddle_id, choice) for riddle_id, choice, _, _ in session.answers]
+        assert replay(record, catalog) == (True, "ok")
+    assert records[0].username == "alice" and records[2].username is None
+
+
+def test_tampered_records_fail(tmp_path, catalog):
+    record = next(read_replays_of(tmp_path, play_time_challenge(catalog, 9)))
+    record.score += 1
+    assert replay(record, catalog)[0] is False
+
+    record = next(read_replays_of(tmp_path, play_classic(catalog, 9)))
+    riddle_id, choice, at = record.answers[0]
+    record.answers[0] = (riddle_id, choice % 4 + 1, at)
+    assert replay(record, catalog)[0] is False
+
+
+def test_answer_after_the_time_ran_out_fails(tmp_path, catalog):
+    record = next(read_replays_of(tmp_path, play_time_challenge(catalog, 4)))
+    riddle_id, choice, _ = record.answers[-1]
+    record.answers[-1] = (riddle_id, choice, TIME_CHALLENGE_SECONDS + 1.0)
+    assert replay(record, catalog) == (False, f"answer {len(record.answers)} came after the time ran out")
+
+
+def test_truncated_log(tmp_path, catalog):
+    path = tmp_path / "game.replays"
+    ReplayLog(str(path)).append([encode("bob", play_classic(catalog, 1))] * 2)
+    path.write_bytes(path.read_bytes()[:-3])
+    records = read_replays(str(path))
+    assert next(records).username == "bob"
+    with pytest.raises(TruncatedLog):
+        next(records)
@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+
+import pytest
+
+import resultsink
+from database import PlayerRepository
+from resultsink import MAX_REQUEUES, WRITE_ATTEMPTS, ResultSink
+
+
+class FlakyPlayers(PlayerRepository):
+    """A repository whose batch writes fail the first `failures` times, or block until released."""
+
+    def __init__(self, pool, failures=0, gate=None):
+        super().__init__(pool)
+        self.failures = failures
+        self.gate = gate
+        self.calls = 0
+
+    def record_results(self, best_scores, completed_usernames):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait()
+        if self.calls <= self.failures:
+            raise sqlite3.OperationalError("database is locked")
+        super().record_results(best_scores, completed_usernames)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(resultsink, "RETRY_DELAY", 0)
+
+
+@pytest.fixture
+def players(pool):
+    players = PlayerRepository(pool)
+    for username in ("alice", "bob"):
+        players.add_player(username, "!")
+    return players
+
+
+def test_batches_keep_the_best_score(players):
+    sink = ResultSink(players, flush_interval=0.01)
+    for score in (10, 30, 20):
+        sink.submit_score("alice", score)
+    sink.submit_score("bob", 5)
+    sink.submit_classic_completion("bob")
+    assert sink.flush()
+    sink.close()
+    assert players.player_data("alice") == ("not_completed", 30)
+    assert players.player_data("bob") == ("completed", 5)
+    assert sink.written == 5
+
+
+def test_busy_database_is_retried(pool, players):
+    flaky = FlakyPlayers(pool, failures=WRITE_ATTEMPTS + 2)  # Fails the first pass and part of the requeued one
+    sink = ResultSink(flaky, flush_interval=0.01)
+    sink.submit_score("alice", 42)
+    assert sink.flush()
+    sink.close()
+    assert flaky.calls == WRITE_ATTEMPTS + 3
+    assert players.player_data("alice")[1] == 42
+
+
+def test_results_that_never_save_are_dropped(pool, players):
+    flaky = FlakyPlayers(pool, failures=10 ** 6)
+    sink = ResultSink(flaky, flush_interval=0.01)
+    sink.submit_score("alice", 42)
+    assert sink.flush()
+    sink.close()
+    assert flaky.calls == WRITE_ATTEMPTS * (MAX_REQUEUES + 1)
+    assert players.player_data("alice")[1] == 0
+    assert sink.written == 0
+
+
+def test_flush_gives_up_after_its_timeout(pool, players):
+    gate = threading.Event()
+    sink = ResultSink(FlakyPlayers(pool, gate=gate), flush_interval=0.01)
+    sink.submit_score("bob", 7)
+    assert not sink.flush(timeout=0.05)
+    gate.set()
+    assert sink.flush()
+    sink.close()
+    assert players.player_data("bob")[1] == 7
+
+
+def test_flush_without_results_returns_at_once(players):
+    assert ResultSink(players).flush(timeout=0)
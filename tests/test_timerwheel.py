@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from timerwheel import TimerWheel
+
+
+def run(wheel, until, start=0.0, step=0.005):
+    """Advance the wheel from start in small steps; return {payload: time it fired}."""
+    fired = {}
+    now = start
+    while now < until:
+        now += step
+        for payload in wheel.advance(now):
+            fired[payload] = now
+    return fired
+
+
+def test_fires_each_deadline_once_no_earlier_and_within_a_tick():
+    wheel = TimerWheel(now=0.0, clock=lambda: 0.0)
+    rng = random.Random(1)
+    # Spread over every level: under a second to well past the 64-tick and 4096-tick spans
+    deadlines = {n: rng.uniform(0.01, 200.0) for n in range(500)}
+    for payload, deadline in deadlines.items():
+        wheel.schedule(deadline, payload)
+    assert len(wheel) == len(deadlines)
+
+    fired = run(wheel, 201.0, step=0.05)
+    assert fired.keys() == deadlines.keys()
+    for payload, at in fired.items():
+        assert deadlines[payload] <= at < deadlines[payload] + wheel.tick + 0.05
+    assert len(wheel) == 0
+
+
+def test_advance_returns_payloads_earliest_first():
+    wheel = TimerWheel(now=0.0, clock=lambda: 0.0)
+    for payload, deadline in (("c", 3.0), ("a", 1.0), ("b", 2.0)):
+        wheel.schedule(deadline, payload)
+    assert wheel.advance(5.0) == ["a", "b", "c"]
+
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(now=0.0, clock=lambda: 0.0)
+    kept = wheel.schedule(1.0, "kept")
+    dropped = wheel.schedule(1.0, "dropped")
+    moved = wheel.schedule(1.0, "moved")
+    wheel.cancel(dropped)
+    wheel.cancel(dropped)  # Cancelling twice is harmless
+    moved = wheel.reschedule(moved, 90.0)
+    assert not dropped.active and kept.active and moved.active
+
+    assert run(wheel, 2.0).keys() == {"kept"}
+    assert run(wheel, 91.0, start=2.0, step=0.05).keys() == {"moved"}
+
+
+def test_deadline_past_the_horizon_is_refused():
+    wheel = TimerWheel(now=0.0, clock=lambda: 0.0, slot_bits=2, levels=2)  # 16 ticks ahead
+    wheel.schedule(0.15, "near")
+    with pytest.raises(ValueError):
+        wheel.schedule(1.0, "far")
+
+
+def test_lags_are_recorded():
+    wheel = TimerWheel(now=0.0, clock=lambda: 0.0)
+    wheel.schedule(1.0, "late")
+    assert wheel.advance(1.5) == ["late"]
+    assert wheel.lags.max == pytest.approx(0.5)
@@ -0,0 +1,156 @@
+"""Hierarchical timer wheel for many deadlines on one thread.
+
+Time is cut into ticks. Level 0 has one slot per tick for the next SLOTS
+ticks; each level above covers SLOTS times the span of the one below, so
+four levels of 64 slots at 10 ms reach 46 hours ahead. A timer goes into
+the slot for its deadline at the lowest level that reaches it, which makes
+schedule() and cancel() O(1) dictionary operations. When a lower level
+wraps round, the next slot of the level above is cascaded down; every
+timer is moved at most once per level on its way to level 0.
+
+advance() fires everything due up to now as one batch and records how
+late each timer fired (the wheel can only fire on a tick boundary, and
+only as often as its owner calls advance()); lags() reports percentiles
+of that lag.
+
+    wheel = TimerWheel()
+    timer = wheel.schedule(time.monotonic() + 180, session)
+    wheel.cancel(timer)
+    for session in wheel.advance():
+        ...
+"""
+import math
+import time
+from array import array
+
+TICK_SECONDS = 0.01
+SLOT_BITS = 6  # 64 slots per level
+LEVELS = 4
+LAG_SAMPLES = 10000  # Most recent lags kept for percentiles
+
+
+class Timer:
+    """A scheduled deadline; pass it to TimerWheel.cancel() to drop it."""
+
+    __slots__ = ("deadline", "expires", "payload", "bucket")
+
+    def __init__(self, deadline, expires, payload):
+        self.deadline = deadline
+        self.expires = expires  # Tick number
+        self.payload = payload
+        self.bucket = None  # The slot holding the timer, or None once fired or cancelled
+
+    @property
+    def active(self):
+        return self.bucket is not None
+
+
+class LagRecorder:
+    """How late timers fired: a count, the maximum and a window of recent samples."""
+
+    def __init__(self, samples=LAG_SAMPLES):
+        self.samples = array("d", bytes(8 * samples))
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, lag):
+        self.samples[self.count % len(self.samples)] = lag
+        self.count += 1
+        if lag > self.max:
+            self.max = lag
+
+    def percentiles(self, fractions=(0.5, 0.9, 0.99)):
+        """Return {fraction: lag in seconds} over the recent samples."""
+        recent = sorted(self.samples[:min(self.count, len(self.samples))])
+        if not recent:
+            return {fraction: 0.0 for fraction in fractions}
+        return {fraction: recent[min(len(recent) - 1, int(fraction * len(recent)))] for fraction in fractions}
+
+
+class TimerWheel:
+    """Deadlines on a hierarchical wheel of ticks, fired in batches by advance()."""
+
+    def __init__(self, tick=TICK_SECONDS, slot_bits=SLOT_BITS, levels=LEVELS, now=None, clock=time.monotonic):
+        self.tick = tick
+        self.slot_bits = slot_bits
+        self.mask = (1 << slot_bits) - 1
+        self.horizon = 1 << (slot_bits * levels)  # Ticks ahead the top level reaches
+        self.clock = clock
+        self.origin = clock() if now is None else now
+        self.current = 0  # Last tick processed
+        self.levels = [[{} for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self.lags = LagRecorder()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, deadline, payload):
+        """Fire payload at deadline (on the same clock). Returns a Timer for cancel()."""
+        expires = max(self.current + 1, math.ceil((deadline - self.origin) / self.tick))
+        if expires - self.current >= self.horizon:
+            raise ValueError(f"Deadline is more than {self.horizon * self.tick:.0f}s ahead.")
+        timer = Timer(deadline, expires, payload)
+        self._place(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer):
+        """Drop a timer that has not fired yet; cancelling twice is harmless."""
+        if timer is not None and timer.bucket is not None:
+            del timer.bucket[timer]
+            timer.bucket = None
+            self._count -= 1
+
+    def reschedule(self, timer, deadline):
+        """Cancel timer and schedule its payload at a new deadline."""
+        self.cancel(timer)
+        return self.schedule(deadline, timer.payload)
+
+    def _place(self, timer):
+        delta = timer.expires - self.current
+        level = 0
+        while delta >= 1 << (self.slot_bits * (level + 1)):
+            level += 1
+        bucket = self.levels[level][(timer.expires >> (self.slot_bits * level)) & self.mask]
+        bucket[timer] = None
+        timer.bucket = bucket
+
+    def _cascade(self):
+        """Move the timers of the slots that just came into range one level down."""
+        for level in range(1, len(self.levels)):
+            index = (self.current >> (self.slot_bits * level)) & self.mask
+            bucket = self.levels[level][index]
+            if bucket:
+                timers = list(bucket)
+                bucket.clear()
+                for timer in timers:
+                    self._place(timer)
+            if index:
+                break  # The levels above only move when this one wraps
+
+    def advance(self, now=None):
+        """Fire every timer due by now. Returns their payloads, earliest first."""
+        if now is None:
+            now = self.clock()
+        target = math.floor((now - self.origin) / self.tick)
+        if not self._count:
+            self.current = max(self.current, target)  # Nothing to fire; skip the idle ticks
+            return []
+
+        fired = []
+        level0 = self.levels[0]
+        while self.current < target and self._count:
+            self.current += 1
+            if not self.current & self.mask:
+                self._cascade()
+            bucket = level0[self.current & self.mask]
+            if bucket:
+                for timer in bucket:
+                    timer.bucket = None
+                    self.lags.record(now - timer.deadline)
+                    fired.append(timer.payload)
+                self._count -= len(bucket)
+                bucket.clear()
+        self.current = max(self.current, target)
+        return fired